@@ -0,0 +1,18 @@
+-- AlterTable
+ALTER TABLE "mumbai_gps_points" ADD COLUMN "updated_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+-- CreateIndex
+CREATE INDEX "mumbai_gps_points_updated_at_idx" ON "mumbai_gps_points"("updated_at");
+
+-- Keep updated_at current for writers that bypass Prisma (seeds, raw SQL);
+-- the ML service's incremental zone clustering uses it as a watermark
+CREATE OR REPLACE FUNCTION "mumbai_gps_points_touch_updated_at"() RETURNS TRIGGER AS $$
+BEGIN
+    NEW."updated_at" = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER "mumbai_gps_points_touch_updated_at"
+    BEFORE UPDATE ON "mumbai_gps_points"
+    FOR EACH ROW EXECUTE FUNCTION "mumbai_gps_points_touch_updated_at"();
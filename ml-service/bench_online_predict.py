@@ -0,0 +1,79 @@
+"""
+Benchmark: latency of GET /predict/earnings/{user_id} (feature-store
+lookup + micro-batched model call) and of the batch route, with the saved
+earnings model and a warm in-process feature store.  Redis adds one
+round trip per request on top of these numbers.
+
+Run:  python bench_online_predict.py
+"""
+
+import asyncio
+import sys
+import time
+import types
+import warnings
+
+import numpy as np
+
+import routers.predict as predict
+from models.earnings_model import EarningsModel
+from test_features import _synthetic_csv
+from utils.feature_store import EarningsFeatureStore, RollingEarnings
+from utils.micro_batcher import MicroBatcher
+
+warnings.filterwarnings("ignore")
+
+N_USERS = 2000
+
+
+def _percentiles(samples_s: list[float]) -> str:
+    ms = np.array(samples_s) * 1e3
+    return " ".join(f"p{q}={np.percentile(ms, q):.2f}ms" for q in (50, 90, 99))
+
+
+async def _run(app, user_ids):
+    app.earnings_batcher = MicroBatcher(app.earnings_model.predict_batch,
+                                        max_batch_size=200, max_delay_ms=5)
+
+    async def timed(uid):
+        start = time.perf_counter()
+        await predict.predict_user_earnings(uid)
+        return time.perf_counter() - start
+
+    sequential = [await timed(uid) for uid in user_ids[:500]]
+    print(f"single, sequential:      {_percentiles(sequential)}")
+    for concurrency in (10, 100):
+        samples = []
+        for start in range(0, len(user_ids), concurrency):
+            batch = user_ids[start:start + concurrency]
+            samples += await asyncio.gather(*(timed(uid) for uid in batch))
+        print(f"single, {concurrency:>3} concurrent:  {_percentiles(samples)}")
+
+    for n in (100, 1000):
+        body = predict.EarningsUsersRequest(user_ids=user_ids[:n])
+        samples = []
+        for _ in range(20):
+            start = time.perf_counter()
+            await predict.predict_users_earnings(body)
+            samples.append(time.perf_counter() - start)
+        print(f"batch of {n:>4}:           {_percentiles(samples)}")
+
+
+def main():
+    model = EarningsModel()
+    model.load("./data/saved_models")
+    store = EarningsFeatureStore(redis_getter=lambda: None)
+    app = types.SimpleNamespace(feature_store=store, earnings_model=model, earnings_batcher=None)
+    sys.modules["main"] = app
+
+    frame = _synthetic_csv(N_USERS, 40, 0)
+    states = {
+        f"u{wid}": RollingEarnings.from_days(rows.sort_values("date").to_dict("records"))
+        for wid, rows in frame.groupby("worker_id")
+    }
+    store.put_many(states)
+    asyncio.run(_run(app, list(states)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: single-pass SMS scanner vs the per-rule regex passes it
+replaced (six KEYWORD_RULES searches, AMOUNT_RE, MERCHANT_RE and a
+re.sub per merchant), over a synthetic 100k-SMS corpus.
+
+Run:  python bench_sms_scanner.py
+"""
+
+import random
+import re
+import time
+
+from models.sms_classifier import AMOUNT_RE, KEYWORD_RULES, MERCHANT_RE, scan_sms
+
+_TEMPLATES = [
+    "Rs.{amt} debited from A/c XX{acct} at {merchant} on {date}. Avl bal Rs {bal}",
+    "INR {amt} paid via FASTag at {merchant}. Avl bal Rs {bal}",
+    "Paid ₹{amt} to {merchant} via UPI Ref {ref}",
+    "Your {merchant} order of Rs {amt} has been placed.",
+    "Recharge of Rs.{amt} successful for {merchant} number 98XXXXXX{acct}. Validity 28 days.",
+    "Your OTP for login is {ref}. Do not share it with anyone.",
+    "Avl bal in A/c XX{acct} is Rs {bal} as on {date}.",
+    "Dear customer, your {merchant} service is due on {date}",
+    "Thanks for visiting {merchant}! See you again",
+    "Salary of INR {bal} credited to A/c XX{acct} on {date}",
+]
+_MERCHANTS = [
+    "HP PETROL PUMP ANDHERI", "IOCL Fuel Station", "Vashi Toll Plaza", "Zomato",
+    "Swiggy", "Sai Bike Service Centre", "Jio", "Airtel", "Mumbai Parking Authority",
+    "Cafe Coffee Day", "Big Bazaar", "Ramesh Kumar", "BPCL", "Shell Bandra",
+]
+
+
+def synthetic_corpus(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        corpus.append(rng.choice(_TEMPLATES).format(
+            amt=f"{rng.randint(10, 5000):,}" + rng.choice(["", ".00", ".5"]),
+            bal=f"{rng.randint(100, 90000):,}.{rng.randint(0, 99):02d}",
+            acct=rng.randint(1000, 9999),
+            ref=rng.randint(100000, 999999),
+            date=f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-23",
+            merchant=rng.choice(_MERCHANTS),
+        ))
+    return corpus
+
+
+def legacy_scan(text: str) -> tuple:
+    """The pre-scanner implementation: one pass per rule."""
+    category = "not_expense"
+    for name, pattern in KEYWORD_RULES.items():
+        if pattern.search(text):
+            category = name
+            break
+
+    amount = None
+    match = AMOUNT_RE.search(text)
+    if match:
+        try:
+            amount = float(match.group(1).replace(",", ""))
+        except ValueError:
+            amount = None
+
+    merchant = None
+    match = MERCHANT_RE.search(text)
+    if match:
+        cleaned = re.sub(r"[.,;:!?]+$", "", match.group(1).strip()).strip()
+        merchant = cleaned if cleaned else None
+
+    return category, amount, merchant
+
+
+def _best_of(fn, corpus, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    corpus = synthetic_corpus(100_000)
+    mismatches = sum(tuple(scan_sms(t)) != legacy_scan(t) for t in corpus)
+
+    legacy = _best_of(legacy_scan, corpus, 3)
+    scanner = _best_of(scan_sms, corpus, 3)
+    print(f"{len(corpus):,} SMS, {mismatches} mismatches")
+    print(f"{'legacy':>10} {legacy:8.3f} s  ({legacy / len(corpus) * 1e6:5.2f} µs/SMS)")
+    print(f"{'scanner':>10} {scanner:8.3f} s  ({scanner / len(corpus) * 1e6:5.2f} µs/SMS)")
+    print(f"{'speedup':>10} {legacy / scanner:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark: compiled NumPy tree engine vs GradientBoostingRegressor.predict
+on the saved earnings model, for 1, 100 and 100k rows.
+
+Run:  python bench_tree_engine.py
+"""
+
+import time
+import warnings
+
+import numpy as np
+
+from models.earnings_model import EarningsModel
+from models.tree_engine import CompiledTreeEnsemble
+
+warnings.filterwarnings("ignore")
+
+
+def _best_of(fn, X, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    model = EarningsModel()
+    model.load("./data/saved_models")
+    sk = model._model
+
+    start = time.perf_counter()
+    engine = CompiledTreeEnsemble.from_sklearn(sk)
+    print(f"compile: {(time.perf_counter() - start) * 1e3:.1f} ms "
+          f"({engine.n_trees} trees, {len(engine.feature)} nodes)")
+
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>8} {'sklearn':>12} {'compiled':>12} {'speedup':>8}")
+    for n_rows, repeats in ((1, 500), (100, 200), (100_000, 10)):
+        X = rng.normal(scale=2.0, size=(n_rows, 13))
+        assert np.array_equal(engine.predict(X), sk.predict(X))
+        t_sk = _best_of(sk.predict, X, repeats)
+        t_engine = _best_of(engine.predict, X, repeats)
+        print(f"{n_rows:>8} {t_sk * 1e3:>10.3f}ms {t_engine * 1e3:>10.3f}ms "
+              f"{t_sk / t_engine:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
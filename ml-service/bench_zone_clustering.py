@@ -0,0 +1,63 @@
+"""
+Benchmark: DBSCAN with sample_weight vs the old np.repeat row duplication
+on synthetic Mumbai GPS points (weights 1-10, as run_clustering uses).
+
+Run:  python bench_zone_clustering.py
+"""
+
+import time
+
+import numpy as np
+from sklearn.cluster import DBSCAN
+
+from zone_clustering import DBSCAN_EPS, DBSCAN_MIN_SAMPLES, _weighted_dbscan
+
+HUBS = np.array([
+    [19.0596, 72.8295], [19.1136, 72.8697], [19.0680, 72.8650], [19.1075, 72.8263],
+    [19.0178, 72.8478], [19.1197, 72.9050], [19.0099, 72.8175], [18.9966, 72.8302],
+    [19.0653, 72.8849], [19.1874, 72.8484],
+])
+
+
+def synthetic_points(n: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    coords = HUBS[rng.integers(0, len(HUBS), n)] + rng.normal(0, 0.008, (n, 2))
+    weights = np.maximum(1, np.round(rng.beta(2, 3, n) * 10).astype(int))
+    return coords, weights
+
+
+def repeated_dbscan(coords: np.ndarray, weights: np.ndarray):
+    """The previous implementation: fit on each point repeated weight times."""
+    repeated = np.repeat(coords, repeats=weights, axis=0)
+    orig_indices = np.repeat(np.arange(len(coords)), repeats=weights)
+    db = DBSCAN(eps=DBSCAN_EPS, min_samples=DBSCAN_MIN_SAMPLES,
+                algorithm="ball_tree", metric="haversine").fit(np.radians(repeated))
+    labels = db.labels_
+    members = {
+        cluster_id: set(orig_indices[labels == cluster_id])
+        for cluster_id in set(labels) - {-1}
+    }
+    return labels, members
+
+
+def _best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'points':>8} {'rows':>8} {'repeat':>10} {'weighted':>10} {'speedup':>8}")
+    for n, repeats in ((500, 10), (5_000, 5), (20_000, 3)):
+        coords, weights = synthetic_points(n)
+        old = _best_of(lambda: repeated_dbscan(coords, weights), repeats)
+        new = _best_of(lambda: _weighted_dbscan(coords, weights), repeats)
+        print(f"{n:>8,} {int(weights.sum()):>8,} {old * 1e3:>8.1f}ms "
+              f"{new * 1e3:>8.1f}ms {old / new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
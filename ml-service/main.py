@@ -37,10 +37,22 @@ app.add_middleware(
 # ── Model singletons (loaded once at startup) ──────────────────
 from models.earnings_model import EarningsModel   # noqa: E402
 from models.sms_classifier import SmsClassifier   # noqa: E402
+from utils.micro_batcher import MicroBatcher      # noqa: E402
+from utils.feature_store import EarningsFeatureStore  # noqa: E402
 
 earnings_model = EarningsModel()
 sms_classifier = SmsClassifier()
 
+# Coalesces concurrent single-worker predictions into one model call
+earnings_batcher = MicroBatcher(
+    earnings_model.predict_batch,
+    max_batch_size=int(os.getenv("EARNINGS_BATCH_MAX_ROWS", "200")),
+    max_delay_ms=float(os.getenv("EARNINGS_BATCH_MAX_DELAY_MS", "5")),
+)
+
+# Rolling per-worker lag features (Redis, or in process without REDIS_URL)
+feature_store = EarningsFeatureStore()
+
 
 @app.on_event("startup")
 async def _load_models():
@@ -55,34 +67,56 @@ async def _load_models():
     )
 
 
-# ── APScheduler — zone clustering cron (every 5 min) ───────────
+# ── APScheduler — zone clustering cron (per city) ──────────────
+import asyncio                                                # noqa: E402
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler  # noqa: E402
-from zone_clustering import run_clustering                    # noqa: E402
+from utils.executors import (                                 # noqa: E402
+    executor_stats,
+    shutdown_executors,
+    start_executors,
+)
+from routers.zones import refresh_zones                       # noqa: E402
+from zone_clustering import CITIES                            # noqa: E402
 
 scheduler = AsyncIOScheduler()
 
 
 @app.on_event("startup")
 async def _start_scheduler():
-    scheduler.add_job(run_clustering, "interval", minutes=5, id="zone_clustering")
+    start_executors()
+    for city in CITIES.values():
+        scheduler.add_job(
+            refresh_zones, "interval", args=[city.name],
+            minutes=city.interval_minutes, id=f"zone_clustering:{city.name}",
+        )
+        logger.info("Zone clustering for %s every %d min", city.name, city.interval_minutes)
     scheduler.start()
-    logger.info("APScheduler started — zone clustering every 5 min")
-    # Run once immediately so cache is warm
-    try:
-        run_clustering()
-    except Exception as exc:
-        logger.warning("Initial clustering failed (non-fatal): %s", exc)
+    logger.info("APScheduler started — %d city clustering job(s)", len(CITIES))
+    # Run once immediately so caches are warm — cities cluster in parallel
+    results = await asyncio.gather(
+        *(refresh_zones(name) for name in CITIES), return_exceptions=True
+    )
+    for name, result in zip(CITIES, results):
+        if isinstance(result, Exception):
+            logger.warning("Initial clustering for %s failed (non-fatal): %s", name, result)
 
 
 @app.on_event("shutdown")
 async def _stop_scheduler():
     scheduler.shutdown(wait=False)
+    await earnings_batcher.close()
+    shutdown_executors()
+    await close_llm_client()
+    await dispose_async_engine()
 
 
 # ── Routers ─────────────────────────────────────────────────────
 from routers.predict import router as predict_router        # noqa: E402
 from routers.sms_classify import router as sms_router       # noqa: E402
 from routers.insights import router as insights_router      # noqa: E402
+from routers.insights import close_llm_client               # noqa: E402
+from utils.db import dispose_async_engine                   # noqa: E402
 from routers.zones import router as zones_router            # noqa: E402
 
 app.include_router(predict_router)
@@ -100,4 +134,7 @@ async def health():
             "earnings": earnings_model.is_loaded,
             "sms_classifier": sms_classifier.is_loaded,
         },
+        "executors": executor_stats(),
+        "earnings_batcher": earnings_batcher.stats(),
+        "sms_cache": sms_classifier.cache_stats(),
     }
@@ -8,9 +8,15 @@ import os
 
 import joblib
 import numpy as np
+import pandas as pd
+
+from models.tree_engine import CompiledTreeEnsemble
 
 logger = logging.getLogger(__name__)
 
+# "compiled" → NumPy tree engine (falls back to sklearn if conversion fails)
+EARNINGS_TREE_ENGINE = os.getenv("EARNINGS_TREE_ENGINE", "compiled").lower()
+
 # ── Feature order expected by the scaler ─────────────────────────
 # The scaler was fitted on these 9 columns (no net_earnings):
 SCALER_COLS = [
@@ -43,6 +49,10 @@ class EarningsModel:
     def __init__(self):
         self._model = None
         self._scaler = None
+        self._engine = None
+        # Fused scaler: (X_raw - shift) / scale over all 13 model columns
+        self._shift = None
+        self._scale = None
 
     # ── public helpers ──────────────────────────────────────────
     @property
@@ -62,6 +72,18 @@ class EarningsModel:
             logger.error("Failed to load earnings model: %s", exc)
             self._model = None
 
+        self._engine = None
+        if self._model is not None and EARNINGS_TREE_ENGINE == "compiled":
+            try:
+                self._engine = CompiledTreeEnsemble.from_sklearn(self._model)
+                logger.info(
+                    "Compiled tree engine ready (%d trees)", self._engine.n_trees
+                )
+            except Exception as exc:
+                logger.warning(
+                    "Tree engine conversion failed, using sklearn predict: %s", exc
+                )
+
         try:
             self._scaler = joblib.load(scaler_path)
             logger.info("Earnings scaler loaded from %s", scaler_path)
@@ -69,6 +91,10 @@ class EarningsModel:
             logger.error("Failed to load earnings scaler: %s", exc)
             self._scaler = None
 
+        self._shift, self._scale = None, None
+        if self._scaler is not None:
+            self._shift, self._scale = self._fuse_scaler(self._scaler)
+
     # ── predict ─────────────────────────────────────────────────
     def predict(self, features_dict: dict) -> dict:
         """
@@ -84,53 +110,107 @@ class EarningsModel:
         dict  with ``predicted_earnings_paise``, ``predicted_earnings_rupees``,
               and ``confidence``.
         """
+        return self.predict_batch([features_dict])[0]
+
+    def predict_batch(self, features: list[dict] | pd.DataFrame) -> list[dict]:
+        """
+        Predict for many workers with one model call.
+
+        Parameters
+        ----------
+        features : list of dicts (as for ``predict``) or a DataFrame with
+            every ``MODEL_FEATURE_ORDER`` column, one row per worker.
+
+        Returns
+        -------
+        list of result dicts in input order; rows that fail get the same
+        zero result ``predict`` returns on failure.
+        """
+        n = len(features)
         if not self.is_loaded:
-            logger.error("EarningsModel.predict() called but model is not loaded")
-            return {
-                "predicted_earnings_paise": 0,
-                "predicted_earnings_rupees": 0.0,
-                "confidence": 0.0,
-            }
+            logger.error("EarningsModel.predict_batch() called but model is not loaded")
+            return [self._zero_result() for _ in range(n)]
 
+        results = [self._zero_result() for _ in range(n)]
         try:
-            # 1. Build features in exact MODEL_FEATURE_ORDER
-            raw = {col: float(features_dict[col]) for col in MODEL_FEATURE_ORDER}
-
-            # 2. Scale the continuous features only
-            continuous = np.array([[raw[c] for c in SCALER_COLS]])
-            scaled_vals = self._scaler.transform(continuous)[0]
-            scaled_map = dict(zip(SCALER_COLS, scaled_vals))
-
-            # 3. Build final feature vector in training order
-            X = np.array([[
-                scaled_map[col] if col in scaled_map else raw[col]
-                for col in MODEL_FEATURE_ORDER
-            ]])  # → (1, 13)
-
-            # 6. Predict
-            prediction = self._model.predict(X)[0]
-            predicted_paise = max(0, int(round(prediction)))
-            predicted_rupees = round(predicted_paise / 100, 2)
-
-            # 7. Confidence based on deviation from prev_30day_avg
-            prev_30 = float(features_dict.get("prev_30day_avg", 0))
-            confidence = self._compute_confidence(predicted_paise, prev_30)
-
-            return {
-                "predicted_earnings_paise": predicted_paise,
-                "predicted_earnings_rupees": predicted_rupees,
-                "confidence": confidence,
-            }
+            # 1. Build raw rows in exact MODEL_FEATURE_ORDER
+            if isinstance(features, pd.DataFrame):
+                X_raw = features[MODEL_FEATURE_ORDER].to_numpy(dtype=np.float64)
+                prev_30 = features["prev_30day_avg"].to_numpy(dtype=np.float64)
+                valid = list(range(n))
+            else:
+                rows, prev_30, valid = [], [], []
+                for i, features_dict in enumerate(features):
+                    try:
+                        rows.append([float(features_dict[col]) for col in MODEL_FEATURE_ORDER])
+                        prev_30.append(float(features_dict.get("prev_30day_avg", 0)))
+                        valid.append(i)
+                    except Exception as exc:
+                        logger.error("EarningsModel.predict_batch() row %d invalid: %s", i, exc)
+                X_raw = np.array(rows, dtype=np.float64).reshape(-1, len(MODEL_FEATURE_ORDER))
+
+            if not valid:
+                return results
+
+            # 2. Scale + predict in one call
+            predictions = self.predict_matrix(X_raw)
+
+            # 3. Round + confidence based on deviation from prev_30day_avg
+            for i, prediction, p30 in zip(valid, predictions, prev_30):
+                predicted_paise = max(0, int(round(prediction)))
+                results[i] = {
+                    "predicted_earnings_paise": predicted_paise,
+                    "predicted_earnings_rupees": round(predicted_paise / 100, 2),
+                    "confidence": self._compute_confidence(predicted_paise, p30),
+                }
+            return results
 
         except Exception as exc:
-            logger.error("EarningsModel.predict() failed: %s", exc)
-            return {
-                "predicted_earnings_paise": 0,
-                "predicted_earnings_rupees": 0.0,
-                "confidence": 0.0,
-            }
+            logger.error("EarningsModel.predict_batch() failed: %s", exc)
+            return [self._zero_result() for _ in range(n)]
+
+    def predict_matrix(self, X_raw: np.ndarray) -> np.ndarray:
+        """
+        Predict for an unscaled ``(n, 13)`` matrix in ``MODEL_FEATURE_ORDER``.
+
+        Applies the fused scaler and returns the raw model output (paise,
+        float, unclipped) for every row.
+        """
+        X = (np.asarray(X_raw, dtype=np.float64) - self._shift) / self._scale
+        return self._predict_raw(X)
 
     # ── internals ───────────────────────────────────────────────
+    @staticmethod
+    def _fuse_scaler(scaler) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Expand the 9-column StandardScaler to all 13 model columns, with
+        identity (shift 0, scale 1) for ``BINARY_COLS``.  Same arithmetic
+        as ``scaler.transform`` — subtract then divide — so results match.
+        """
+        shift = np.zeros(len(MODEL_FEATURE_ORDER))
+        scale = np.ones(len(MODEL_FEATURE_ORDER))
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(len(SCALER_COLS))
+        std = scaler.scale_ if scaler.with_std else np.ones(len(SCALER_COLS))
+        for i, col in enumerate(SCALER_COLS):
+            j = MODEL_FEATURE_ORDER.index(col)
+            shift[j] = mean[i]
+            scale[j] = std[i]
+        return shift, scale
+
+    def _predict_raw(self, X: np.ndarray) -> np.ndarray:
+        """Model output for a scaled (n, 13) matrix — compiled engine if loaded."""
+        if self._engine is not None:
+            return self._engine.predict(X)
+        return self._model.predict(X)
+
+    @staticmethod
+    def _zero_result() -> dict:
+        return {
+            "predicted_earnings_paise": 0,
+            "predicted_earnings_rupees": 0.0,
+            "confidence": 0.0,
+        }
+
     @staticmethod
     def _compute_confidence(predicted: float, prev_30day_avg: float) -> float:
         if prev_30day_avg <= 0:
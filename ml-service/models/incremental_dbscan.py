@@ -0,0 +1,234 @@
+"""
+IncrementalDBSCAN — weighted haversine DBSCAN that absorbs point inserts,
+moves and re-weights by re-deriving only the neighbourhoods they touch.
+
+The state is seeded from a full fit (labels + core flags).  ``update()``
+then:
+  1. re-grids the changed points (grid cells are ≥ eps wide, so every
+     eps-neighbour of a point lies in its 3×3 block of cells),
+  2. recomputes the core flag of every point within eps of an old or new
+     position of a changed point — nobody else's neighbourhood changed,
+  3. clears the clusters those points belong to or border on, and re-runs
+     the DBSCAN expansion from their core points only.
+
+Work is proportional to the changed points' neighbourhoods plus the
+clusters they touch, not to the number of points.
+
+Core points, the partition of core points into clusters and the noise set
+are exactly those of a full refit.  A border point within eps of two
+clusters may be attached to either — DBSCAN itself leaves that to
+processing order.
+"""
+
+import numpy as np
+
+
+class NeedsRefit(Exception):
+    """The update cannot be applied locally; refit from scratch."""
+
+
+def haversine_rad(lat, lng, lats, lngs) -> np.ndarray:
+    """Great-circle distance in radians (same formula as sklearn's haversine)."""
+    sin_dlat = np.sin((lats - lat) / 2.0)
+    sin_dlng = np.sin((lngs - lng) / 2.0)
+    a = sin_dlat ** 2 + np.cos(lat) * np.cos(lats) * sin_dlng ** 2
+    return 2.0 * np.arcsin(np.sqrt(a))
+
+
+class IncrementalDBSCAN:
+    """DBSCAN state over points keyed by id, coordinates in radians."""
+
+    # Cells are widened slightly so the eps bound holds despite rounding
+    _CELL_MARGIN = 1.05
+
+    def __init__(self, eps: float, min_samples: float):
+        self.eps = float(eps)
+        self.min_samples = float(min_samples)
+        self._row_of: dict = {}
+        self.ids: list = []
+        self._lat = np.empty(0)
+        self._lng = np.empty(0)
+        self._weight = np.empty(0)
+        self._core = np.empty(0, dtype=bool)
+        self._labels = np.empty(0, dtype=np.int64)
+        self._members: dict[int, set[int]] = {}
+        self._grid: dict[tuple[int, int], list[int]] = {}
+        self._next_label = 0
+        self._max_abs_lat = 0.0
+        self._lat_cell = self._lng_cell = 1.0
+
+    # ── views ───────────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, point_id) -> bool:
+        return point_id in self._row_of
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self._labels[:len(self)]
+
+    @property
+    def core(self) -> np.ndarray:
+        return self._core[:len(self)]
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weight[:len(self)]
+
+    def row(self, point_id) -> int:
+        return self._row_of[point_id]
+
+    def members(self, label: int) -> list[int]:
+        return sorted(self._members.get(label, ()))
+
+    # ── seeding ─────────────────────────────────────────────────
+    def fit_from(self, ids, lat, lng, weights, labels, core) -> "IncrementalDBSCAN":
+        """Seed the state from a full fit over the same points."""
+        n = len(ids)
+        self.ids = list(ids)
+        self._row_of = {pid: i for i, pid in enumerate(self.ids)}
+        self._lat = np.asarray(lat, dtype=np.float64).copy()
+        self._lng = np.asarray(lng, dtype=np.float64).copy()
+        self._weight = np.asarray(weights, dtype=np.float64).copy()
+        self._labels = np.asarray(labels, dtype=np.int64).copy()
+        self._core = np.asarray(core, dtype=bool).copy()
+
+        # Grid sized for the widest latitude seen (+ headroom for updates)
+        self._max_abs_lat = float(np.abs(self._lat).max()) + 10 * self.eps if n else 0.0
+        self._lat_cell = self.eps * self._CELL_MARGIN
+        self._lng_cell = self.eps * self._CELL_MARGIN / np.cos(self._max_abs_lat)
+        self._grid = {}
+        for row in range(n):
+            self._grid.setdefault(self._cell(self._lat[row], self._lng[row]), []).append(row)
+
+        self._members = {}
+        for row in np.flatnonzero(self._labels >= 0):
+            self._members.setdefault(int(self._labels[row]), set()).add(int(row))
+        self._next_label = int(self._labels.max()) + 1 if n else 0
+        return self
+
+    # ── update ──────────────────────────────────────────────────
+    def update(self, ids, lat, lng, weights) -> set[int]:
+        """
+        Insert new ids and move / re-weight existing ones.
+
+        Returns the set of labels whose membership may have changed
+        (removed labels included).  Raises ``NeedsRefit`` when a point falls
+        outside the latitude band the grid was sized for.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        if len(lat) and np.abs(lat).max() > self._max_abs_lat:
+            raise NeedsRefit("point outside the grid's latitude band")
+
+        dirty: set[int] = set()
+        changed: list[int] = []
+        new_ids = [pid for pid in ids if pid not in self._row_of]
+        self._grow(len(new_ids))
+
+        for pid, p_lat, p_lng, p_weight in zip(ids, lat, lng, weights):
+            row = self._row_of.get(pid)
+            if row is None:
+                row = len(self.ids)
+                self.ids.append(pid)
+                self._row_of[pid] = row
+                self._labels[row] = -1
+                self._core[row] = False
+            else:
+                # neighbours of the old position lose this point's weight
+                dirty.update(self._neighbours(self._lat[row], self._lng[row]))
+                self._grid[self._cell(self._lat[row], self._lng[row])].remove(row)
+            self._lat[row], self._lng[row], self._weight[row] = p_lat, p_lng, p_weight
+            self._grid.setdefault(self._cell(p_lat, p_lng), []).append(row)
+            changed.append(row)
+
+        # … and neighbours of the new position gain it
+        for row in changed:
+            dirty.update(self._neighbours(self._lat[row], self._lng[row]))
+
+        # Only points within eps of a change can flip core status
+        for row in dirty:
+            neighbours = self._neighbours(self._lat[row], self._lng[row])
+            self._core[row] = self._weight[neighbours].sum() >= self.min_samples
+
+        # Clusters containing, or adjacent to, a dirty point are rebuilt
+        touched = {int(self._labels[row]) for row in dirty if self._labels[row] >= 0}
+        for row in dirty:
+            if self._core[row]:
+                neighbours = self._neighbours(self._lat[row], self._lng[row])
+                touched.update(int(l) for l in self._labels[neighbours] if l >= 0)
+
+        region = set(dirty)
+        for label in touched:
+            region.update(self._members.pop(label, ()))
+        for row in region:
+            self._labels[row] = -1
+
+        for row in sorted(region):
+            if self._core[row] and self._labels[row] == -1:
+                touched.add(self._expand(row))
+
+        # Border points left over may still sit next to an untouched cluster
+        for row in region:
+            if self._labels[row] == -1 and not self._core[row]:
+                neighbours = self._neighbours(self._lat[row], self._lng[row])
+                cores = neighbours[self._core[neighbours]]
+                if len(cores):
+                    label = int(self._labels[cores[0]])
+                    self._labels[row] = label
+                    self._members[label].add(row)
+                    touched.add(label)
+        return touched
+
+    # ── internals ───────────────────────────────────────────────
+    def _expand(self, seed: int) -> int:
+        """Grow a new cluster from an unlabelled core point (DBSCAN expansion)."""
+        label = self._next_label
+        self._next_label += 1
+        members = self._members.setdefault(label, set())
+
+        self._labels[seed] = label
+        members.add(seed)
+        stack = [seed]
+        while stack:
+            row = stack.pop()
+            for nb in self._neighbours(self._lat[row], self._lng[row]):
+                if self._labels[nb] != -1:
+                    continue
+                self._labels[nb] = label
+                members.add(int(nb))
+                if self._core[nb]:
+                    stack.append(int(nb))
+        return label
+
+    def _cell(self, lat: float, lng: float) -> tuple[int, int]:
+        return int(np.floor(lat / self._lat_cell)), int(np.floor(lng / self._lng_cell))
+
+    def _neighbours(self, lat: float, lng: float) -> np.ndarray:
+        """Rows within eps of (lat, lng), the point itself included."""
+        ci, cj = self._cell(lat, lng)
+        candidates = [
+            row
+            for di in (-1, 0, 1)
+            for dj in (-1, 0, 1)
+            for row in self._grid.get((ci + di, cj + dj), ())
+        ]
+        if not candidates:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.asarray(candidates, dtype=np.int64)
+        dist = haversine_rad(lat, lng, self._lat[candidates], self._lng[candidates])
+        return candidates[dist <= self.eps]
+
+    def _grow(self, extra: int) -> None:
+        needed = len(self.ids) + extra
+        capacity = len(self._lat)
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, 16)
+        for name in ("_lat", "_lng", "_weight", "_core", "_labels"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
@@ -1,16 +1,34 @@
 """
 SmsClassifier — wrapper around a pre-trained LogisticRegression + TfidfVectorizer
 that classifies Indian financial SMS into expense categories.
+
+Bodies whose template signature is in the mined template table
+(``sms_templates.json``, see train/mine_sms_templates.py) are classified
+by a dict lookup; only unknown templates reach the model.
 """
 
+import hashlib
+import json
 import logging
 import os
 import re
+import threading
+from collections import Counter
+from typing import NamedTuple
 
 import joblib
+import numpy as np
+
+from utils.cache import LRUCache, get_redis, redis_status
 
 logger = logging.getLogger(__name__)
 
+# ── Result cache ────────────────────────────────────────────────
+SMS_CACHE_SIZE = int(os.getenv("SMS_CACHE_SIZE", "10000"))
+# Redis second tier TTL in seconds (0 → in-process LRU only)
+SMS_CACHE_REDIS_TTL = int(os.getenv("SMS_CACHE_REDIS_TTL", "604800"))
+_REDIS_PREFIX = "sms:classify"
+
 # ── Category constants ──────────────────────────────────────────
 CATEGORIES = [
     "fuel",
@@ -47,28 +65,233 @@ KEYWORD_RULES = {
 }
 
 # ── Amount extraction ───────────────────────────────────────────
-AMOUNT_RE = re.compile(
-    r"(?:Rs\.?|INR|₹)\s*([\d,]+(?:\.\d{1,2})?)", re.IGNORECASE
-)
+# Sources are lowercase: the scanner below matches them case-sensitively
+_AMOUNT_SRC = r"(?:rs\.?|inr|₹)\s*(?P<amount>[\d,]+(?:\.\d{1,2})?)"
+AMOUNT_RE = re.compile(_AMOUNT_SRC, re.IGNORECASE)
 
 # ── Merchant extraction ────────────────────────────────────────
-MERCHANT_RE = re.compile(
-    r"(?:at|to)\s+((?:\S+\s*){1,3})", re.IGNORECASE
+_MERCHANT_SRC = r"(?:at|to)\s+(?P<merchant>(?:\S+\s*){1,3})"
+MERCHANT_RE = re.compile(_MERCHANT_SRC, re.IGNORECASE)
+_TRAILING_PUNCT_RE = re.compile(r"[.,;:!?]+$")
+
+# ── Single-pass scanner ────────────────────────────────────────
+# Candidate positions are found by one leading lookahead (any rule can
+# start here); optional lookaheads then record, at that position, the
+# amount, the merchant and the highest-priority keyword category.
+#
+# Case-insensitive matching is slow in ``re``, so the scanner runs
+# case-sensitively over ``text.lower()``.  That is equivalent for every
+# character except those where str.lower() and re.IGNORECASE disagree on
+# an ASCII letter (İ lowers to two characters; ı and ſ match i / s under
+# IGNORECASE but lower to themselves); such texts use the IGNORECASE form.
+_KEYWORD_GROUPS = tuple(f"kw_{category}" for category in KEYWORD_RULES)
+_KEYWORD_CATEGORIES = tuple(KEYWORD_RULES)
+_FOLD_HAZARDS = frozenset("\u0130\u0131\u017f")
+
+_SCAN_SRC = (
+    "(?=" + "|".join(
+        [r"(?:rs\.?|inr|₹)\s*[\d,]", r"(?:at|to)\s+\S"]
+        + [pattern.pattern for pattern in KEYWORD_RULES.values()]
+    ) + ")"
+    + f"(?={_AMOUNT_SRC})?"
+    + f"(?={_MERCHANT_SRC})?"
+    + "(?:" + "|".join(
+        f"(?=(?P<{group}>{pattern.pattern}))"
+        for group, pattern in zip(_KEYWORD_GROUPS, KEYWORD_RULES.values())
+    ) + ")?"
 )
+SCAN_RE = re.compile(_SCAN_SRC)
+_SCAN_RE_IGNORECASE = re.compile(_SCAN_SRC, re.IGNORECASE)
+
+
+class SmsScan(NamedTuple):
+    category: str                 # first KEYWORD_RULES hit, else "not_expense"
+    amount_rupees: float | None
+    merchant: str | None
+
+
+def scan_sms(text: str) -> SmsScan:
+    """
+    One pass over ``text`` for the keyword category, amount and merchant.
+
+    Same results as trying ``KEYWORD_RULES`` in order, then
+    ``AMOUNT_RE.search`` and ``MERCHANT_RE.search``.
+    """
+    lowered = text.lower()
+    if text.isascii() or (
+        len(lowered) == len(text) and _FOLD_HAZARDS.isdisjoint(text)
+    ):
+        matches = SCAN_RE.finditer(lowered)
+    else:
+        matches = _SCAN_RE_IGNORECASE.finditer(text)
+
+    best = len(_KEYWORD_GROUPS)
+    amount = merchant = None
+    amount_done = merchant_done = False
+
+    for match in matches:
+        if not amount_done and match.start("amount") >= 0:
+            amount_done = True
+            try:
+                amount = float(match.group("amount").replace(",", ""))
+            except ValueError:
+                amount = None
+        if not merchant_done and match.start("merchant") >= 0:
+            merchant_done = True
+            raw = text[match.start("merchant"):match.end("merchant")].strip()
+            cleaned = _TRAILING_PUNCT_RE.sub("", raw).strip()
+            merchant = cleaned or None
+        for rank in range(best):
+            if match.start(_KEYWORD_GROUPS[rank]) >= 0:
+                best = rank
+                break
+        if best == 0 and amount_done and merchant_done:
+            break
+
+    category = _KEYWORD_CATEGORIES[best] if best < len(_KEYWORD_GROUPS) else "not_expense"
+    return SmsScan(category, amount, merchant)
+
+# ── Template fast path ─────────────────────────────────────────
+SMS_TEMPLATES_FILE = "sms_templates.json"
+SMS_TEMPLATES_ENABLED = os.getenv("SMS_TEMPLATES", "1") != "0"
+
+# Slots masked out of a body to form its template signature
+TEMPLATE_SLOT_RE = re.compile(
+    r"(?P<amt>(?:Rs\.?|INR|₹)\s*(?P<amt_value>[\d,]+(?:\.\d{1,2})?))"
+    r"|(?P<acct>\b[x*]{2,}\d+)"
+    r"|(?P<num>\d[\d,.:/-]*)",
+    re.IGNORECASE,
+)
+_SLOT_TOKENS = ("<amt>", "<acct>", "<num>")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def template_signature(text: str) -> tuple[str, list[float | None]]:
+    """
+    Mask the merchant name, amounts, account numbers and digits of an SMS.
+
+    Returns ``(signature, amounts)`` where ``amounts`` holds the parsed
+    value of each ``<amt>`` slot in order.
+
+        "Rs.500 debited from A/c XX1234 at HP PUMP on 12-10-23"
+        → "<amt> debited from a/c <acct> at <name> <num>"
+    """
+    amounts: list[float | None] = []
+
+    def _mask(match: re.Match) -> str:
+        if match.group("amt"):
+            try:
+                amounts.append(float(match.group("amt_value").replace(",", "")))
+            except ValueError:
+                amounts.append(None)
+            return "<amt>"
+        return "<acct>" if match.group("acct") else "<num>"
+
+    masked = TEMPLATE_SLOT_RE.sub(_mask, text)
+
+    # Merchant words become one <name>; slots inside the capture survive
+    merchant = MERCHANT_RE.search(masked)
+    if merchant:
+        words = []
+        for word in merchant.group("merchant").split():
+            word = word if word.startswith(_SLOT_TOKENS) else "<name>"
+            if not (word == "<name>" and words and words[-1] == "<name>"):
+                words.append(word)
+        masked = (masked[:merchant.start("merchant")] + " ".join(words) + " "
+                  + masked[merchant.end("merchant"):])
+
+    return _WHITESPACE_RE.sub(" ", masked).strip().lower(), amounts
+
+
+def mine_templates(samples, min_support: int = 5,
+                   min_purity: float = 0.95) -> dict[str, dict]:
+    """
+    Learn the template → category / amount-slot table from labelled SMS.
+
+    ``samples`` yields ``(body, category, amount_rupees)``.  A template is
+    kept when it was seen ``min_support`` times and at least ``min_purity``
+    of those agree on both the category and which ``<amt>`` slot holds the
+    amount (``None`` → the SMS carries no amount).
+    """
+    seen: dict[str, dict] = {}
+    for body, category, amount in samples:
+        signature, amounts = template_signature(body)
+        entry = seen.setdefault(
+            signature, {"n": 0, "categories": Counter(), "slots": Counter()}
+        )
+        entry["n"] += 1
+        entry["categories"][category] += 1
+        if amount is None:
+            entry["slots"][None] += 1
+        else:
+            slot = next((i for i, v in enumerate(amounts) if v == amount), "unmatched")
+            entry["slots"][slot] += 1
+
+    templates = {}
+    for signature, entry in seen.items():
+        if entry["n"] < min_support:
+            continue
+        category, n_category = entry["categories"].most_common(1)[0]
+        slot, n_slot = entry["slots"].most_common(1)[0]
+        if slot == "unmatched" or min(n_category, n_slot) / entry["n"] < min_purity:
+            continue
+        templates[signature] = {
+            "category": category,
+            "amount_slot": slot,
+            "support": entry["n"],
+            "purity": round(n_category / entry["n"], 4),
+        }
+    return templates
 
 
 class SmsClassifier:
     """Load and run the SMS expense classifier."""
 
-    def __init__(self):
+    def __init__(self, cache_size: int = SMS_CACHE_SIZE,
+                 redis_ttl: int = SMS_CACHE_REDIS_TTL,
+                 use_templates: bool = SMS_TEMPLATES_ENABLED):
         self._model = None
         self._vectorizer = None
+        self._use_templates = use_templates
+        self._templates: dict[str, dict] = {}
+        self._template_hits = 0
+        self._template_misses = 0
+        self.model_version: str | None = None
+        self._cache = LRUCache(cache_size)
+        self._redis_ttl = redis_ttl
+        self._redis_hits = 0
+        self._redis_misses = 0
+        # classify_batch runs on the thread pool; guards the counters above
+        self._stats_lock = threading.Lock()
 
     # ── public helpers ──────────────────────────────────────────
     @property
     def is_loaded(self) -> bool:
         return self._model is not None and self._vectorizer is not None
 
+    def cache_stats(self) -> dict:
+        """Hit/miss counters for both cache tiers (no Redis round trip)."""
+        stats = self._cache.stats()
+        stats["model_version"] = self.model_version
+        status = redis_status()
+        with self._stats_lock:
+            stats["redis"] = {
+                "enabled": self._redis_ttl > 0 and status["configured"],
+                "connected": status["connected"],
+                "hits": self._redis_hits,
+                "misses": self._redis_misses,
+            }
+        return stats
+
+    def template_stats(self) -> dict:
+        """Size of the template table and how often it answered."""
+        with self._stats_lock:
+            return {
+                "templates": len(self._templates),
+                "hits": self._template_hits,
+                "misses": self._template_misses,
+            }
+
     # ── load ────────────────────────────────────────────────────
     def load(self, path: str = "./data/saved_models") -> None:
         """Load the LogisticRegression model and its TfidfVectorizer."""
@@ -89,6 +312,28 @@ class SmsClassifier:
             logger.error("Failed to load SMS vectorizer: %s", exc)
             self._vectorizer = None
 
+        artifacts = [model_path, vec_path]
+        templates_path = os.path.join(path, SMS_TEMPLATES_FILE)
+        self._templates = {}
+        if self._use_templates and os.path.exists(templates_path):
+            try:
+                with open(templates_path, encoding="utf-8") as fh:
+                    self._templates = json.load(fh)["templates"]
+                artifacts.append(templates_path)
+                logger.info(
+                    "SMS templates loaded from %s (%d templates)",
+                    templates_path, len(self._templates),
+                )
+            except Exception as exc:
+                logger.error("Failed to load SMS templates: %s", exc)
+                self._templates = {}
+
+        # Cache keys carry the artifact hash, so a reload invalidates them
+        self.model_version = (
+            self._artifact_version(*artifacts) if self.is_loaded else None
+        )
+        self._cache.clear()
+
     # ── classify ────────────────────────────────────────────────
     def classify(self, sms_text: str) -> dict:
         """
@@ -103,6 +348,23 @@ class SmsClassifier:
             logger.error("SmsClassifier.classify() called but model is not loaded")
             return self._fallback_result(sms_text)
 
+        key = self._cache_key(sms_text)
+        cached = self._cache_get([key])[0]
+        if cached is not None:
+            return cached
+
+        result = self._classify_uncached(sms_text)
+        if result is not None:
+            self._cache_put({key: result})
+            return dict(result)
+        return self._fallback_result(sms_text)
+
+    def _classify_uncached(self, sms_text: str) -> dict | None:
+        """Template / model path of ``classify``; None when the model call fails."""
+        matched = self._match_template(sms_text)
+        if matched is not None:
+            return matched
+
         try:
             # 1. Vectorize
             X = self._vectorizer.transform([sms_text])
@@ -115,13 +377,14 @@ class SmsClassifier:
             category = classes[best_idx].lower()
 
             # 3. Fallback to regex if confidence is low
+            scan = scan_sms(sms_text)
             if confidence < 0.50:
-                category = self._regex_classify(sms_text)
+                category = scan.category
                 confidence = round(confidence, 4)
 
             # 4. Extract amount and merchant (always regex-based)
-            amount_rupees = self._extract_amount(sms_text)
-            merchant = self._extract_merchant(sms_text)
+            amount_rupees = scan.amount_rupees
+            merchant = scan.merchant
 
             # 5. Tax deductibility
             is_tax_deductible = category in TAX_DEDUCTIBLE
@@ -136,46 +399,187 @@ class SmsClassifier:
 
         except Exception as exc:
             logger.error("SmsClassifier.classify() failed: %s", exc)
-            return self._fallback_result(sms_text)
+            return None
+
+    def classify_batch(self, texts: list[str]) -> list[dict]:
+        """
+        Classify many SMS messages with one vectorizer / model call.
+
+        Returns one dict per input, identical to ``classify(text)``.
+        """
+        if not texts:
+            return []
+        if not self.is_loaded:
+            logger.error("SmsClassifier.classify_batch() called but model is not loaded")
+            return [self._fallback_result(text) for text in texts]
+
+        keys = [self._cache_key(text) for text in texts]
+        results = self._cache_get(keys)
+
+        # Score each distinct uncached body once
+        missing: dict[str, int] = {}
+        for i, result in enumerate(results):
+            if result is None and keys[i] not in missing:
+                missing[keys[i]] = i
+        if missing:
+            fresh = self._classify_batch_uncached([texts[i] for i in missing.values()])
+            by_key = dict(zip(missing, fresh))
+            self._cache_put({k: v for k, v in by_key.items() if v is not None})
+            for i, key in enumerate(keys):
+                if results[i] is None:
+                    hit = by_key[key]
+                    results[i] = dict(hit) if hit is not None else self._fallback_result(texts[i])
+        return results
+
+    def _classify_batch_uncached(self, texts: list[str]) -> list[dict | None]:
+        """Template / model path of ``classify_batch``; None where the model call fails."""
+        results = [self._match_template(text) for text in texts]
+        unknown = [i for i, result in enumerate(results) if result is None]
+        if unknown:
+            scored = self._score_batch([texts[i] for i in unknown])
+            for i, result in zip(unknown, scored or [None] * len(unknown)):
+                results[i] = result
+        return results
+
+    def _score_batch(self, texts: list[str]) -> list[dict] | None:
+        """Model path for many bodies; None when the model call fails."""
+        try:
+            # 1. Vectorize the whole batch into one sparse matrix
+            X = self._vectorizer.transform(texts)
+
+            # 2. One predict_proba call for every row
+            proba = self._model.predict_proba(X)
+            best_idx = proba.argmax(axis=1)
+            confidences = proba[np.arange(len(texts)), best_idx]
+            classes = np.array([c.lower() for c in self._model.classes_], dtype=object)
+            categories = classes[best_idx]
+
+            # 3. One scan per row: regex fallback (low-confidence rows only),
+            #    amount and merchant
+            scans = [scan_sms(text) for text in texts]
+            for i in np.flatnonzero(confidences < 0.50):
+                categories[i] = scans[i].category
+        except Exception as exc:
+            logger.error("SmsClassifier.classify_batch() failed: %s", exc)
+            return None
+
+        # 4. Tax flag per row
+        return [
+            {
+                "category": category,
+                "amount_rupees": scan.amount_rupees,
+                "merchant": scan.merchant,
+                "is_tax_deductible": category in TAX_DEDUCTIBLE,
+                "confidence": round(float(confidence), 4),
+            }
+            for scan, category, confidence in zip(scans, categories, confidences)
+        ]
+
+    # ── cache ───────────────────────────────────────────────────
+    @staticmethod
+    def _artifact_version(*paths: str) -> str:
+        digest = hashlib.sha256()
+        for path in paths:
+            with open(path, "rb") as fh:
+                for block in iter(lambda: fh.read(1 << 20), b""):
+                    digest.update(block)
+        return digest.hexdigest()[:16]
+
+    def _cache_key(self, sms_text: str) -> str:
+        # The body is hashed as-is: whitespace and case feed the amount /
+        # merchant regexes, so folding them would change cached results.
+        body = sms_text.encode("utf-8", "surrogatepass")
+        return f"{self.model_version}:{hashlib.sha256(body).hexdigest()}"
+
+    def _cache_get(self, keys: list[str]) -> list[dict | None]:
+        """Look keys up in the LRU, then Redis; returns copies or None."""
+        results = [self._cache.get(key) for key in keys]
+        results = [dict(r) if r is not None else None for r in results]
+
+        r = get_redis() if self._redis_ttl > 0 else None
+        missed = [i for i, result in enumerate(results) if result is None]
+        if not r or not missed:
+            return results
+        try:
+            payloads = r.mget([f"{_REDIS_PREFIX}:{keys[i]}" for i in missed])
+        except Exception as exc:
+            logger.warning("Redis SMS cache read failed: %s", exc)
+            return results
+        hits = 0
+        for i, payload in zip(missed, payloads):
+            if payload is None:
+                continue
+            hits += 1
+            results[i] = json.loads(payload)
+            self._cache.put(keys[i], dict(results[i]))
+        with self._stats_lock:
+            self._redis_hits += hits
+            self._redis_misses += len(missed) - hits
+        return results
+
+    def _cache_put(self, entries: dict[str, dict]) -> None:
+        for key, result in entries.items():
+            self._cache.put(key, dict(result))
+
+        r = get_redis() if self._redis_ttl > 0 else None
+        if not r or not entries:
+            return
+        try:
+            pipe = r.pipeline(transaction=False)
+            for key, result in entries.items():
+                pipe.setex(f"{_REDIS_PREFIX}:{key}", self._redis_ttl, json.dumps(result))
+            pipe.execute()
+        except Exception as exc:
+            logger.warning("Redis SMS cache write failed: %s", exc)
+
+    # ── templates ───────────────────────────────────────────────
+    def _match_template(self, sms_text: str) -> dict | None:
+        """Classify from the template table; None for unknown templates."""
+        if not self._templates:
+            return None
+        signature, amounts = template_signature(sms_text)
+        template = self._templates.get(signature)
+        with self._stats_lock:
+            if template is None:
+                self._template_misses += 1
+            else:
+                self._template_hits += 1
+        if template is None:
+            return None
+
+        slot = template["amount_slot"]
+        category = template["category"]
+        return {
+            "category": category,
+            "amount_rupees": amounts[slot] if slot is not None and slot < len(amounts) else None,
+            "merchant": scan_sms(sms_text).merchant,
+            "is_tax_deductible": category in TAX_DEDUCTIBLE,
+            "confidence": template["purity"],
+        }
 
     # ── internals ───────────────────────────────────────────────
     @staticmethod
     def _regex_classify(text: str) -> str:
         """Keyword-based fallback classification."""
-        for category, pattern in KEYWORD_RULES.items():
-            if pattern.search(text):
-                return category
-        return "not_expense"
+        return scan_sms(text).category
 
     @staticmethod
     def _extract_amount(text: str) -> float | None:
         """Extract rupee amount from SMS text."""
-        match = AMOUNT_RE.search(text)
-        if match:
-            try:
-                return float(match.group(1).replace(",", ""))
-            except ValueError:
-                return None
-        return None
+        return scan_sms(text).amount_rupees
 
     @staticmethod
     def _extract_merchant(text: str) -> str | None:
         """Extract merchant name from SMS text (words following 'at' or 'to')."""
-        match = MERCHANT_RE.search(text)
-        if match:
-            raw = match.group(1).strip()
-            # Clean trailing punctuation
-            cleaned = re.sub(r"[.,;:!?]+$", "", raw).strip()
-            return cleaned if cleaned else None
-        return None
+        return scan_sms(text).merchant
 
     def _fallback_result(self, sms_text: str) -> dict:
         """Return a best-effort result when the ML model isn't available."""
-        category = self._regex_classify(sms_text)
+        scan = scan_sms(sms_text)
         return {
-            "category": category,
-            "amount_rupees": self._extract_amount(sms_text),
-            "merchant": self._extract_merchant(sms_text),
-            "is_tax_deductible": category in TAX_DEDUCTIBLE,
+            "category": scan.category,
+            "amount_rupees": scan.amount_rupees,
+            "merchant": scan.merchant,
+            "is_tax_deductible": scan.category in TAX_DEDUCTIBLE,
             "confidence": 0.0,
         }
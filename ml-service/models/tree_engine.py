@@ -0,0 +1,224 @@
+"""
+CompiledTreeEnsemble — flat NumPy evaluation of a fitted
+GradientBoostingRegressor.
+
+At load time every tree is flattened into node arrays (feature, threshold,
+left, right, value) and compiled into a QuickScorer-style layout: per
+feature, all split nodes of all trees sorted by threshold, with a running
+AND of the leaf bitmasks they eliminate.  Scoring a batch is then, per
+feature, one ``searchsorted`` plus one row gather and AND over every tree
+at once; each tree's exit leaf is the lowest surviving bit.
+
+Results are bit-identical to ``GradientBoostingRegressor.predict``: inputs
+are rounded to float32 as sklearn does, and ``learning_rate * leaf value``
+is added to the init prediction in stage order.
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TREE_LEAF = -1
+# Rows scored per block — keeps the (rows × trees) bitmask matrix in cache
+_BLOCK_ROWS = 2048
+# Below this many rows the per-tree accumulation loop costs more than a
+# (rows × trees) cumsum
+_LOOP_MIN_ROWS = 512
+
+_LOWEST_BIT_16 = np.zeros(1 << 16, dtype=np.uint8)
+_LOWEST_BIT_16[1:] = np.log2(
+    np.arange(1, 1 << 16) & -np.arange(1, 1 << 16)
+).astype(np.uint8)
+
+
+def _mask_dtype(n_leaves: int):
+    for dtype in (np.uint16, np.uint32, np.uint64):
+        if n_leaves <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"trees with {n_leaves} leaves exceed the 64-leaf bitmask")
+
+
+class CompiledTreeEnsemble:
+    """Compiled form of a single-output gradient-boosting regressor."""
+
+    def __init__(self, feature, threshold, left, right, value, roots,
+                 learning_rate, init_value, n_features):
+        # ── flat node arrays (global node ids, -1 children for leaves) ──
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.learning_rate = learning_rate
+        self.init_value = init_value
+        self.n_features = n_features
+        self._compile()
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    # ── conversion ──────────────────────────────────────────────
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledTreeEnsemble":
+        """
+        Convert a fitted ``GradientBoostingRegressor``.
+
+        Raises ``ValueError`` for anything the engine does not reproduce
+        exactly (multi-output models, custom init estimators, >64 leaves).
+        """
+        estimators = getattr(model, "estimators_", None)
+        if estimators is None or estimators.ndim != 2 or estimators.shape[1] != 1:
+            raise ValueError("expected a fitted single-output GradientBoostingRegressor")
+
+        init = model.init_
+        if isinstance(init, str) and init == "zero":
+            init_value = 0.0
+        elif type(init).__name__ == "DummyRegressor" and np.size(init.constant_) == 1:
+            init_value = float(np.ravel(init.constant_)[0])
+        else:
+            raise ValueError(f"unsupported init estimator: {init!r}")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for est in estimators[:, 0]:
+            tree = est.tree_
+            n = tree.node_count
+            left = tree.children_left.astype(np.int64)
+            right = tree.children_right.astype(np.int64)
+            leaf = left == _TREE_LEAF
+
+            features.append(np.where(leaf, _TREE_LEAF, tree.feature).astype(np.int64))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(leaf, _TREE_LEAF, left + offset))
+            rights.append(np.where(leaf, _TREE_LEAF, right + offset))
+            values.append(tree.value.reshape(n, -1)[:, 0].astype(np.float64))
+            roots.append(offset)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int64),
+            learning_rate=float(model.learning_rate),
+            init_value=init_value,
+            n_features=int(model.n_features_in_),
+        )
+
+    # ── compile ─────────────────────────────────────────────────
+    def _compile(self) -> None:
+        """Build per-feature sorted thresholds + prefix-AND leaf bitmasks."""
+        n_trees = self.n_trees
+        leaves_per_tree: list[list[int]] = []
+        split_nodes: list[tuple[int, int]] = []       # (node, tree)
+        eliminated: dict[int, list[int]] = {}         # split node → its left-subtree leaves
+
+        for t, root in enumerate(self.roots):
+            leaves: list[int] = []
+            stack = [(int(root), [])]                 # (node, ancestors taking the left edge)
+            while stack:
+                node, left_of = stack.pop()
+                if self.left[node] == _TREE_LEAF:
+                    for split in left_of:
+                        eliminated[split].append(len(leaves))
+                    leaves.append(node)
+                    continue
+                eliminated[node] = []
+                split_nodes.append((node, t))
+                # push right first so leaves are numbered left → right
+                stack.append((int(self.right[node]), left_of))
+                stack.append((int(self.left[node]), left_of + [node]))
+            leaves_per_tree.append(leaves)
+
+        max_leaves = max(len(leaves) for leaves in leaves_per_tree)
+        dtype = _mask_dtype(max_leaves)
+        full = np.iinfo(dtype).max
+
+        # (trees, max_leaves) table of learning_rate * leaf value
+        self._leaf_values = np.zeros((n_trees, max_leaves), dtype=np.float64)
+        for t, leaves in enumerate(leaves_per_tree):
+            self._leaf_values[t, :len(leaves)] = self.learning_rate * self.value[leaves]
+        self._leaf_offsets = np.arange(n_trees, dtype=np.int64) * max_leaves
+
+        self._mask_dtype = dtype
+        self._features: list[int] = []
+        self._sorted_thresholds: list[np.ndarray] = []
+        self._prefix_masks: list[np.ndarray] = []
+        for f in range(self.n_features):
+            nodes = [(node, t) for node, t in split_nodes if self.feature[node] == f]
+            if not nodes:
+                continue
+            nodes.sort(key=lambda nt: self.threshold[nt[0]])
+            prefix = np.full((len(nodes) + 1, n_trees), full, dtype=dtype)
+            running = prefix[0].copy()
+            for k, (node, t) in enumerate(nodes, start=1):
+                mask = full
+                for leaf_pos in eliminated[node]:
+                    mask &= ~dtype(1 << leaf_pos)
+                running[t] &= mask
+                prefix[k] = running
+            self._features.append(f)
+            self._sorted_thresholds.append(
+                np.array([self.threshold[node] for node, _ in nodes], dtype=np.float64)
+            )
+            self._prefix_masks.append(prefix)
+
+    # ── predict ─────────────────────────────────────────────────
+    def predict(self, X) -> np.ndarray:
+        """Predict for an ``(n_rows, n_features)`` matrix."""
+        # sklearn validates GB inputs as float32 before comparing thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"expected shape (n, {self.n_features}), got {X.shape}"
+            )
+        if not np.isfinite(X).all():
+            # GradientBoostingRegressor rejects NaN / inf the same way
+            raise ValueError("Input X contains NaN or infinity")
+
+        n_rows = X.shape[0]
+        out = np.empty(n_rows, dtype=np.float64)
+        for start in range(0, n_rows, _BLOCK_ROWS):
+            stop = min(start + _BLOCK_ROWS, n_rows)
+            out[start:stop] = self._predict_block(X[start:stop])
+        return out
+
+    def _exit_leaves(self, X: np.ndarray) -> np.ndarray:
+        """(rows, trees) index of each tree's exit leaf."""
+        alive = np.full(
+            (X.shape[0], self.n_trees), np.iinfo(self._mask_dtype).max,
+            dtype=self._mask_dtype,
+        )
+        for f, thresholds, prefix in zip(
+            self._features, self._sorted_thresholds, self._prefix_masks
+        ):
+            # split "x <= threshold" is false for every threshold below x
+            n_false = np.searchsorted(thresholds, X[:, f], side="left")
+            alive &= prefix[n_false]
+
+        if self._mask_dtype is np.uint16:
+            return _LOWEST_BIT_16[alive]
+        lowest = alive & (~alive + self._mask_dtype(1))
+        return np.log2(lowest.astype(np.float64)).astype(np.int64)
+
+    def _predict_block(self, X: np.ndarray) -> np.ndarray:
+        leaves = self._exit_leaves(X)
+        n_rows = X.shape[0]
+
+        # Same accumulation order as sklearn: init, then stage by stage
+        if n_rows < _LOOP_MIN_ROWS:
+            staged = np.empty((n_rows, self.n_trees + 1), dtype=np.float64)
+            staged[:, 0] = self.init_value
+            staged[:, 1:] = self._leaf_values.ravel()[leaves + self._leaf_offsets]
+            return np.cumsum(staged, axis=1)[:, -1]
+
+        out = np.full(n_rows, self.init_value, dtype=np.float64)
+        for tree_values, tree_leaves in zip(self._leaf_values, leaves.T):
+            out += tree_values[tree_leaves]
+        return out
@@ -0,0 +1,90 @@
+"""
+ZoneIndex — nearest-hot-zone lookups over one published clustering result.
+
+Cluster centres go into a haversine ``BallTree`` when a result is
+published.  ``nearby()`` ranks zones by their score discounted with the
+distance from the rider to the zone's edge:
+
+    nearby_score = score · exp(−max(0, distance_to_centre − radius) / scale)
+
+The k best are found from the nearest few candidates; because scores are
+bounded by the best score in the result, any zone further out than the
+candidates can be ruled out without visiting it, and only when it cannot
+does the lookup fall back to scoring every zone.
+"""
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+from models.incremental_dbscan import haversine_rad
+
+EARTH_RADIUS_KM = 6371.0
+
+
+class ZoneIndex:
+    """Spatial index over the clusters of one ``run_clustering`` result."""
+
+    # Candidates fetched per requested zone before the exactness check
+    _CANDIDATES_PER_K = 4
+
+    def __init__(self, result: dict, distance_scale_km: float = 2.0):
+        self.city = result.get("city")
+        self.generated_at = result.get("generated_at")
+        self.time_block = result.get("time_block")
+        self.clusters: list[dict] = list(result.get("clusters", []))
+        self.distance_scale_km = float(distance_scale_km)
+
+        n = len(self.clusters)
+        self._centers = np.radians(
+            [[c["center_lat"], c["center_lng"]] for c in self.clusters]
+        ).reshape(n, 2)
+        self._scores = np.array([c["score"] for c in self.clusters], dtype=np.float64)
+        self._radius_km = np.array([c["radius_km"] for c in self.clusters], dtype=np.float64)
+        self._max_score = float(self._scores.max()) if n else 0.0
+        self._max_radius_km = float(self._radius_km.max()) if n else 0.0
+        self._tree = BallTree(self._centers, metric="haversine") if n else None
+
+    def __len__(self) -> int:
+        return len(self.clusters)
+
+    def nearby(self, lat: float, lng: float, k: int = 5) -> list[dict]:
+        """The ``k`` best zones for a rider at (lat, lng), best first."""
+        n = len(self.clusters)
+        k = min(int(k), n)
+        if k <= 0:
+            return []
+
+        point = np.radians([[lat, lng]])
+        m = min(n, max(k * self._CANDIDATES_PER_K, 16))
+        dist, idx = self._tree.query(point, k=m)
+        dist_km, idx = dist[0] * EARTH_RADIUS_KM, idx[0]
+        discounted = self._discount(idx, dist_km)
+
+        if m < n:
+            # every zone not fetched is at least dist_km[-1] from the rider
+            kth = np.partition(discounted, m - k)[m - k]
+            bound = self._max_score * np.exp(
+                -max(0.0, dist_km[-1] - self._max_radius_km) / self.distance_scale_km
+            )
+            if bound >= kth:
+                idx = np.arange(n)
+                dist_km = EARTH_RADIUS_KM * haversine_rad(
+                    point[0, 0], point[0, 1], self._centers[:, 0], self._centers[:, 1]
+                )
+                discounted = self._discount(idx, dist_km)
+
+        # best discounted score first; nearer zone wins ties
+        order = np.lexsort((dist_km, -discounted))[:k]
+        return [
+            {
+                **self.clusters[idx[i]],
+                "distance_km": round(float(dist_km[i]), 3),
+                "nearby_score": round(float(discounted[i]), 1),
+            }
+            for i in order
+        ]
+
+    # ── internals ───────────────────────────────────────────────
+    def _discount(self, idx: np.ndarray, dist_km: np.ndarray) -> np.ndarray:
+        outside_km = np.maximum(0.0, dist_km - self._radius_km[idx])
+        return self._scores[idx] * np.exp(-outside_km / self.distance_scale_km)
@@ -5,22 +5,38 @@ GET /insights/{user_id}  → last 7 days earnings + expenses → LLM → structu
 GET /insights/health     → connectivity check
 
 Falls back to DATA-DRIVEN insights (not generic seeds) when LLM is unavailable.
+
+The LLM is reached through one module-level ``AsyncOpenAI`` client
+(keep-alive pool, timeouts, at most INSIGHTS_LLM_CONCURRENCY calls in
+flight).  OPENROUTER_BASE_URL can point it at a local stub server, and
+``set_llm_client()`` swaps it outright in tests.
+
+LLM answers are cached (in-process LRU → Redis) under the user id plus a
+fingerprint of the fetched rows, model and prompt, so the LLM is only asked
+again once the user's last-7-days data changes or INSIGHTS_CACHE_TTL passes.
+Redis calls run on the thread pool, never on the event loop.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
 import os
+import time
 from collections import defaultdict
 from datetime import datetime, timedelta
 
 from dotenv import load_dotenv
 load_dotenv()  # load ml-service/.env
 
+import httpx
 from fastapi import APIRouter, HTTPException
-from sqlalchemy import text
+from openai import AsyncOpenAI
 
 from schemas.insights_schema import InsightItem, InsightsResponse
-from utils.db import get_engine
+from utils.cache import LRUCache, get_redis
+from utils.db import fetch_all
+from utils.executors import run_in_thread
 
 logger = logging.getLogger(__name__)
 
@@ -32,43 +48,46 @@ INSIGHTS_MODEL_NAME = os.getenv(
     "OPENROUTER_MODEL_NAME",
     "meta-llama/llama-3.2-3b-instruct:free",
 )
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+INSIGHTS_LLM_TIMEOUT_S = float(os.getenv("INSIGHTS_LLM_TIMEOUT_S", "15"))
+INSIGHTS_LLM_CONCURRENCY = int(os.getenv("INSIGHTS_LLM_CONCURRENCY", "8"))
+# /insights/health reuses the last known LLM status for this long
+INSIGHTS_HEALTH_TTL_S = float(os.getenv("INSIGHTS_HEALTH_TTL_S", "60"))
+
+# ── Insights cache ──────────────────────────────────────────────
+INSIGHTS_CACHE_TTL = int(os.getenv("INSIGHTS_CACHE_TTL", "86400"))     # 0 disables
+INSIGHTS_CACHE_SIZE = int(os.getenv("INSIGHTS_CACHE_SIZE", "2000"))
+_insights_cache = LRUCache(INSIGHTS_CACHE_SIZE)                         # key → (stored_at, items)
 
 
 # ═══════════════════════════════════════════════════════════════
 #  Data fetching — last 7 days from actual tables
 # ═══════════════════════════════════════════════════════════════
-def _fetch_last7_earnings(user_id: str) -> list[dict]:
+async def _fetch_last7_earnings(user_id: str) -> list[dict]:
     """Get last 7 days of earnings from forecast_data table."""
-    engine = get_engine()
     cutoff = (datetime.utcnow() - timedelta(days=7)).date()
     try:
-        with engine.connect() as conn:
-            rows = conn.execute(text("""
-                SELECT date, net_earnings, incentives_earned, total_earnings, worked
-                FROM forecast_data
-                WHERE user_id = :uid AND date >= :cutoff
-                ORDER BY date ASC
-            """), {"uid": user_id, "cutoff": cutoff}).mappings().all()
-            return [dict(r) for r in rows]
+        return await fetch_all("""
+            SELECT date, net_earnings, incentives_earned, total_earnings, worked
+            FROM forecast_data
+            WHERE user_id = :uid AND date >= :cutoff
+            ORDER BY date ASC
+        """, {"uid": user_id, "cutoff": cutoff})
     except Exception as exc:
         logger.error("Failed to fetch earnings: %s", exc)
         return []
 
 
-def _fetch_last7_expenses(user_id: str) -> list[dict]:
+async def _fetch_last7_expenses(user_id: str) -> list[dict]:
     """Get last 7 days of expenses from expenses table."""
-    engine = get_engine()
     cutoff = (datetime.utcnow() - timedelta(days=7)).date()
     try:
-        with engine.connect() as conn:
-            rows = conn.execute(text("""
-                SELECT date, amount, category, merchant, is_tax_deductible
-                FROM expenses
-                WHERE user_id = :uid AND date >= :cutoff
-                ORDER BY date ASC
-            """), {"uid": user_id, "cutoff": cutoff}).mappings().all()
-            return [dict(r) for r in rows]
+        return await fetch_all("""
+            SELECT date, amount, category, merchant, is_tax_deductible
+            FROM expenses
+            WHERE user_id = :uid AND date >= :cutoff
+            ORDER BY date ASC
+        """, {"uid": user_id, "cutoff": cutoff})
     except Exception as exc:
         logger.error("Failed to fetch expenses: %s", exc)
         return []
@@ -295,70 +314,184 @@ Give 4 insights:
 # ═══════════════════════════════════════════════════════════════
 #  LLM call
 # ═══════════════════════════════════════════════════════════════
-def _call_llm(user_prompt: str) -> list[dict] | None:
-    """Call OpenRouter API. Returns parsed JSON list or None."""
-    if not INSIGHTS_MODEL_API_KEY:
-        logger.info("No LLM API key — skipping LLM call")
-        return None
+_llm_client: AsyncOpenAI | None = None
+_llm_semaphore = asyncio.Semaphore(INSIGHTS_LLM_CONCURRENCY)
+# outcome of the latest LLM round trip (completion or status probe)
+_llm_status = {"ok": None, "checked_at": 0.0, "error": None}
 
-    try:
-        from openai import OpenAI
 
-        client = OpenAI(
+def _get_llm_client() -> AsyncOpenAI:
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = AsyncOpenAI(
             api_key=INSIGHTS_MODEL_API_KEY,
             base_url=OPENROUTER_BASE_URL,
+            timeout=httpx.Timeout(INSIGHTS_LLM_TIMEOUT_S, connect=5.0),
+            max_retries=1,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=INSIGHTS_LLM_CONCURRENCY,
+                    max_keepalive_connections=INSIGHTS_LLM_CONCURRENCY,
+                    keepalive_expiry=60,
+                ),
+            ),
         )
-        response = client.chat.completions.create(
-            model=INSIGHTS_MODEL_NAME,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.7,
-            max_tokens=2048,
-            timeout=15,
-        )
-        raw = response.choices[0].message.content.strip()
-        logger.info("LLM raw response length: %d chars", len(raw))
+    return _llm_client
+
+
+def set_llm_client(client: AsyncOpenAI | None) -> None:
+    """Swap the shared client (e.g. one pointed at a stub server in tests)."""
+    global _llm_client
+    _llm_client = client
+
+
+async def close_llm_client() -> None:
+    global _llm_client
+    if _llm_client is not None:
+        await _llm_client.close()
+        _llm_client = None
+
+
+def _record_llm_status(ok: bool, error: str | None = None) -> None:
+    _llm_status.update(ok=ok, checked_at=time.time(), error=error)
+
 
-        if raw.startswith("```"):
-            raw = raw.split("\n", 1)[1]
-            if raw.endswith("```"):
-                raw = raw[: raw.rfind("```")]
-            raw = raw.strip()
+def _parse_llm_json(raw: str) -> list[dict] | None:
+    raw = raw.strip()
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[1]
+        if raw.endswith("```"):
+            raw = raw[: raw.rfind("```")]
+        raw = raw.strip()
+
+    parsed = json.loads(raw)
+    if not isinstance(parsed, list):
+        return None
+    return parsed
 
-        parsed = json.loads(raw)
-        if not isinstance(parsed, list):
-            return None
-        return parsed
+
+async def _call_llm(user_prompt: str) -> list[dict] | None:
+    """Call OpenRouter API. Returns parsed JSON list or None."""
+    if not INSIGHTS_MODEL_API_KEY:
+        logger.info("No LLM API key — skipping LLM call")
+        return None
+
+    try:
+        async with _llm_semaphore:
+            response = await _get_llm_client().chat.completions.create(
+                model=INSIGHTS_MODEL_NAME,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt},
+                ],
+                temperature=0.7,
+                max_tokens=2048,
+            )
+        _record_llm_status(True)
+        raw = response.choices[0].message.content or ""
+        logger.info("LLM raw response length: %d chars", len(raw))
+        return _parse_llm_json(raw)
 
     except json.JSONDecodeError as exc:
         logger.error("LLM response is not valid JSON: %s", exc)
         return None
     except Exception as exc:
+        _record_llm_status(False, str(exc))
         logger.error("LLM call failed: %s", exc)
         return None
 
 
+async def _llm_connected() -> bool:
+    """
+    Cached LLM reachability: the outcome of the latest call if it is recent,
+    otherwise one ``GET /models`` probe (no completion, no tokens spent).
+    """
+    if not INSIGHTS_MODEL_API_KEY:
+        return False
+    if time.time() - _llm_status["checked_at"] < INSIGHTS_HEALTH_TTL_S:
+        return bool(_llm_status["ok"])
+    try:
+        async with _llm_semaphore:
+            await _get_llm_client().models.list(timeout=5.0)
+        _record_llm_status(True)
+    except Exception as exc:
+        logger.warning("Insights LLM check failed: %s", exc)
+        _record_llm_status(False, str(exc))
+    return bool(_llm_status["ok"])
+
+
+# ═══════════════════════════════════════════════════════════════
+#  LLM answer cache
+# ═══════════════════════════════════════════════════════════════
+def _insights_cache_key(user_id: str, earnings: list[dict], expenses: list[dict]) -> str:
+    """
+    user id + sha256 of everything that shapes the LLM answer: the fetched
+    rows (so any insert, edit or delete — or the 7-day window sliding —
+    changes it), the model and the system prompt.
+    """
+    payload = json.dumps(
+        [INSIGHTS_MODEL_NAME, SYSTEM_PROMPT, earnings, expenses],
+        default=str, sort_keys=True,
+    )
+    return f"insights:{user_id}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+async def _get_cached_insights(key: str) -> list[dict] | None:
+    """In-process LRU inline; the Redis tier (blocking client) on the thread pool."""
+    if INSIGHTS_CACHE_TTL <= 0:
+        return None
+    entry = _insights_cache.get(key)
+    if entry is not None and time.time() - entry[0] < INSIGHTS_CACHE_TTL:
+        return entry[1]
+
+    stored = await run_in_thread(_redis_get_insights, key)
+    if stored is None:
+        return None
+    _insights_cache.put(key, (stored["stored_at"], stored["insights"]))
+    return stored["insights"]
+
+
+async def _put_cached_insights(key: str, insights: list[dict]) -> None:
+    if INSIGHTS_CACHE_TTL <= 0:
+        return
+    stored_at = time.time()
+    _insights_cache.put(key, (stored_at, insights))
+    await run_in_thread(_redis_put_insights, key, stored_at, insights)
+
+
+def _redis_get_insights(key: str) -> dict | None:
+    r = get_redis()
+    if r:
+        try:
+            raw = r.get(key)
+            if raw:
+                return json.loads(raw)
+        except Exception as exc:
+            logger.warning("Insights cache read failed: %s", exc)
+    return None
+
+
+def _redis_put_insights(key: str, stored_at: float, insights: list[dict]) -> None:
+    r = get_redis()
+    if r:
+        try:
+            payload = json.dumps({"stored_at": stored_at, "insights": insights})
+            r.setex(key, INSIGHTS_CACHE_TTL, payload)
+        except Exception as exc:
+            logger.warning("Insights cache write failed: %s", exc)
+
+
 # ═══════════════════════════════════════════════════════════════
 #  Endpoints
 # ═══════════════════════════════════════════════════════════════
 @router.get("/health", name="insights_health")
 async def insights_health():
-    connected = False
-    try:
-        from openai import OpenAI
-        client = OpenAI(api_key=INSIGHTS_MODEL_API_KEY, base_url=OPENROUTER_BASE_URL)
-        resp = client.chat.completions.create(
-            model=INSIGHTS_MODEL_NAME,
-            messages=[{"role": "user", "content": "ping"}],
-            max_tokens=5, timeout=5,
-        )
-        connected = bool(resp.choices)
-    except Exception as exc:
-        logger.warning("Insights LLM check failed: %s", exc)
-
-    return {"status": "ok", "llm_connected": connected}
+    return {
+        "status": "ok",
+        "llm_connected": await _llm_connected(),
+        "llm_last_error": _llm_status["error"],
+        "cache": _insights_cache.stats(),
+    }
 
 
 @router.get("/{user_id}")
@@ -368,9 +501,10 @@ async def get_insights(user_id: str):
     NEVER returns generic seeds — always uses actual user data.
     """
 
-    # 1. Fetch LAST 7 DAYS data
-    earnings = _fetch_last7_earnings(user_id)
-    expenses = _fetch_last7_expenses(user_id)
+    # 1. Fetch LAST 7 DAYS data — both queries at once
+    earnings, expenses = await asyncio.gather(
+        _fetch_last7_earnings(user_id), _fetch_last7_expenses(user_id)
+    )
 
     logger.info(
         "User %s — fetched %d earnings rows, %d expense rows (last 7 days)",
@@ -391,20 +525,32 @@ async def get_insights(user_id: str):
             is_seeded=True,
         )
 
-    # 3. Try LLM first
+    # 3. Reuse the LLM answer for this exact data, if we have one
+    cache_key = _insights_cache_key(user_id, earnings, expenses)
+    cached = await _get_cached_insights(cache_key)
+    if cached:
+        logger.info("Serving cached LLM insights for user %s", user_id)
+        return InsightsResponse(
+            user_id=user_id,
+            insights=[InsightItem(**item) for item in cached],
+            is_seeded=False,
+        )
+
+    # 4. Try LLM first
     user_prompt = _build_prompt(earnings, expenses)
     logger.info("Prompt built (%d chars), calling LLM...", len(user_prompt))
-    llm_result = _call_llm(user_prompt)
+    llm_result = await _call_llm(user_prompt)
 
     if llm_result:
         try:
             validated = [InsightItem(**item) for item in llm_result]
             logger.info("Generated %d LLM insights for user %s", len(validated), user_id)
+            await _put_cached_insights(cache_key, [item.model_dump() for item in validated])
             return InsightsResponse(user_id=user_id, insights=validated, is_seeded=False)
         except Exception as exc:
             logger.error("LLM response validation failed: %s", exc)
 
-    # 4. LLM failed → generate DATA-DRIVEN insights from real numbers
+    # 5. LLM failed → generate DATA-DRIVEN insights from real numbers
     logger.info("LLM unavailable — generating data-driven insights for user %s", user_id)
     data_insights = _generate_data_insights(earnings, expenses)
 
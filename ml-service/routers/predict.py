@@ -1,16 +1,39 @@
 """
 Earnings prediction router.
 
-POST /predict/earnings        — upload CSV → feature engineering → per-worker forecast
-GET  /predict/earnings/health — quick liveness / model-status check
+POST /predict/earnings          — upload CSV → feature engineering → per-worker forecast
+                                  (``?stream=true`` → chunked parse, NDJSON output;
+                                   ``?horizon=7`` → 7-day outlook per worker)
+POST /predict/earnings/features — one worker's 13 features → forecast (micro-batched)
+POST /predict/earnings/{user_id}/days — append days to the worker's rolling feature state
+GET  /predict/earnings/health   — quick liveness / model-status check
+GET  /predict/earnings/{user_id} — one worker's forecast from the feature store
+POST /predict/earnings/users    — the same for many workers in one call
 """
 
 import io
+import json
 import logging
+import os
+from datetime import date, timedelta
 
 import numpy as np
 import pandas as pd
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+
+from schemas.predict_schema import (
+    EarningsDay,
+    EarningsFeatures,
+    EarningsPrediction,
+    EarningsUsersRequest,
+    EarningsUsersResponse,
+    FeatureStoreState,
+    UserEarningsPrediction,
+)
+from utils.db import get_forecast_bulk, get_forecast_history
+from utils.executors import run_in_process, run_in_thread
+from utils.feature_store import DAY_COLS, MissingState, OutOfOrderDay, RollingEarnings
 
 logger = logging.getLogger(__name__)
 
@@ -44,12 +67,34 @@ MODEL_FEATURE_ORDER = [
     "prev_30day_avg", "days_active_last_7",
 ]
 
+# Streaming mode: rows parsed per chunk, and rows kept per worker.  The
+# 30-day average for a worker's last row needs the 30 rows before it.
+STREAM_CHUNK_ROWS = int(os.getenv("PREDICT_STREAM_CHUNK_ROWS", "50000"))
+STREAM_WINDOW_ROWS = 31
+
+# Multi-horizon mode: days forecast past each worker's last row
+FORECAST_MAX_HORIZON = 7
+_HOLIDAY_DATES = np.array(sorted(INDIAN_HOLIDAYS_2023), dtype="datetime64[D]")
+
 
 # ═══════════════════════════════════════════════════════════════
 #  Feature-engineering pipeline
 # ═══════════════════════════════════════════════════════════════
-def _engineer_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Steps 1–2: date features + rolling / lag features."""
+def _engineer_features(
+    df: pd.DataFrame,
+    worker_means: pd.Series | None = None,
+    last_earnings: pd.Series | None = None,
+) -> pd.DataFrame:
+    """
+    Steps 1–2: date features + rolling / lag features.
+
+    ``worker_means`` (indexed by worker_id) overrides the mean worked-day
+    earnings used to fill leading NaNs — the streaming path passes the
+    full-history means because it only holds a trailing window of rows.
+    ``last_earnings`` (same index) is each worker's last worked-day
+    earnings before the first row of ``df``; the forward-filled lags
+    carry it through idle spells that began before the window.
+    """
 
     # ── Step 0: parse & sort ─────────────────────────────────────
     df["date"] = pd.to_datetime(df["date"])
@@ -64,58 +109,339 @@ def _engineer_features(df: pd.DataFrame) -> pd.DataFrame:
     df["is_month_end"] = (df["date"].dt.day >= 28).astype(int)
 
     # ── Step 2: rolling / lag features (per worker) ──────────────
-    def _per_worker(g: pd.DataFrame) -> pd.DataFrame:
-        g = g.copy()
-        worked_earnings = g["net_earnings"].where(g["worked"] == 1)
-
-        g["prev_day_earnings"] = worked_earnings.shift(1).ffill()
-        g["prev_7day_avg"] = (
-            worked_earnings.shift(1).rolling(7, min_periods=1).mean().ffill()
-        )
-        g["prev_30day_avg"] = (
-            worked_earnings.shift(1).rolling(30, min_periods=1).mean().ffill()
-        )
-        g["days_active_last_7"] = (
-            g["worked"].shift(1).rolling(7, min_periods=1).sum().fillna(0)
-        )
+    # One grouped shift / rolling / ffill over the whole sorted frame —
+    # cost scales with the number of rows, not the number of workers.
+    wid = df["worker_id"]
+    worked_earnings = df["net_earnings"].where(df["worked"] == 1)
+    prev_earnings = worked_earnings.groupby(wid).shift(1)
+
+    df["prev_day_earnings"] = prev_earnings.groupby(wid).ffill()
+    df["prev_7day_avg"] = _rolling(prev_earnings, wid, 7, "mean").groupby(wid).ffill()
+    df["prev_30day_avg"] = _rolling(prev_earnings, wid, 30, "mean").groupby(wid).ffill()
+    df["days_active_last_7"] = (
+        _rolling(df["worked"].groupby(wid).shift(1), wid, 7, "sum").fillna(0)
+    )
 
-        # Fill leading NaNs with worker's own mean worked-day earnings
-        worker_mean = worked_earnings.mean()
-        if pd.isna(worker_mean):
-            worker_mean = 0
+    # Lags still undefined after an idle spell longer than the window:
+    # once every worked day has left the 7 / 30 rows, the forward-filled
+    # averages hold the last worked day's earnings alone, like prev_day.
+    if last_earnings is not None:
+        carried = wid.map(last_earnings)
         for col in ("prev_day_earnings", "prev_7day_avg", "prev_30day_avg"):
-            g[col] = g[col].fillna(worker_mean)
+            df[col] = df[col].fillna(carried)
+
+    # Fill leading NaNs with worker's own mean worked-day earnings
+    if worker_means is None:
+        worker_mean = worked_earnings.groupby(wid).transform("mean")
+    else:
+        worker_mean = wid.map(worker_means)
+    worker_mean = worker_mean.fillna(0)
+    for col in ("prev_day_earnings", "prev_7day_avg", "prev_30day_avg"):
+        df[col] = df[col].fillna(worker_mean)
+
+    # Cast to int
+    for col in ("prev_day_earnings", "prev_7day_avg", "prev_30day_avg",
+                 "days_active_last_7"):
+        df[col] = df[col].astype(int)
+
+    return df
 
-        # Cast to int
-        for col in ("prev_day_earnings", "prev_7day_avg", "prev_30day_avg",
-                     "days_active_last_7"):
-            g[col] = g[col].astype(int)
 
-        return g
+def _rolling(series: pd.Series, wid: pd.Series, window: int, how: str) -> pd.Series:
+    """Per-worker trailing window (min_periods=1), aligned back to ``series``."""
+    rolled = getattr(series.groupby(wid).rolling(window, min_periods=1), how)()
+    return rolled.reset_index(level=0, drop=True)
 
-    df = df.groupby("worker_id", group_keys=False).apply(_per_worker)
-    return df
+
+def _predict_last_rows(last_rows: pd.DataFrame, earnings_model) -> list[dict]:
+    """Steps 3–4: scale + predict one engineered row per worker."""
+    feature_matrix = last_rows[MODEL_FEATURE_ORDER].to_numpy(dtype=np.float64)
+    worker_ids = last_rows["worker_id"].to_numpy()
+    # unscaled prev_30day_avg for the confidence calc
+    prev30 = last_rows["prev_30day_avg"].to_numpy()
+
+    try:
+        predictions = earnings_model.predict_matrix(feature_matrix)
+    except Exception as exc:
+        logger.error("Prediction failed: %s", exc)
+        raise HTTPException(500, f"Prediction error: {exc}")
+
+    return [
+        {"worker_id": int(wid), **_format_prediction(pred, p30, earnings_model)}
+        for wid, pred, p30 in zip(worker_ids, predictions, prev30)
+    ]
+
+
+def _format_prediction(pred: float, prev30: float, earnings_model) -> dict:
+    """Raw model output (paise) → the fields of ``EarningsPrediction``."""
+    predicted_paise = max(0, int(round(pred)))
+    return {
+        "predicted_earnings_paise": predicted_paise,
+        "predicted_earnings_rupees": round(predicted_paise / 100, 2),
+        "confidence": earnings_model._compute_confidence(predicted_paise, prev30),
+    }
+
+
+# ═══════════════════════════════════════════════════════════════
+#  Multi-horizon forecast
+# ═══════════════════════════════════════════════════════════════
+def _calendar_matrix(dates: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """is_weekend / is_holiday / is_month_end of a ``datetime64[D]`` array."""
+    weekday = (dates.astype(np.int64) + 3) % 7          # 1970-01-01 was a Thursday
+    day_of_month = (dates - dates.astype("datetime64[M]")).astype(np.int64) + 1
+    return (
+        (weekday >= 5).astype(np.float64),
+        np.isin(dates, _HOLIDAY_DATES).astype(np.float64),
+        (day_of_month >= 28).astype(np.float64),
+    )
+
+
+def _forecast_horizon(df: pd.DataFrame, earnings_model, horizon: int) -> list[dict]:
+    """
+    Forecast the ``horizon`` days after each worker's last row.
+
+    ``df`` is the output of ``_engineer_features``.  Day 1's lags come
+    from one grouped pass over the frame; from then on the lags are
+    rolled forward in NumPy for all workers at once, each day's
+    prediction entering the windows as a worked day, with one
+    ``predict_matrix`` call per day over the whole worker matrix.
+
+    Future days are assumed worked, with the last row's weather, rating,
+    incentives and efficiency carried forward; the calendar flags are the
+    real ones of each future date.
+    """
+    wid = df["worker_id"]
+    codes, worker_ids = pd.factorize(wid, sort=True)
+    n_workers = len(worker_ids)
+    worked_earnings = df["net_earnings"].where(df["worked"] == 1)
+    last = df.groupby(codes).tail(1)
+
+    # Lags of the day after each worker's last row: windows end at that row
+    next_lags = pd.DataFrame({
+        "prev_day_earnings": worked_earnings.groupby(wid).ffill(),
+        "prev_7day_avg": _rolling(worked_earnings, wid, 7, "mean").groupby(wid).ffill(),
+        "prev_30day_avg": _rolling(worked_earnings, wid, 30, "mean").groupby(wid).ffill(),
+        "days_active_last_7": _rolling(df["worked"], wid, 7, "sum"),
+    }).loc[last.index].to_numpy(dtype=np.float64)
+    worker_mean = worked_earnings.groupby(codes).mean().fillna(0).to_numpy()
+    lags = np.where(np.isnan(next_lags), worker_mean[:, None], next_lags)
+
+    # Trailing windows, right-aligned: earnings of worked days (NaN = idle / no row)
+    from_end = df.groupby(codes).cumcount(ascending=False).to_numpy()
+    earn_window = np.full((n_workers, 30), np.nan)
+    worked_window = np.zeros((n_workers, 7))
+    in30, in7 = from_end < 30, from_end < 7
+    earn_window[codes[in30], 29 - from_end[in30]] = worked_earnings.to_numpy()[in30]
+    worked_window[codes[in7], 6 - from_end[in7]] = df["worked"].to_numpy()[in7]
+
+    dates = (last["date"].to_numpy().astype("datetime64[D]")[:, None]
+             + np.arange(1, horizon + 1))
+    is_weekend, is_holiday, is_month_end = _calendar_matrix(dates)
+
+    exog = {col: last[col].to_numpy(dtype=np.float64) for col in
+            ("rainfall_mm", "temp_celsius", "average_rating", "incentives_earned",
+             "efficiency_ratio")}
+    ones = np.ones(n_workers)
+
+    paise = np.zeros((n_workers, horizon), dtype=np.int64)
+    prev30 = np.zeros((n_workers, horizon))
+    for h in range(horizon):
+        if h > 0:
+            earn_window = np.concatenate([earn_window[:, 1:], paise[:, h - 1, None]], axis=1)
+            worked_window = np.concatenate([worked_window[:, 1:], ones[:, None]], axis=1)
+            lags = np.column_stack([
+                paise[:, h - 1],
+                np.nanmean(earn_window[:, -7:], axis=1),
+                np.nanmean(earn_window, axis=1),
+                worked_window.sum(axis=1),
+            ])
+        lag_cols = np.trunc(lags)              # int cast, as in _engineer_features
+        features = {
+            **exog, "worked": ones,
+            "is_weekend": is_weekend[:, h], "is_holiday": is_holiday[:, h],
+            "is_month_end": is_month_end[:, h],
+            "prev_day_earnings": lag_cols[:, 0], "prev_7day_avg": lag_cols[:, 1],
+            "prev_30day_avg": lag_cols[:, 2], "days_active_last_7": lag_cols[:, 3],
+        }
+        X = np.column_stack([features[col] for col in MODEL_FEATURE_ORDER])
+        paise[:, h] = np.maximum(0, np.rint(earnings_model.predict_matrix(X)))
+        prev30[:, h] = lag_cols[:, 2]
+
+    return [
+        {
+            "worker_id": int(worker_ids[i]),
+            "dates": [str(d) for d in dates[i]],
+            "predicted_earnings_paise": paise[i].tolist(),
+            "predicted_earnings_rupees": (paise[i] / 100).round(2).tolist(),
+            "confidence": [earnings_model._compute_confidence(p, p30)
+                           for p, p30 in zip(paise[i], prev30[i])],
+        }
+        for i in range(n_workers)
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════
+#  Streaming ingestion
+# ═══════════════════════════════════════════════════════════════
+def _missing_csv_columns(fileobj) -> set[str]:
+    """
+    Required columns absent from the upload's header, parsed the way
+    ``pd.read_csv`` parses the whole file (quoting, BOM); rewinds ``fileobj``.
+    """
+    try:
+        columns = pd.read_csv(fileobj, nrows=0).columns
+    finally:
+        fileobj.seek(0)
+    return set(REQUIRED_CSV_COLS) - set(columns)
+
+
+def _stream_predictions(fileobj, earnings_model, grouped: bool = False):
+    """
+    Parse an uploaded CSV in chunks and yield NDJSON, one line per worker
+    (lines are yielded in batches as workers are predicted).
+
+    Only the trailing ``STREAM_WINDOW_ROWS`` rows per worker are kept, plus
+    a running sum / count of worked-day earnings for the leading-NaN fill
+    and the last worked-day earnings among the rows dropped from the
+    window, so memory is bounded by workers × window rather than by file
+    size.  Lag features match the in-memory path exactly, idle spells of
+    any length included.
+
+    With ``grouped=True`` the caller promises each worker's rows are
+    contiguous, and a worker is predicted as soon as the reader moves past
+    it.  Otherwise every worker is predicted once the file is exhausted.
+    """
+    window: pd.DataFrame | None = None
+    worked_sum = pd.Series(dtype=float)
+    worked_count = pd.Series(dtype=float)
+    last_worked = pd.Series(dtype=float)      # before each worker's window
+    emitted: set[int] = set()
+
+    def _emit(rows: pd.DataFrame):
+        if rows.empty:
+            return
+        ids = rows["worker_id"].unique()
+        means = worked_sum.reindex(ids) / worked_count.reindex(ids).replace(0, np.nan)
+        engineered = _engineer_features(rows.copy(), worker_means=means,
+                                        last_earnings=last_worked)
+        last_rows = engineered.groupby("worker_id").tail(1)
+        results = _predict_last_rows(last_rows, earnings_model)
+        emitted.update(r["worker_id"] for r in results)
+        yield "".join(json.dumps(r) + "\n" for r in results)
+
+    try:
+        reader = pd.read_csv(
+            fileobj, usecols=REQUIRED_CSV_COLS, chunksize=STREAM_CHUNK_ROWS
+        )
+        for chunk in reader:
+            chunk["date"] = pd.to_datetime(chunk["date"])
+
+            if grouped:
+                seen_again = emitted.intersection(chunk["worker_id"].unique().tolist())
+                if seen_again:
+                    raise ValueError(
+                        f"worker_id {min(seen_again)} reappeared after its rows "
+                        "ended — the file is not grouped by worker"
+                    )
+
+            worked = chunk["net_earnings"].where(chunk["worked"] == 1)
+            by_worker = worked.groupby(chunk["worker_id"])
+            worked_sum = worked_sum.add(by_worker.sum(), fill_value=0)
+            worked_count = worked_count.add(by_worker.count(), fill_value=0)
+
+            window = chunk if window is None else pd.concat([window, chunk])
+            window = window.sort_values(["worker_id", "date"])
+            from_end = window.groupby("worker_id").cumcount(ascending=False)
+            dropped = window[from_end >= STREAM_WINDOW_ROWS]
+            if not dropped.empty:
+                dropped_worked = dropped["net_earnings"].where(dropped["worked"] == 1)
+                last_worked = (
+                    dropped_worked.groupby(dropped["worker_id"]).last()
+                    .combine_first(last_worked)
+                )
+            window = window[from_end < STREAM_WINDOW_ROWS]
+
+            if grouped:
+                done = window["worker_id"] != chunk["worker_id"].iloc[-1]
+                yield from _emit(window[done])
+                finished = window.loc[done, "worker_id"].unique()
+                worked_sum = worked_sum.drop(finished)
+                worked_count = worked_count.drop(finished)
+                last_worked = last_worked.drop(finished, errors="ignore")
+                window = window[~done]
+
+        if window is not None:
+            yield from _emit(window)
+        logger.info("Streaming predictions complete for %d workers", len(emitted))
+
+    except Exception as exc:
+        # Headers are already sent — report the failure in-band.
+        logger.error("Streaming prediction failed: %s", exc)
+        yield json.dumps({"error": str(exc)}) + "\n"
+
+
+async def _iterate_on_pool(gen):
+    """Drive a blocking generator from the thread pool, one item at a time."""
+    done = object()
+    while True:
+        item = await run_in_thread(next, gen, done)
+        if item is done:
+            return
+        yield item
 
 
 # ═══════════════════════════════════════════════════════════════
 #  Endpoints
 # ═══════════════════════════════════════════════════════════════
 @router.post("/earnings")
-async def predict_earnings(file: UploadFile = File(...)):
+async def predict_earnings(
+    file: UploadFile = File(...),
+    stream: bool = False,
+    grouped: bool = False,
+    horizon: int | None = Query(None, ge=1, le=FORECAST_MAX_HORIZON),
+):
     """
     Accept a CSV with raw platform earnings data, run the full
     feature-engineering pipeline, and return tomorrow's predicted
-    earnings for every worker in the file.
+    earnings for every worker in the file — the model's output for
+    each worker's last row, from that row's own features.
+
+    ``stream=true`` parses the upload in chunks and returns NDJSON (one
+    prediction per line); add ``grouped=true`` when rows are contiguous
+    per worker to get each worker's line as soon as its rows end.
+
+    ``horizon=N`` (up to 7) returns an outlook instead: per worker, the
+    N days after their last row, with per-day lists of predictions.  Its
+    day 1 is the day after the last row (assumed worked, inputs carried
+    forward) — the forecast ``GET /predict/earnings/{user_id}`` serves.
     """
     from main import earnings_model          # singleton loaded at startup
 
     if not earnings_model.is_loaded:
         raise HTTPException(503, "Earnings model is not loaded")
 
+    if stream and horizon is not None:
+        raise HTTPException(400, "horizon is not supported with stream=true")
+
+    if stream:
+        try:
+            missing = await run_in_thread(_missing_csv_columns, file.file)
+        except Exception as exc:
+            logger.error("CSV parse error: %s", exc)
+            raise HTTPException(400, f"Invalid CSV: {exc}")
+        if missing:
+            raise HTTPException(400, f"Missing columns: {sorted(missing)}")
+        return StreamingResponse(
+            _iterate_on_pool(
+                _stream_predictions(file.file, earnings_model, grouped=grouped)
+            ),
+            media_type="application/x-ndjson",
+        )
+
     # ── 1. Read CSV ──────────────────────────────────────────────
     try:
         raw = await file.read()
-        df = pd.read_csv(io.BytesIO(raw))
+        df = await run_in_thread(pd.read_csv, io.BytesIO(raw))
         logger.info("CSV received — %d rows, columns: %s", len(df), list(df.columns))
     except Exception as exc:
         logger.error("CSV parse error: %s", exc)
@@ -127,53 +453,228 @@ async def predict_earnings(file: UploadFile = File(...)):
 
     # ── 2. Feature engineering (Steps 1-2) ───────────────────────
     try:
-        df = _engineer_features(df)
+        df = await run_in_process(_engineer_features, df)
         logger.info("Feature engineering done — %d rows", len(df))
     except Exception as exc:
         logger.error("Feature engineering failed: %s", exc)
         raise HTTPException(500, f"Feature engineering error: {exc}")
 
+    if horizon is not None:
+        try:
+            results = await run_in_thread(_forecast_horizon, df, earnings_model, horizon)
+        except Exception as exc:
+            logger.error("Multi-horizon forecast failed: %s", exc)
+            raise HTTPException(500, f"Prediction error: {exc}")
+        logger.info("%d-day outlook complete for %d workers", horizon, len(results))
+        return results
+
     # ── 3. Take only the LAST row per worker ─────────────────────
-    last_rows = df.groupby("worker_id").tail(1).copy()
+    last_rows = df.groupby("worker_id").tail(1)
     logger.info("Predicting for %d workers", len(last_rows))
 
-    # ── 4. Save unscaled prev_30day_avg for confidence calc ──────
-    unscaled_prev30 = last_rows.set_index("worker_id")["prev_30day_avg"].to_dict()
+    # ── 4-6. Scale + predict ─────────────────────────────────────
+    results = await run_in_thread(_predict_last_rows, last_rows, earnings_model)
+
+    logger.info("Predictions complete for %d workers", len(results))
+    return results
+
+
+@router.post("/earnings/features", response_model=EarningsPrediction)
+async def predict_earnings_features(features: EarningsFeatures):
+    """
+    Predict for a single worker from precomputed features.
+
+    Concurrent calls are coalesced by the micro-batcher into one
+    vectorized ``EarningsModel.predict_batch`` call.
+    """
+    from main import earnings_model, earnings_batcher
+
+    if not earnings_model.is_loaded:
+        raise HTTPException(503, "Earnings model is not loaded")
+
+    return await earnings_batcher.submit(features.model_dump())
+
+
+# ═══════════════════════════════════════════════════════════════
+#  Feature store upkeep
+# ═══════════════════════════════════════════════════════════════
+async def _rebuild_feature_state(user_id: str, extra_days: list[dict] = ()):
+    """
+    Rebuild a worker's rolling state from forecast_data, with ``extra_days``
+    overriding stored rows of the same date (they may not be committed yet).
+    Nothing is stored when forecast_data cannot be read.
+    """
+    from main import feature_store
 
-    # ── 5. Scale continuous features (Step 3) ────────────────────
     try:
-        last_rows[SCALER_COLS] = earnings_model._scaler.transform(
-            last_rows[SCALER_COLS].values
-        )
+        stored = await get_forecast_history(user_id)
     except Exception as exc:
-        logger.error("Scaling failed: %s", exc)
-        raise HTTPException(500, f"Scaling error: {exc}")
+        logger.error("Feature store rebuild failed for %s: %s", user_id, exc)
+        raise HTTPException(503, "Forecast history is unavailable")
 
-    # ── 6. Predict ───────────────────────────────────────────────
-    results = []
-    feature_matrix = last_rows[MODEL_FEATURE_ORDER].values
-    worker_ids = last_rows["worker_id"].values
+    by_date = {str(row["date"])[:10]: row for row in stored}
+    for day in extra_days:
+        by_date[str(day["date"])[:10]] = day
+    history = [by_date[d] for d in sorted(by_date)]
+    return await run_in_thread(feature_store.rebuild, user_id, history)
 
-    predictions = earnings_model._model.predict(feature_matrix)
 
-    for wid, pred in zip(worker_ids, predictions):
-        predicted_paise = max(0, int(round(pred)))
-        predicted_rupees = round(predicted_paise / 100, 2)
-        confidence = earnings_model._compute_confidence(
-            predicted_paise, unscaled_prev30.get(int(wid), 0)
-        )
-        results.append({
-            "worker_id": int(wid),
-            "predicted_earnings_paise": predicted_paise,
-            "predicted_earnings_rupees": predicted_rupees,
-            "confidence": confidence,
-        })
+async def _update_feature_state(user_id: str, days: list[dict]):
+    """
+    O(1)-per-day append for a worker whose state is current; a full
+    rebuild for workers not in the store (never built, or expired) or for
+    days that are not after the latest stored one (backfills, corrections).
+    """
+    from main import feature_store
 
-    logger.info("Predictions complete for %d workers", len(results))
-    return results
+    days = sorted(days, key=lambda d: d["date"])
+    try:
+        return await run_in_thread(feature_store.append, user_id, days)
+    except (MissingState, OutOfOrderDay):
+        return await _rebuild_feature_state(user_id, days)
+
+
+@router.post("/earnings/{user_id}/days", response_model=FeatureStoreState)
+async def append_earnings_days(user_id: str, days: list[EarningsDay]):
+    """Record new forecast_data days for a worker and return their updated lags."""
+    if not days:
+        raise HTTPException(400, "No days supplied")
+    state = await _update_feature_state(user_id, [d.model_dump() for d in days])
+    return FeatureStoreState(
+        user_id=user_id,
+        days_on_record=state.n_days,
+        last_date=state.last_day["date"] if state.last_day else None,
+        features=state.next_lag_features(),
+    )
 
 
 @router.get("/earnings/health")
 async def earnings_health():
     from main import earnings_model
     return {"status": "ok", "model_loaded": earnings_model.is_loaded}
+
+
+# ═══════════════════════════════════════════════════════════════
+#  Online prediction from the feature store
+# ═══════════════════════════════════════════════════════════════
+def _calendar_flags(day: date) -> dict:
+    """Date-derived features, as ``_engineer_features`` computes them."""
+    return {
+        "is_weekend": int(day.weekday() >= 5),
+        "is_holiday": int(day.isoformat() in INDIAN_HOLIDAYS_2023),
+        "is_month_end": int(day.day >= 28),
+    }
+
+
+def _forecast_date(state: RollingEarnings) -> date:
+    return date.fromisoformat(state.last_day["date"]) + timedelta(days=1)
+
+
+def _stored_features(state: RollingEarnings) -> dict:
+    """
+    The 13 model features of the day after a worker's latest day, as
+    ``_forecast_horizon`` builds day 1: assumed worked, the latest day's
+    other inputs carried forward, the next day's calendar flags and lags.
+    """
+    day = state.last_day
+    return {
+        **{col: day[col] for col in DAY_COLS if col not in ("worked", "net_earnings")},
+        "worked": 1,
+        **_calendar_flags(_forecast_date(state)),
+        **state.next_lag_features(),
+    }
+
+
+async def _load_feature_states(user_ids: list[str]) -> list[RollingEarnings | None]:
+    """
+    Stored states in one MGET; workers not in the store are rebuilt from
+    one bulk forecast_data query and written back.  None = no data.
+    """
+    from main import feature_store
+
+    states = await run_in_thread(feature_store.get_many, user_ids)
+    cold = [uid for uid, state in zip(user_ids, states) if state is None]
+    if not cold:
+        return states
+
+    try:
+        history = await get_forecast_bulk(cold)
+    except Exception as exc:
+        logger.error("Feature store rebuild failed: %s", exc)
+        raise HTTPException(503, "Forecast history is unavailable")
+
+    rebuilt = {}
+    for uid in history.user_ids:
+        columns = history.user(uid)
+        if len(columns["date"]):
+            rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+            rebuilt[uid] = RollingEarnings.from_days(rows)
+    if rebuilt:
+        await run_in_thread(feature_store.put_many, rebuilt)
+        logger.info("Feature store: rebuilt %d of %d cold workers", len(rebuilt), len(cold))
+    return [state if state is not None else rebuilt.get(uid)
+            for uid, state in zip(user_ids, states)]
+
+
+def _predict_feature_rows(rows: list[dict], earnings_model) -> list[dict]:
+    """One ``predict_matrix`` call over many workers' feature dicts."""
+    matrix = np.array([[row[col] for col in MODEL_FEATURE_ORDER] for row in rows],
+                      dtype=np.float64)
+    predictions = earnings_model.predict_matrix(matrix)
+    return [_format_prediction(pred, row["prev_30day_avg"], earnings_model)
+            for pred, row in zip(predictions, rows)]
+
+
+# Declared after /earnings/health so the literal path wins.
+@router.get("/earnings/{user_id}", response_model=UserEarningsPrediction)
+async def predict_user_earnings(user_id: str):
+    """
+    Next-day forecast for one worker: one feature-store lookup and one
+    (micro-batched) model call.  Workers not in the store yet are built
+    from forecast_data on first request.
+    """
+    from main import earnings_model, earnings_batcher
+
+    if not earnings_model.is_loaded:
+        raise HTTPException(503, "Earnings model is not loaded")
+
+    state = (await _load_feature_states([user_id]))[0]
+    if state is None:
+        raise HTTPException(404, f"No forecast data for user {user_id}")
+
+    prediction = await earnings_batcher.submit(_stored_features(state))
+    return UserEarningsPrediction(user_id=user_id, as_of=state.last_day["date"],
+                                  forecast_date=_forecast_date(state), **prediction)
+
+
+@router.post("/earnings/users", response_model=EarningsUsersResponse)
+async def predict_users_earnings(body: EarningsUsersRequest):
+    """Next-day forecasts for many workers: one MGET and one model call."""
+    from main import earnings_model
+
+    if not earnings_model.is_loaded:
+        raise HTTPException(503, "Earnings model is not loaded")
+
+    user_ids = list(dict.fromkeys(body.user_ids))
+    states = await _load_feature_states(user_ids)
+    found = [(uid, state) for uid, state in zip(user_ids, states) if state is not None]
+    missing = [uid for uid, state in zip(user_ids, states) if state is None]
+    if not found:
+        return EarningsUsersResponse(predictions=[], missing=missing)
+
+    try:
+        predictions = await run_in_thread(
+            _predict_feature_rows, [_stored_features(state) for _, state in found], earnings_model,
+        )
+    except Exception as exc:
+        logger.error("Prediction failed: %s", exc)
+        raise HTTPException(500, f"Prediction error: {exc}")
+
+    return EarningsUsersResponse(
+        predictions=[
+            UserEarningsPrediction(user_id=uid, as_of=state.last_day["date"],
+                                   forecast_date=_forecast_date(state), **pred)
+            for (uid, state), pred in zip(found, predictions)
+        ],
+        missing=missing,
+    )
@@ -20,7 +20,9 @@ from schemas.sms_schema import (
     SmsClassifyRequest,
     SmsClassifyResponse,
     ClassifiedExpense,
+    SmsMessage,
 )
+from utils.executors import run_in_thread
 
 logger = logging.getLogger(__name__)
 
@@ -33,33 +35,17 @@ def _get_classifier():
     return sms_classifier
 
 
-# ── POST /sms/classify ─────────────────────────────────────────
-@router.post("/classify", response_model=SmsClassifyResponse)
-async def classify_sms(payload: SmsClassifyRequest):
-    """
-    Classify a batch of SMS messages into expense categories.
-
-    Pipeline per message:
-      1. TF-IDF vectorise → LogisticRegression predict_proba
-      2. If confidence ≥ 0.50 → use model category, else regex fallback
-      3. Regex-extract amount (₹ / Rs.) and merchant ("at …" / "to …")
-      4. Mark fuel/toll/maintenance as tax-deductible
-      5. Filter out "not_expense" (OTPs, salary credits, balance alerts)
-    """
-    classifier = _get_classifier()
-    if not classifier.is_loaded:
-        raise HTTPException(
-            status_code=503,
-            detail="SMS classifier model not loaded — check ML_MODELS_PATH",
-        )
-
+def _classify_messages(
+    classifier, messages: list[SmsMessage]
+) -> tuple[list[ClassifiedExpense], int]:
+    """Blocking part of /sms/classify — runs on the executor thread pool."""
     classified: list[ClassifiedExpense] = []
     total_skipped = 0
 
-    for msg in payload.messages:
-        try:
-            result = classifier.classify(msg.body)
+    results = classifier.classify_batch([msg.body for msg in messages])
 
+    for msg, result in zip(messages, results):
+        try:
             # Skip non-expense classifications (OTPs, balance alerts, etc.)
             if result["category"] in ("not_expense", "no_expense"):
                 total_skipped += 1
@@ -85,6 +71,33 @@ async def classify_sms(payload: SmsClassifyRequest):
             logger.error("Failed to classify SMS: %s — %s", msg.body[:50], exc)
             total_skipped += 1
 
+    return classified, total_skipped
+
+
+# ── POST /sms/classify ─────────────────────────────────────────
+@router.post("/classify", response_model=SmsClassifyResponse)
+async def classify_sms(payload: SmsClassifyRequest):
+    """
+    Classify a batch of SMS messages into expense categories.
+
+    Pipeline per message:
+      1. TF-IDF vectorise → LogisticRegression predict_proba
+      2. If confidence ≥ 0.50 → use model category, else regex fallback
+      3. Regex-extract amount (₹ / Rs.) and merchant ("at …" / "to …")
+      4. Mark fuel/toll/maintenance as tax-deductible
+      5. Filter out "not_expense" (OTPs, salary credits, balance alerts)
+    """
+    classifier = _get_classifier()
+    if not classifier.is_loaded:
+        raise HTTPException(
+            status_code=503,
+            detail="SMS classifier model not loaded — check ML_MODELS_PATH",
+        )
+
+    classified, total_skipped = await run_in_thread(
+        _classify_messages, classifier, payload.messages
+    )
+
     logger.info(
         "SMS classification complete — received=%d, classified=%d, skipped=%d",
         len(payload.messages),
@@ -103,7 +116,10 @@ async def classify_sms(payload: SmsClassifyRequest):
 # ── GET /sms/classify/health ───────────────────────────────────
 @router.get("/classify/health")
 async def sms_health():
+    classifier = _get_classifier()
     return {
         "status": "ok",
-        "model_loaded": _get_classifier().is_loaded,
+        "model_loaded": classifier.is_loaded,
+        "cache": classifier.cache_stats(),
+        "templates": classifier.template_stats(),
     }
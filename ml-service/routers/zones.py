@@ -1,53 +1,199 @@
 """
 Zone discovery router — serves DBSCAN cluster results.
 
-GET /zones/current → cached or live cluster data
-GET /zones/health  → connectivity check
+GET /zones/current?city= → cached or live cluster data (default: mumbai)
+GET /zones/nearby?lat=&lng=&k=&city= → k best zones near a rider
+GET /zones/health?city=  → connectivity check
+
+Clustering runs on the city's executor shard, so each city keeps its
+incremental state in one process and cities cluster in parallel.  Every
+result that reaches this process (fresh run or cache read) is published
+as the city's last-known-good copy.  Results carry scores for every time
+block; the block current at read time is selected per request, and the
+city's ``ZoneIndex`` for /zones/nearby is rebuilt when either the result
+or the block changes.
+
+Serving order for a city's zones:
+  1. in-process last-known-good result, if younger than ZONES_FRESH_SECONDS
+  2. Redis (kept for ZONES_CACHE_TTL, so it may be stale)
+  3. a stale result is served at once while one background refresh runs
+  4. nothing at all → wait for a refresh
+Refreshes are single-flight per city: concurrent misses, stale hits and
+the scheduler job all share one clustering run.
 """
 
+import asyncio
+import functools
 import json
 import logging
 import os
+from datetime import datetime, timezone
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 
-from zone_clustering import run_clustering, _get_redis
-from utils.db import get_engine
+from zone_clustering import (
+    DEFAULT_CITY,
+    CityConfig,
+    _get_redis,
+    cache_keys,
+    current_time_block,
+    get_city,
+    run_clustering,
+    select_time_block,
+)
+from models.zone_index import ZoneIndex
+from utils.db import fetch_scalar
+from utils.executors import run_in_shard, run_in_thread
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/zones", tags=["zones"])
 
+# Distance over which a zone's score decays by 1/e outside its radius
+ZONES_NEARBY_DISTANCE_KM = float(os.getenv("ZONES_NEARBY_DISTANCE_KM", "2.0"))
+# Results older than this are served stale and refreshed in the background
+ZONES_FRESH_SECONDS = float(os.getenv("ZONES_FRESH_SECONDS", "300"))
+
+# city → last-known-good result, and the index over it
+_latest: dict[str, dict] = {}
+_indexes: dict[str, ZoneIndex] = {}
+# city → the one clustering run in flight
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def _age_s(result: dict) -> float:
+    try:
+        generated = datetime.fromisoformat(result["generated_at"])
+    except (KeyError, TypeError, ValueError):
+        return float("inf")
+    return (datetime.now(timezone.utc) - generated).total_seconds()
+
+
+def _publish(result: dict) -> None:
+    """Keep ``result`` as last-known-good and re-index it, if it is newer."""
+    city = result.get("city", DEFAULT_CITY)
+    current = _latest.get(city)
+    # generated_at is always UTC isoformat, so strings order like times
+    if current is not None and current.get("generated_at", "") >= result.get("generated_at", ""):
+        return
+    _latest[city] = result
+
+
+def _index_for(city: str) -> ZoneIndex:
+    """The nearby-zone index over the city's latest result, in the current block."""
+    result = _latest[city]
+    block = current_time_block()
+    index = _indexes.get(city)
+    if index is None or index.generated_at != result.get("generated_at") or index.time_block != block:
+        index = _indexes[city] = ZoneIndex(
+            select_time_block(result), distance_scale_km=ZONES_NEARBY_DISTANCE_KM
+        )
+    return index
+
+
+async def _refresh(city: str, full_refit: bool) -> dict:
+    result = await run_in_shard(city, run_clustering, city, full_refit)
+    _publish(result)
+    return result
+
+
+def _refresh_done(city: str, task: asyncio.Task) -> None:
+    if _inflight.get(city) is task:
+        del _inflight[city]
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Zone clustering for %s failed: %s", city, task.exception())
+
+
+def _start_refresh(city: str, full_refit: bool = False) -> asyncio.Task:
+    """Start a clustering run for ``city`` unless one is already in flight."""
+    task = _inflight.get(city)
+    if task is None:
+        task = asyncio.get_running_loop().create_task(_refresh(city, full_refit))
+        _inflight[city] = task
+        task.add_done_callback(functools.partial(_refresh_done, city))
+    return task
+
+
+async def refresh_zones(city: str = DEFAULT_CITY, full_refit: bool = False) -> dict:
+    """
+    Cluster one city on its shard (used by the per-city scheduler jobs).
+    Joins the run already in flight for the city, if any.
+    """
+    # shield: a caller going away must not cancel the run others wait on
+    return await asyncio.shield(_start_refresh(city, full_refit))
+
+
+async def _current_zones(city: str) -> dict:
+    """The city's latest result — see the module docstring for the order."""
+    local = _latest.get(city)
+    if local is not None and _age_s(local) <= ZONES_FRESH_SECONDS:
+        return local
+
+    try:
+        cached = await run_in_thread(_read_cached_clusters, city)
+        if cached:
+            _publish(json.loads(cached))
+    except Exception as exc:
+        logger.warning("Redis read failed: %s", exc)
+
+    latest = _latest.get(city)
+    if latest is None:
+        logger.info("No zones for %s yet — running live clustering", city)
+        return await refresh_zones(city)
+    if _age_s(latest) > ZONES_FRESH_SECONDS:
+        logger.info("Serving stale %s zones while refreshing", city)
+        _start_refresh(city)
+    return latest
+
+
+def _resolve_city(name: str) -> CityConfig:
+    try:
+        return get_city(name)
+    except KeyError:
+        raise HTTPException(404, f"Unknown city: {name}")
+
+
+async def _count_points(table: str) -> int:
+    return int(await fetch_scalar(f"SELECT COUNT(*) FROM {table}") or 0)
+
+
+def _ping_redis() -> bool:
+    r = _get_redis()
+    if r:
+        r.ping()
+        return True
+    return False
+
+
+def _read_cached_clusters(city: str) -> str | None:
+    r = _get_redis()
+    return r.get(cache_keys(city)[0]) if r else None
+
 
 @router.get("/health")
-async def zones_health():
-    """Check Redis, DB, and point count."""
+async def zones_health(city: str = DEFAULT_CITY):
+    """Check Redis, DB, and the city's point count."""
+    city = _resolve_city(city)
     redis_ok = False
     db_ok = False
     point_count = 0
 
     # Redis check
     try:
-        r = _get_redis()
-        if r:
-            r.ping()
-            redis_ok = True
+        redis_ok = await run_in_thread(_ping_redis)
     except Exception:
         pass
 
     # DB check
     try:
-        engine = get_engine()
-        from sqlalchemy import text
-        with engine.connect() as conn:
-            row = conn.execute(text("SELECT COUNT(*) FROM mumbai_gps_points")).fetchone()
-            point_count = row[0] if row else 0
-            db_ok = True
+        point_count = await _count_points(city.table)
+        db_ok = True
     except Exception as exc:
         logger.warning("DB health check failed: %s", exc)
 
     return {
         "status": "ok",
+        "city": city.name,
         "redis_connected": redis_ok,
         "db_connected": db_ok,
         "point_count": point_count,
@@ -55,24 +201,38 @@ async def zones_health():
 
 
 @router.get("/current")
-async def zones_current():
+async def zones_current(city: str = DEFAULT_CITY):
     """
-    Return current cluster data.
-    1. Try Redis cache
-    2. Cache miss → run clustering live
+    Return current cluster data for ``city``: fresh from memory or Redis,
+    stale while a refresh runs, or live on the very first call.
     """
-    # Try Redis cache first
-    try:
-        r = _get_redis()
-        if r:
-            cached = r.get("zones:clusters:current")
-            if cached:
-                logger.info("Serving zones from Redis cache")
-                return json.loads(cached)
-    except Exception as exc:
-        logger.warning("Redis read failed: %s", exc)
+    city = _resolve_city(city)
+    return select_time_block(await _current_zones(city.name))
 
-    # Cache miss — run clustering
-    logger.info("Cache miss — running live clustering")
-    result = run_clustering()
-    return result
+
+@router.get("/nearby")
+async def zones_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(5, ge=1, le=50),
+    city: str = DEFAULT_CITY,
+):
+    """
+    Return the ``k`` best zones for a rider at (lat, lng), ranked by score
+    discounted with the distance to each zone.  Served from the in-memory
+    index; a missing or stale index takes the /zones/current path.
+    """
+    city = _resolve_city(city)
+    latest = _latest.get(city.name)
+    if latest is None or _age_s(latest) > ZONES_FRESH_SECONDS:
+        await _current_zones(city.name)
+    index = _index_for(city.name)
+
+    return {
+        "city": city.name,
+        "lat": lat,
+        "lng": lng,
+        "zones": index.nearby(lat, lng, k),
+        "time_block": index.time_block,
+        "generated_at": index.generated_at,
+    }
@@ -0,0 +1,74 @@
+"""Pydantic request / response schemas for the earnings prediction endpoints."""
+
+import datetime as dt
+
+from pydantic import BaseModel, Field
+
+
+class EarningsFeatures(BaseModel):
+    """One worker's 13 unscaled model features (see MODEL_FEATURE_ORDER)."""
+    worked: int = Field(..., ge=0, le=1)
+    rainfall_mm: float
+    temp_celsius: float
+    average_rating: float
+    incentives_earned: float
+    efficiency_ratio: float
+    is_weekend: int = Field(..., ge=0, le=1)
+    is_holiday: int = Field(..., ge=0, le=1)
+    is_month_end: int = Field(..., ge=0, le=1)
+    prev_day_earnings: float
+    prev_7day_avg: float
+    prev_30day_avg: float
+    days_active_last_7: float = Field(..., ge=0, le=7)
+
+
+class EarningsPrediction(BaseModel):
+    """Predicted net earnings for one worker."""
+    predicted_earnings_paise: int
+    predicted_earnings_rupees: float
+    confidence: float
+
+
+class EarningsDay(BaseModel):
+    """One day of a worker's forecast_data — appended to the feature store."""
+    date: dt.date
+    worked: int = Field(..., ge=0, le=1)
+    rainfall_mm: float = 0.0
+    temp_celsius: float = 0.0
+    average_rating: float = 0.0
+    incentives_earned: float = 0.0
+    net_earnings: float = 0.0
+    efficiency_ratio: float = 0.0
+
+
+class FeatureStoreState(BaseModel):
+    """A worker's rolling lag features after an update — those of their next-day forecast."""
+    user_id: str
+    days_on_record: int
+    last_date: dt.date | None
+    features: dict[str, int]
+
+
+class UserEarningsPrediction(EarningsPrediction):
+    """
+    Forecast for ``forecast_date``, the day after the worker's latest
+    forecast_data day (``as_of``) — the same day, and number, as the CSV
+    route and its ``horizon`` day 1.
+    """
+    user_id: str
+    as_of: dt.date
+    forecast_date: dt.date
+
+
+class EarningsUsersRequest(BaseModel):
+    """Workers to forecast in one call (dashboard fan-out)."""
+    user_ids: list[str] = Field(
+        ..., min_length=1, max_length=1000,
+        description="Up to 1000 user ids",
+    )
+
+
+class EarningsUsersResponse(BaseModel):
+    """Forecasts in request order; users with no forecast data are listed in ``missing``."""
+    predictions: list[UserEarningsPrediction]
+    missing: list[str]
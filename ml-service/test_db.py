@@ -0,0 +1,61 @@
+"""
+Tests for utils/db.py — DATABASE_URL translation for the asyncpg engine.
+
+Run:  python -m pytest -q test_db.py
+"""
+
+from utils import db
+
+
+def test_async_url_maps_libpq_options_to_asyncpg():
+    url, connect_args = db._async_url(
+        "postgresql://u:p@ep-x.neon.tech/gigpay?sslmode=require&channel_binding=require"
+    )
+    assert url.drivername == "postgresql+asyncpg"
+    assert dict(url.query) == {}
+    assert url.database == "gigpay" and url.password == "p"
+    assert connect_args["ssl"] == "require"
+    assert connect_args["server_settings"] == {
+        "statement_timeout": str(db.DB_STATEMENT_TIMEOUT_MS)
+    }
+
+
+def test_async_url_leaves_non_postgres_urls_alone():
+    url, connect_args = db._async_url("sqlite+aiosqlite:///local.db")
+    assert url.drivername == "sqlite+aiosqlite"
+    assert connect_args == {}
+
+
+def test_rows_become_user_columns_in_request_order():
+    from datetime import date
+
+    import numpy as np
+
+    spec = {"date": "datetime64[D]", "amount": "float64",
+            "is_tax_deductible": "bool", "merchant": None}
+    # two cursor chunks, ordered by user_id then date as the query returns them
+    chunks = [
+        [("a", date(2026, 10, 1), 100, True, "HPCL"),
+         ("a", date(2026, 10, 3), None, None, None)],
+        [("c", date(2026, 10, 2), 50, False, "Zomato")],
+    ]
+    cols = db._to_user_columns(["c", "b", "a"], chunks, spec)
+
+    np.testing.assert_array_equal(cols.offsets, [0, 1, 1, 3])
+    assert cols.n_rows == 3
+    assert cols.user("b")["amount"].size == 0
+    a = cols.user("a")
+    np.testing.assert_array_equal(a["date"], np.array(["2026-10-01", "2026-10-03"],
+                                                      dtype="datetime64[D]"))
+    np.testing.assert_array_equal(a["amount"], [100.0, np.nan])
+    np.testing.assert_array_equal(a["is_tax_deductible"], [True, False])
+    assert list(a["merchant"]) == ["HPCL", None]
+
+    frame = cols.to_frame()
+    assert list(frame["user_id"]) == ["c", "a", "a"]
+    assert list(frame.columns) == ["user_id", *spec]
+
+
+def test_no_rows_gives_empty_columns():
+    cols = db._to_user_columns(["x"], [], {"amount": "float64"})
+    assert cols.n_rows == 0 and cols["amount"].dtype == "float64"
@@ -0,0 +1,140 @@
+"""
+Tests for models/earnings_model.py — fused scaler parity, batch predict
+and the micro-batcher in front of it.
+
+Run:  python -m pytest -q test_earnings_model.py
+"""
+
+import numpy as np
+import pytest
+
+from models.earnings_model import MODEL_FEATURE_ORDER, SCALER_COLS, EarningsModel
+
+
+@pytest.fixture(scope="module")
+def model():
+    m = EarningsModel()
+    m.load("./data/saved_models")
+    if not m.is_loaded:
+        pytest.skip("saved earnings model not loadable in this environment")
+    return m
+
+
+def _raw_rows(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    X = np.empty((n, len(MODEL_FEATURE_ORDER)))
+    for j, col in enumerate(MODEL_FEATURE_ORDER):
+        if col in SCALER_COLS:
+            X[:, j] = rng.normal(50_000, 40_000, n)
+        else:
+            X[:, j] = rng.integers(0, 2, n)
+    return X
+
+
+def test_predict_matrix_matches_scaler_transform(model):
+    X_raw = _raw_rows(300)
+
+    scaled = X_raw.copy()
+    idx = [MODEL_FEATURE_ORDER.index(c) for c in SCALER_COLS]
+    scaled[:, idx] = model._scaler.transform(X_raw[:, idx])
+
+    np.testing.assert_array_equal(
+        model.predict_matrix(X_raw), model._model.predict(scaled)
+    )
+
+
+def test_predict_uses_the_same_matrix_path(model):
+    X_raw = _raw_rows(5, seed=1)
+    expected = model.predict_matrix(X_raw)
+
+    for row, pred in zip(X_raw, expected):
+        result = model.predict(dict(zip(MODEL_FEATURE_ORDER, row)))
+        assert result["predicted_earnings_paise"] == max(0, int(round(pred)))
+
+
+def test_predict_batch_accepts_dicts_and_dataframes(model):
+    import pandas as pd
+
+    X_raw = _raw_rows(20, seed=2)
+    dicts = [dict(zip(MODEL_FEATURE_ORDER, row)) for row in X_raw]
+
+    from_dicts = model.predict_batch(dicts)
+    from_frame = model.predict_batch(pd.DataFrame(X_raw, columns=MODEL_FEATURE_ORDER))
+
+    assert from_dicts == from_frame == [model.predict(d) for d in dicts]
+
+
+def test_predict_batch_isolates_invalid_rows(model):
+    good = dict(zip(MODEL_FEATURE_ORDER, _raw_rows(1, seed=3)[0]))
+    results = model.predict_batch([good, {"worked": 1}, good])
+
+    assert results[0] == results[2] == model.predict(good)
+    assert results[1] == model._zero_result()
+
+
+def test_micro_batcher_coalesces_concurrent_requests(model):
+    import asyncio
+
+    from utils.micro_batcher import MicroBatcher
+
+    rows = [dict(zip(MODEL_FEATURE_ORDER, r)) for r in _raw_rows(50, seed=4)]
+    batcher = MicroBatcher(model.predict_batch, max_batch_size=20, max_delay_ms=50)
+
+    async def _run():
+        return await asyncio.gather(*(batcher.submit(r) for r in rows))
+
+    results = asyncio.run(_run())
+
+    assert results == model.predict_batch(rows)
+    stats = batcher.stats()
+    assert stats["items"] == 50
+    assert stats["batches"] == 3            # 20 + 20 on size, 10 on timeout
+
+
+def test_micro_batcher_keeps_in_flight_batches_until_close():
+    import asyncio
+    import gc
+    import threading
+
+    from utils.micro_batcher import MicroBatcher
+
+    release = threading.Event()
+
+    def slow_double(items):
+        release.wait(5)
+        return [2 * x for x in items]
+
+    batcher = MicroBatcher(slow_double, max_batch_size=2, max_delay_ms=1000)
+
+    async def scenario():
+        callers = [asyncio.ensure_future(batcher.submit(x)) for x in (1, 2, 3)]
+        await asyncio.sleep(0.05)
+        gc.collect()                        # the size-flushed batch must survive
+        assert len(batcher._tasks) == 1
+        release.set()
+        await batcher.close()               # flushes 3 without waiting for the timer
+        assert not batcher._tasks
+        return await asyncio.gather(*callers)
+
+    assert asyncio.run(scenario()) == [2, 4, 6]
+
+
+def test_micro_batcher_close_cancels_stuck_batches():
+    import asyncio
+    import threading
+
+    from utils.micro_batcher import MicroBatcher
+
+    release = threading.Event()
+    batcher = MicroBatcher(lambda items: release.wait(5) and items, max_batch_size=1)
+
+    async def scenario():
+        caller = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0.05)
+        await batcher.close(timeout_s=0.05)
+        release.set()
+        return await asyncio.gather(caller, return_exceptions=True)
+
+    (result,) = asyncio.run(scenario())
+    assert isinstance(result, asyncio.CancelledError)
+    assert not batcher._tasks
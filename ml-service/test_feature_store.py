@@ -0,0 +1,288 @@
+"""
+Tests for utils/feature_store.py — the O(1) rolling state against the
+batch ``_engineer_features`` pipeline, serialisation, the append /
+rebuild paths of the feature-store route, and the online per-user
+prediction routes against the CSV path.
+
+Run:  python -m pytest -q test_feature_store.py
+"""
+
+import asyncio
+import io
+import json
+import sys
+import types
+
+import pandas as pd
+import pytest
+
+import routers.predict as predict
+from models.earnings_model import EarningsModel
+from routers.predict import MODEL_FEATURE_ORDER, _engineer_features, _forecast_horizon
+from test_features import _synthetic_csv
+from utils.db import FORECAST_BULK_COLUMNS, _to_user_columns
+from utils.micro_batcher import MicroBatcher
+from utils.feature_store import (
+    LAG_COLS,
+    EarningsFeatureStore,
+    MissingState,
+    OutOfOrderDay,
+    RollingEarnings,
+)
+
+
+def _days_of(frame: pd.DataFrame) -> list[dict]:
+    return frame.sort_values("date").to_dict("records")
+
+
+@pytest.mark.parametrize("n_workers,n_days,seed", [(6, 75, 0), (3, 12, 1)])
+def test_rolling_state_matches_engineer_features(n_workers, n_days, seed):
+    frame = _synthetic_csv(n_workers, n_days, seed)
+    # a worker with a few idle days before ever working
+    first_days = (frame["worker_id"] == 1) & (frame["date"] < "2023-10-04")
+    frame.loc[first_days, "worked"] = 0
+
+    for cutoff in sorted({1, 2, 8, 31, n_days // 2, n_days}):
+        if cutoff > n_days:
+            continue
+        dates = sorted(frame["date"].unique())[:cutoff]
+        prefix = frame[frame["date"].isin(dates)]
+        expected = (
+            _engineer_features(prefix.copy())
+            .groupby("worker_id").tail(1).set_index("worker_id")
+        )
+        for wid, rows in prefix.groupby("worker_id"):
+            state = RollingEarnings.from_days(_days_of(rows))
+            assert state.lag_features() == {c: int(expected.loc[wid, c]) for c in LAG_COLS}, \
+                (wid, cutoff)
+
+
+def test_next_lag_features_are_those_of_the_following_day():
+    frame = _synthetic_csv(4, 40, 3)
+    expected = _engineer_features(frame.copy())
+    for wid, rows in frame.groupby("worker_id"):
+        days = _days_of(rows)
+        # lags of day 40 from 39 days of history, with the worker mean of all 40
+        state = RollingEarnings.from_days(days[:-1])
+        full = RollingEarnings.from_days(days)
+        state.total_sum, state.total_count = full.total_sum, full.total_count
+        last = expected[expected["worker_id"] == wid].iloc[-1]
+        assert state.next_lag_features() == {c: int(last[c]) for c in LAG_COLS}
+
+
+def test_state_survives_json_round_trip_and_keeps_updating():
+    days = _days_of(_synthetic_csv(1, 50, 4))
+    state = RollingEarnings.from_days(days[:30])
+    restored = RollingEarnings.from_dict(json.loads(json.dumps(state.to_dict())))
+    for day in days[30:]:
+        restored.push(day)
+    assert restored.lag_features() == RollingEarnings.from_days(days).lag_features()
+
+
+def test_store_appends_in_order_and_rejects_backfills():
+    store = EarningsFeatureStore(redis_getter=lambda: None)
+    days = _days_of(_synthetic_csv(1, 20, 5))
+
+    assert store.get("u1") is None
+    with pytest.raises(MissingState):         # never an append onto an empty state
+        store.append("u1", days[10:])
+    store.rebuild("u1", days[:10])
+    store.append("u1", days[10:])
+    assert store.get("u1").lag_features() == RollingEarnings.from_days(days).lag_features()
+
+    with pytest.raises(OutOfOrderDay):
+        store.append("u1", [{**days[-1], "date": "2023-10-25"}, days[5]])
+    assert store.get("u1").n_days == 20      # failed append left the state untouched
+    assert store.get_many(["u1", "nobody"])[1] is None
+
+
+@pytest.fixture
+def feature_route(monkeypatch):
+    """The route with an in-process store and forecast_data served from a list."""
+    store = EarningsFeatureStore(redis_getter=lambda: None)
+    monkeypatch.setitem(sys.modules, "main", types.SimpleNamespace(feature_store=store))
+    history = {"rows": [], "fetches": 0, "error": None}
+
+    async def fake_history(user_id):
+        history["fetches"] += 1
+        if history["error"]:
+            raise history["error"]
+        return list(history["rows"])
+
+    monkeypatch.setattr(predict, "get_forecast_history", fake_history)
+    return store, history
+
+
+def test_route_rebuilds_cold_workers_then_appends(feature_route):
+    store, history = feature_route
+    days = _days_of(_synthetic_csv(1, 40, 6))
+    history["rows"] = days[:35]
+    body = [predict.EarningsDay(**{k: d[k] for k in predict.EarningsDay.model_fields})
+            for d in days[35:]]
+
+    # not in the store yet → rebuilt from forecast_data plus the posted days
+    first = asyncio.run(predict.append_earnings_days("u1", body[:3]))
+    assert history["fetches"] == 1
+    assert first.days_on_record == 38
+
+    # in the store → O(1) append, no history read
+    second = asyncio.run(predict.append_earnings_days("u1", body[3:]))
+    assert history["fetches"] == 1
+    assert second.features == RollingEarnings.from_days(days).next_lag_features()
+
+    # a correction to an earlier day → rebuilt from the (now complete) table
+    history["rows"] = days
+    asyncio.run(predict.append_earnings_days("u1", body[:1]))
+    assert history["fetches"] == 2
+    assert store.get("u1").n_days == 40
+
+    # the state expired between requests → rebuilt, not restarted from the new day
+    del store._local["u1"]
+    history["rows"] = days[:-1]
+    asyncio.run(predict.append_earnings_days("u1", body[-1:]))
+    assert history["fetches"] == 3
+    assert store.get("u1").n_days == 40
+
+
+def test_route_stores_nothing_when_history_is_unavailable(feature_route):
+    store, history = feature_route
+    days = _days_of(_synthetic_csv(1, 40, 6))
+    history["rows"] = days[:35]
+    body = [predict.EarningsDay(**{k: d[k] for k in predict.EarningsDay.model_fields})
+            for d in days[35:]]
+    history["error"] = ConnectionError("database is down")
+
+    # a cold worker is not cached with only the posted days
+    with pytest.raises(predict.HTTPException) as err:
+        asyncio.run(predict.append_earnings_days("u1", body[:3]))
+    assert err.value.status_code == 503
+    assert store.get("u1") is None
+
+    # nor is a warm worker's state replaced on a correction
+    history["error"] = None
+    asyncio.run(predict.append_earnings_days("u1", body[:3]))
+    history["error"] = ConnectionError("database is down")
+    with pytest.raises(predict.HTTPException):
+        asyncio.run(predict.append_earnings_days("u1", body[:1]))
+    assert store.get("u1").n_days == 38
+
+
+# ── online prediction routes ────────────────────────────────────
+@pytest.fixture
+def online(monkeypatch):
+    """Routes with a real model, an in-process store and a fake forecast_data."""
+    model = EarningsModel()
+    model.load("./data/saved_models")
+    if not model.is_loaded:
+        pytest.skip("saved earnings model not loadable in this environment")
+
+    store = EarningsFeatureStore(redis_getter=lambda: None)
+    app = types.SimpleNamespace(feature_store=store, earnings_model=model, earnings_batcher=None)
+    monkeypatch.setitem(sys.modules, "main", app)
+
+    frame = _synthetic_csv(8, 45, 7)
+    frame["worker_id"] = "u" + frame["worker_id"].astype(str)
+    bulk_calls = []
+
+    async def fake_bulk(user_ids, days=None):
+        bulk_calls.append(list(user_ids))
+        rows = frame[frame["worker_id"].isin(user_ids)].sort_values(["worker_id", "date"])
+        records = [(r.pop("worker_id"), *r.values())
+                   for r in rows[["worker_id", *FORECAST_BULK_COLUMNS]].to_dict("records")]
+        return _to_user_columns(list(user_ids), [records], FORECAST_BULK_COLUMNS)
+
+    monkeypatch.setattr(predict, "get_forecast_bulk", fake_bulk)
+    return app, frame, bulk_calls
+
+
+def test_stored_features_are_those_of_the_next_day():
+    frame = _synthetic_csv(5, 40, 8)
+    # the next day as a row of its own: worked, inputs carried forward, earnings unknown
+    last = frame.sort_values("date").groupby("worker_id").tail(1)
+    next_day = last.assign(
+        date=(pd.to_datetime(last["date"]) + pd.Timedelta(days=1)).dt.strftime("%Y-%m-%d"),
+        worked=1, net_earnings=float("nan"),
+    )
+    engineered = _engineer_features(pd.concat([frame, next_day]))
+    expected = engineered.groupby("worker_id").tail(1).set_index("worker_id")
+
+    for wid, rows in frame.groupby("worker_id"):
+        features = predict._stored_features(RollingEarnings.from_days(_days_of(rows)))
+        assert sorted(features) == sorted(MODEL_FEATURE_ORDER)
+        assert features == pytest.approx({c: float(expected.loc[wid, c]) for c in MODEL_FEATURE_ORDER})
+
+
+def test_batch_route_matches_csv_path_and_warms_the_store(online):
+    app, frame, bulk_calls = online
+    # the CSV path wants integer worker ids
+    engineered = _engineer_features(frame.assign(worker_id=frame["worker_id"].str[1:].astype(int)))
+    expected = {
+        f"u{r['worker_id']}": {k: r[k][0] for k in
+                               ("predicted_earnings_paise", "predicted_earnings_rupees", "confidence")}
+        for r in _forecast_horizon(engineered, app.earnings_model, 1)
+    }
+    body = predict.EarningsUsersRequest(user_ids=["u3", "nobody", "u1", "u3"])
+
+    first = asyncio.run(predict.predict_users_earnings(body))
+    assert [p.user_id for p in first.predictions] == ["u3", "u1"]
+    assert first.missing == ["nobody"]
+    for p in first.predictions:
+        assert p.model_dump(exclude={"user_id", "as_of", "forecast_date"}) == expected[p.user_id]
+        assert (str(p.as_of), str(p.forecast_date)) == ("2023-11-14", "2023-11-15")
+
+    # warm workers are served from the store; only the unknown one is looked up again
+    second = asyncio.run(predict.predict_users_earnings(body))
+    assert second == first
+    assert bulk_calls == [["u3", "nobody", "u1"], ["nobody"]]
+
+
+def test_single_user_route_goes_through_the_micro_batcher(online):
+    app, frame, _ = online
+
+    async def scenario():
+        app.earnings_batcher = MicroBatcher(app.earnings_model.predict_batch,
+                                            max_batch_size=50, max_delay_ms=20)
+        users = [f"u{i}" for i in range(1, 9)]
+        single = await asyncio.gather(*(predict.predict_user_earnings(u) for u in users))
+        batch = await predict.predict_users_earnings(predict.EarningsUsersRequest(user_ids=users))
+        return single, batch
+
+    single, batch = asyncio.run(scenario())
+    assert [s.predicted_earnings_paise for s in single] == \
+        [p.predicted_earnings_paise for p in batch.predictions]
+    assert app.earnings_batcher.stats()["batches"] == 1
+
+    with pytest.raises(predict.HTTPException) as err:
+        asyncio.run(predict.predict_user_earnings("nobody"))
+    assert err.value.status_code == 404
+
+
+def test_csv_default_keeps_last_row_and_horizon_matches_online(online, monkeypatch):
+    """
+    The plain CSV route predicts each worker's last row, as it always has;
+    horizon=1 and the per-user routes forecast the day after it.
+    """
+    from fastapi import UploadFile
+
+    app, frame, _ = online
+    monkeypatch.setattr(predict, "run_in_process", predict.run_in_thread)
+    payload = frame.assign(worker_id=frame["worker_id"].str[1:].astype(int)).to_csv(index=False)
+
+    async def scenario():
+        csv_default = await predict.predict_earnings(
+            UploadFile(io.BytesIO(payload.encode()), filename="e.csv"),
+            stream=False, grouped=False, horizon=None)
+        csv_horizon = await predict.predict_earnings(
+            UploadFile(io.BytesIO(payload.encode()), filename="e.csv"),
+            stream=False, grouped=False, horizon=1)
+        online_batch = await predict.predict_users_earnings(
+            predict.EarningsUsersRequest(user_ids=[f"u{r['worker_id']}" for r in csv_horizon]))
+        return csv_default, csv_horizon, online_batch
+
+    csv_default, csv_horizon, online_batch = asyncio.run(scenario())
+    engineered = _engineer_features(pd.read_csv(io.StringIO(payload)))
+    assert csv_default == predict._predict_last_rows(
+        engineered.groupby("worker_id").tail(1), app.earnings_model)
+    assert [r["predicted_earnings_paise"][0] for r in csv_horizon] == \
+        [p.predicted_earnings_paise for p in online_batch.predictions]
+    assert {r["dates"][0] for r in csv_horizon} == {"2023-11-15"}
@@ -0,0 +1,256 @@
+"""
+Parity tests for routers/predict.py: the vectorized feature-engineering
+pipeline against the original per-worker groupby().apply version, the
+streaming NDJSON path against the in-memory path (and its header check
+against ``pd.read_csv``), and the vectorized multi-horizon forecast against
+a day-by-day per-worker loop.
+
+Run:  python -m pytest -q test_features.py
+"""
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import routers.predict as predict
+from models.earnings_model import EarningsModel
+from routers.predict import INDIAN_HOLIDAYS_2023, _engineer_features
+
+
+def _reference_engineer_features(df: pd.DataFrame) -> pd.DataFrame:
+    """The original groupby("worker_id").apply implementation, kept verbatim."""
+    df["date"] = pd.to_datetime(df["date"])
+    df.sort_values(["worker_id", "date"], inplace=True)
+    df.reset_index(drop=True, inplace=True)
+
+    df["is_weekend"] = (df["date"].dt.dayofweek >= 5).astype(int)
+    df["is_holiday"] = (
+        df["date"].dt.strftime("%Y-%m-%d").isin(INDIAN_HOLIDAYS_2023).astype(int)
+    )
+    df["is_month_end"] = (df["date"].dt.day >= 28).astype(int)
+
+    def _per_worker(g: pd.DataFrame) -> pd.DataFrame:
+        g = g.copy()
+        worked_earnings = g["net_earnings"].where(g["worked"] == 1)
+
+        g["prev_day_earnings"] = worked_earnings.shift(1).ffill()
+        g["prev_7day_avg"] = (
+            worked_earnings.shift(1).rolling(7, min_periods=1).mean().ffill()
+        )
+        g["prev_30day_avg"] = (
+            worked_earnings.shift(1).rolling(30, min_periods=1).mean().ffill()
+        )
+        g["days_active_last_7"] = (
+            g["worked"].shift(1).rolling(7, min_periods=1).sum().fillna(0)
+        )
+
+        worker_mean = worked_earnings.mean()
+        if pd.isna(worker_mean):
+            worker_mean = 0
+        for col in ("prev_day_earnings", "prev_7day_avg", "prev_30day_avg"):
+            g[col] = g[col].fillna(worker_mean)
+
+        for col in ("prev_day_earnings", "prev_7day_avg", "prev_30day_avg",
+                     "days_active_last_7"):
+            g[col] = g[col].astype(int)
+
+        return g
+
+    return df.groupby("worker_id", group_keys=False).apply(_per_worker)
+
+
+def _assert_parity(actual: pd.DataFrame, expected: pd.DataFrame) -> None:
+    # pandas >= 3 drops the grouping column from groupby().apply output, so
+    # the reference may lack worker_id; every column it does have must match.
+    assert "worker_id" in actual.columns
+    pd.testing.assert_frame_equal(
+        actual[expected.columns], expected, check_exact=True
+    )
+
+
+def _synthetic_csv(n_workers: int, n_days: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2023-10-01", periods=n_days, freq="D")
+    frame = pd.DataFrame({
+        "worker_id": np.repeat(np.arange(1, n_workers + 1), n_days),
+        "date": np.tile(dates.strftime("%Y-%m-%d"), n_workers),
+    })
+    n = len(frame)
+    frame["worked"] = (rng.random(n) < 0.75).astype(int)
+    frame["rainfall_mm"] = rng.gamma(1.0, 6.0, n).round(1)
+    frame["temp_celsius"] = rng.normal(28, 3, n).round(1)
+    frame["average_rating"] = rng.uniform(3.5, 5.0, n).round(2)
+    frame["incentives_earned"] = rng.integers(0, 30000, n)
+    frame["net_earnings"] = np.where(
+        frame["worked"] == 1, rng.integers(20000, 200000, n), 0
+    )
+    frame["efficiency_ratio"] = rng.uniform(0.3, 0.9, n).round(2)
+
+    # Workers who never work, and workers who stop working for weeks
+    frame.loc[frame["worker_id"] == 2, "worked"] = 0
+    idle = (frame["worker_id"] == 3) & (frame.index % n_days > n_days // 3)
+    frame.loc[idle, "worked"] = 0
+
+    # Rows arrive shuffled, as they do in merged platform exports
+    return frame.sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("n_workers,n_days,seed", [
+    (1, 3, 0),
+    (5, 60, 1),
+    (40, 45, 2),
+])
+def test_vectorized_features_match_reference(n_workers, n_days, seed):
+    raw = _synthetic_csv(n_workers, n_days, seed)
+
+    expected = _reference_engineer_features(raw.copy())
+    actual = _engineer_features(raw.copy())
+
+    _assert_parity(actual, expected)
+
+
+def test_vectorized_features_match_reference_on_float_earnings():
+    raw = _synthetic_csv(8, 50, 3)
+    raw["net_earnings"] = raw["net_earnings"] * 1.0137
+
+    expected = _reference_engineer_features(raw.copy())
+    actual = _engineer_features(raw.copy())
+
+    _assert_parity(actual, expected)
+
+
+def test_sample_csv_matches_reference():
+    raw = pd.read_csv("sample_earnings_60days.csv")
+
+    expected = _reference_engineer_features(raw.copy())
+    actual = _engineer_features(raw.copy())
+
+    _assert_parity(actual, expected)
+
+
+def test_streaming_predictions_match_in_memory_path(monkeypatch):
+    model = EarningsModel()
+    model.load("./data/saved_models")
+    if not model.is_loaded:
+        pytest.skip("saved earnings model not loadable in this environment")
+
+    # worker 3 works for 30 days, then is idle for 60 — longer than the window
+    raw = _synthetic_csv(12, 90, 4).sort_values(["worker_id", "date"])
+    engineered = _engineer_features(raw.copy())
+    last_rows = engineered.groupby("worker_id").tail(1).set_index("worker_id")
+    expected = predict._predict_last_rows(last_rows.reset_index(), model)
+
+    # the rows streaming predicts from, not just the (coarser) predictions
+    streamed_rows = []
+    predict_last_rows = predict._predict_last_rows
+
+    def recording(rows, earnings_model):
+        streamed_rows.append(rows)
+        return predict_last_rows(rows, earnings_model)
+
+    monkeypatch.setattr(predict, "_predict_last_rows", recording)
+    monkeypatch.setattr(predict, "STREAM_CHUNK_ROWS", 37)
+    payload = raw.to_csv(index=False).encode()
+    for grouped in (False, True):
+        streamed_rows.clear()
+        lines = predict._stream_predictions(
+            io.BytesIO(payload), model, grouped=grouped
+        )
+        actual = sorted(
+            (json.loads(line) for line in "".join(lines).splitlines()),
+            key=lambda r: r["worker_id"],
+        )
+        assert actual == expected
+        features = pd.concat(streamed_rows).set_index("worker_id").sort_index()
+        pd.testing.assert_frame_equal(
+            features[predict.MODEL_FEATURE_ORDER],
+            last_rows[predict.MODEL_FEATURE_ORDER],
+        )
+
+
+def _reference_horizon(raw: pd.DataFrame, model, horizon: int) -> list[dict]:
+    """Per worker, one day at a time: predict, then push the prediction as a worked day."""
+    from datetime import date, timedelta
+
+    from utils.feature_store import RollingEarnings
+
+    results = []
+    for wid, rows in raw.sort_values(["worker_id", "date"]).groupby("worker_id"):
+        days = rows.to_dict("records")
+        state = RollingEarnings.from_days(days)
+        exog = {c: float(days[-1][c]) for c in ("rainfall_mm", "temp_celsius", "average_rating",
+                                                 "incentives_earned", "efficiency_ratio")}
+        day = date.fromisoformat(str(days[-1]["date"])[:10])
+        dates, paise = [], []
+        for _ in range(horizon):
+            day += timedelta(days=1)
+            features = {**exog, "worked": 1, **predict._calendar_flags(day),
+                        **state.next_lag_features()}
+            row = np.array([[features[c] for c in predict.MODEL_FEATURE_ORDER]], dtype=float)
+            pred = max(0, int(round(model.predict_matrix(row)[0])))
+            state.push({**exog, "date": day, "worked": 1, "net_earnings": pred})
+            dates.append(day.isoformat())
+            paise.append(pred)
+        results.append({"worker_id": int(wid), "dates": dates, "predicted_earnings_paise": paise})
+    return results
+
+
+def test_multi_horizon_matches_day_by_day_loop():
+    model = EarningsModel()
+    model.load("./data/saved_models")
+    if not model.is_loaded:
+        pytest.skip("saved earnings model not loadable in this environment")
+
+    # ends 2023-11-10: the week ahead crosses a weekend and the 11-13/14 holidays
+    raw = _synthetic_csv(15, 41, 5)
+    short = (raw["worker_id"] == 4) & (raw["date"] < "2023-11-05")
+    raw = raw[~short]                      # a worker with only a few days of history
+
+    calls = []
+    original = model.predict_matrix
+    model.predict_matrix = lambda X: calls.append(len(X)) or original(X)
+    try:
+        actual = predict._forecast_horizon(_engineer_features(raw.copy()), model, 7)
+    finally:
+        model.predict_matrix = original
+
+    assert calls == [15] * 7               # one call per day over all workers
+    expected = _reference_horizon(raw, model, 7)
+    assert [{k: r[k] for k in ("worker_id", "dates", "predicted_earnings_paise")}
+            for r in actual] == expected
+    assert actual[0]["dates"] == [f"2023-11-{d}" for d in range(11, 18)]
+    assert all(len(r["confidence"]) == 7 for r in actual)
+
+
+def test_stream_header_check_parses_like_read_csv(monkeypatch):
+    import asyncio
+    import sys
+    import types
+
+    from fastapi import HTTPException, UploadFile
+
+    model = EarningsModel()
+    model.load("./data/saved_models")
+    if not model.is_loaded:
+        pytest.skip("saved earnings model not loadable in this environment")
+    monkeypatch.setitem(sys.modules, "main", types.SimpleNamespace(earnings_model=model))
+
+    raw = _synthetic_csv(3, 10, 6)
+    # quoted column names, as spreadsheet exports write them, behind a BOM
+    quoted = "﻿" + raw.to_csv(index=False, quoting=1)
+
+    async def post(text: str):
+        response = await predict.predict_earnings(
+            UploadFile(io.BytesIO(text.encode()), filename="e.csv"),
+            stream=True, grouped=False, horizon=None)
+        return [line async for line in response.body_iterator]
+
+    lines = "".join(asyncio.run(post(quoted))).splitlines()
+    assert sorted(json.loads(line)["worker_id"] for line in lines) == [1, 2, 3]
+
+    with pytest.raises(HTTPException) as err:
+        asyncio.run(post(raw.drop(columns="worked").to_csv(index=False)))
+    assert err.value.status_code == 400 and "worked" in err.value.detail
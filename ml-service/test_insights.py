@@ -0,0 +1,201 @@
+"""
+Tests for routers/insights.py — the LLM answer cache (reuse while the
+fetched rows are unchanged, a fresh LLM call once they change) and the
+shared async LLM client against an in-process stub server.
+
+Run:  python -m pytest -q test_insights.py
+"""
+
+import asyncio
+import json
+import time
+from datetime import date
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+import routers.insights as insights
+from utils.cache import LRUCache
+
+LLM_ANSWER = [{
+    "type": "savings",
+    "title": "You saved Rs.900",
+    "body": "Earned Rs.1,500, spent Rs.600.",
+    "action": "Put Rs.50/day aside.",
+}]
+
+
+@pytest.fixture
+def fake_data(monkeypatch):
+    data = {
+        "earnings": [{"date": date(2026, 10, 12), "net_earnings": 150000.0,
+                      "incentives_earned": 0.0, "total_earnings": 150000.0, "worked": 1}],
+        "expenses": [{"date": date(2026, 10, 12), "amount": 60000, "category": "fuel",
+                      "merchant": "HPCL", "is_tax_deductible": True}],
+    }
+    llm_calls = []
+
+    async def fake_llm(prompt):
+        llm_calls.append(prompt)
+        return LLM_ANSWER
+
+    async def fake_earnings(uid):
+        return list(data["earnings"])
+
+    async def fake_expenses(uid):
+        return list(data["expenses"])
+
+    monkeypatch.setattr(insights, "_fetch_last7_earnings", fake_earnings)
+    monkeypatch.setattr(insights, "_fetch_last7_expenses", fake_expenses)
+    monkeypatch.setattr(insights, "_call_llm", fake_llm)
+    monkeypatch.setattr(insights, "get_redis", lambda: None)
+    monkeypatch.setattr(insights, "_insights_cache", LRUCache(100))
+    return data, llm_calls
+
+
+def test_llm_answer_reused_until_rows_change(fake_data):
+    data, llm_calls = fake_data
+
+    first = asyncio.run(insights.get_insights("u1"))
+    second = asyncio.run(insights.get_insights("u1"))
+    assert len(llm_calls) == 1
+    assert [i.model_dump() for i in second.insights] == LLM_ANSWER
+    assert first.insights == second.insights
+
+    # another user with identical rows still gets their own entry
+    asyncio.run(insights.get_insights("u2"))
+    assert len(llm_calls) == 2
+
+    # a new expense changes the fingerprint → fresh LLM call
+    data["expenses"].append({"date": date(2026, 10, 13), "amount": 2000, "category": "food",
+                             "merchant": "Zomato", "is_tax_deductible": False})
+    asyncio.run(insights.get_insights("u1"))
+    assert len(llm_calls) == 3
+
+
+def test_expired_or_disabled_cache_calls_llm_again(fake_data, monkeypatch):
+    _, llm_calls = fake_data
+
+    asyncio.run(insights.get_insights("u1"))
+    monkeypatch.setattr(insights.time, "time", lambda: 10**12)
+    asyncio.run(insights.get_insights("u1"))
+    assert len(llm_calls) == 2
+
+    monkeypatch.setattr(insights, "INSIGHTS_CACHE_TTL", 0)
+    asyncio.run(insights.get_insights("u1"))
+    asyncio.run(insights.get_insights("u1"))
+    assert len(llm_calls) == 4
+
+
+def test_data_driven_fallback_is_not_cached(fake_data, monkeypatch):
+    _, llm_calls = fake_data
+
+    async def failing_llm(prompt):
+        llm_calls.append(prompt)
+        return None
+
+    monkeypatch.setattr(insights, "_call_llm", failing_llm)
+
+    asyncio.run(insights.get_insights("u1"))
+    asyncio.run(insights.get_insights("u1"))
+    assert len(llm_calls) == 2
+
+
+# ── shared AsyncOpenAI client against a stub server ─────────────
+@pytest.fixture
+def stub_llm(monkeypatch):
+    requests_seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(request.url.path)
+        if request.url.path.endswith("/models"):
+            return httpx.Response(200, json={"object": "list", "data": []})
+        body = json.loads(request.content)
+        assert body["messages"][0]["content"] == insights.SYSTEM_PROMPT
+        return httpx.Response(200, json={
+            "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {
+                "role": "assistant", "content": "```json\n" + json.dumps(LLM_ANSWER) + "\n```",
+            }}],
+        })
+
+    client = AsyncOpenAI(
+        api_key="test", base_url="http://stub.local/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(insights, "INSIGHTS_MODEL_API_KEY", "test")
+    monkeypatch.setattr(insights, "_llm_status", {"ok": None, "checked_at": 0.0, "error": None})
+    insights.set_llm_client(client)
+    yield requests_seen
+    insights.set_llm_client(None)
+
+
+def test_call_llm_uses_shared_client(stub_llm):
+    async def scenario():
+        return await asyncio.gather(*(insights._call_llm("prompt") for _ in range(3)))
+
+    assert asyncio.run(scenario()) == [LLM_ANSWER] * 3
+    assert stub_llm == ["/v1/chat/completions"] * 3
+
+
+def test_health_reuses_recent_llm_status(stub_llm):
+    async def scenario():
+        first = await insights.insights_health()      # probe: GET /models
+        second = await insights.insights_health()     # cached
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["llm_connected"] and second["llm_connected"]
+    assert stub_llm == ["/v1/models"]
+
+
+def test_earnings_and_expenses_fetched_concurrently(fake_data, monkeypatch):
+    in_flight, peak = [0], [0]
+
+    async def slow_fetch(uid):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return []
+
+    monkeypatch.setattr(insights, "_fetch_last7_earnings", slow_fetch)
+    monkeypatch.setattr(insights, "_fetch_last7_expenses", slow_fetch)
+    asyncio.run(insights.get_insights("u1"))
+    assert peak[0] == 2
+
+
+def test_slow_redis_does_not_block_the_event_loop(fake_data, monkeypatch):
+    _, llm_calls = fake_data
+
+    class SlowRedis:
+        """Every call stalls, as a reconnect to an unreachable Redis does."""
+        def get(self, key):
+            time.sleep(0.2)
+            raise ConnectionError("redis unreachable")
+
+        def setex(self, key, ttl, value):
+            time.sleep(0.2)
+            raise ConnectionError("redis unreachable")
+
+    monkeypatch.setattr(insights, "get_redis", lambda: SlowRedis())
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        response = await insights.get_insights("u1")
+        task.cancel()
+        return response, ticks
+
+    response, ticks = asyncio.run(scenario())
+    assert [i.model_dump() for i in response.insights] == LLM_ANSWER
+    assert len(llm_calls) == 1
+    assert ticks >= 20          # the loop kept running through ~0.4 s of Redis stalls
@@ -0,0 +1,281 @@
+"""
+Tests for models/sms_classifier.py — batch classification parity with the
+per-message path, the result cache, the template fast path and the
+single-pass regex scanner.
+
+Run:  python -m pytest -q test_sms_classifier.py
+"""
+
+import json
+import os
+import re
+import shutil
+import sys
+
+import pytest
+
+from bench_sms_scanner import legacy_scan, synthetic_corpus
+from models.sms_classifier import (
+    KEYWORD_RULES,
+    SMS_TEMPLATES_FILE,
+    SmsClassifier,
+    _FOLD_HAZARDS,
+    mine_templates,
+    scan_sms,
+    template_signature,
+)
+
+SAMPLE_SMS = [
+    "Rs.500.00 debited from A/c XX1234 at HP PETROL PUMP ANDHERI on 12-10-23.",
+    "INR 85 paid via FASTag at Vashi Toll Plaza. Avl bal Rs 412.50",
+    "Your Zomato order of Rs 349 has been placed. Track at zomato.com",
+    "Paid ₹1,250.00 to Sai Bike Service Centre, Ref 33221.",
+    "Recharge of Rs.299 successful for Jio number 98XXXXXX10. Validity 28 days.",
+    "Rs 40 paid to Mumbai Parking Authority.",
+    "Your OTP for login is 482913. Do not share it with anyone.",
+    "Avl bal in A/c XX1234 is Rs 12,403.22 as on 12-10-23.",
+    "Thanks for visiting! See you again",
+    "",
+    "park",
+    "Rs. to",
+]
+
+
+def _loaded(**kwargs) -> SmsClassifier:
+    clf = SmsClassifier(**kwargs)
+    clf.load("./data/saved_models")
+    if not clf.is_loaded:
+        pytest.skip("saved SMS model not loadable in this environment")
+    return clf
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    # Cache off so both paths really hit the model
+    return _loaded(cache_size=0, redis_ttl=0)
+
+
+def test_classify_batch_matches_per_message(classifier):
+    expected = [classifier.classify(text) for text in SAMPLE_SMS]
+    assert classifier.classify_batch(SAMPLE_SMS) == expected
+
+
+def test_classify_batch_covers_regex_fallback(classifier):
+    results = classifier.classify_batch(SAMPLE_SMS)
+    assert any(r["confidence"] < 0.50 for r in results)
+
+
+def test_classify_batch_unloaded_uses_fallback():
+    clf = SmsClassifier()
+    assert clf.classify_batch(SAMPLE_SMS) == [clf.classify(t) for t in SAMPLE_SMS]
+    assert clf.classify_batch([]) == []
+
+
+def test_cache_returns_identical_results(classifier):
+    cached = _loaded(cache_size=100, redis_ttl=0)
+    expected = classifier.classify_batch(SAMPLE_SMS)
+
+    assert cached.classify_batch(SAMPLE_SMS + SAMPLE_SMS) == expected + expected
+    assert [cached.classify(t) for t in SAMPLE_SMS] == expected
+
+    stats = cached.cache_stats()
+    assert stats["size"] == len(SAMPLE_SMS)
+    assert stats["misses"] == len(SAMPLE_SMS) * 2      # first pass, both copies
+    assert stats["hits"] == len(SAMPLE_SMS)
+
+
+def test_cached_results_are_not_shared(classifier):
+    cached = _loaded(cache_size=100, redis_ttl=0)
+    cached.classify(SAMPLE_SMS[0])["category"] = "mutated"
+    assert cached.classify(SAMPLE_SMS[0]) == classifier.classify(SAMPLE_SMS[0])
+
+
+def test_cache_is_bounded_and_keyed_by_model_version():
+    cached = _loaded(cache_size=3, redis_ttl=0)
+    cached.classify_batch(SAMPLE_SMS)
+    assert cached.cache_stats()["size"] == 3
+
+    key = cached._cache_key(SAMPLE_SMS[0])
+    assert key.startswith(f"{cached.model_version}:")
+
+    cached.load("./data/saved_models")               # reload clears the LRU
+    assert cached.cache_stats()["size"] == 0
+
+
+# ── template fast path ─────────────────────────────────────────
+def _templated_corpus(n: int = 30):
+    for i in range(n):
+        yield (f"INR {40 + i} paid via FASTag at Toll Plaza {i}. Avl bal Rs {900 - i}.50",
+               "toll", float(40 + i))
+        yield (f"Your OTP for login is {100000 + i * 37}. Do not share it with anyone.",
+               "no_expense", None)
+
+
+def test_template_signature_masks_slots():
+    signature, amounts = template_signature(
+        "Rs.500 debited from A/c XX1234 at HP PUMP on 12-10-23"
+    )
+    assert signature == "<amt> debited from a/c <acct> at <name> <num>"
+    assert amounts == [500.0]
+
+
+def test_mine_templates_keeps_pure_frequent_templates():
+    corpus = list(_templated_corpus())
+    corpus.append(("Paid Rs 10 to somebody", "food", 10.0))       # below min_support
+    templates = mine_templates(corpus, min_support=5)
+
+    assert len(templates) == 2
+    by_category = {t["category"]: t for t in templates.values()}
+    assert by_category["toll"]["amount_slot"] == 0
+    assert by_category["no_expense"]["amount_slot"] is None
+
+    mixed = [(body, "toll" if (i // 2) % 2 else "food", amt)
+             for i, (body, _, amt) in enumerate(_templated_corpus())]
+    assert mine_templates(mixed, min_support=5) == {}
+
+
+def test_known_templates_skip_the_model(tmp_path):
+    for name in ("sms_model.joblib", "sms_vectorizer.joblib"):
+        shutil.copy(os.path.join("./data/saved_models", name), tmp_path / name)
+    (tmp_path / SMS_TEMPLATES_FILE).write_text(json.dumps({
+        "version": 1, "templates": mine_templates(_templated_corpus()),
+    }))
+
+    clf = SmsClassifier(cache_size=0, redis_ttl=0)
+    clf.load(str(tmp_path))
+    if not clf.is_loaded:
+        pytest.skip("saved SMS model not loadable in this environment")
+
+    known = "INR 75 paid via FASTag at Toll Plaza 9. Avl bal Rs 120.50"
+    results = clf.classify_batch([known] + SAMPLE_SMS)
+    assert results[0]["category"] == "toll"
+    assert results[0]["amount_rupees"] == 75.0
+    assert clf.template_stats()["hits"] == 2        # plus the sample OTP
+    assert results == [clf.classify(t) for t in [known] + SAMPLE_SMS]
+
+    clf._vectorizer = _Exploding()
+    assert clf.classify_batch([known]) == results[:1]
+
+
+class _Exploding:
+    def transform(self, texts):
+        raise AssertionError("template hit must not reach the vectorizer")
+
+
+# ── single-pass scanner ────────────────────────────────────────
+SCANNER_EDGE_CASES = [
+    "PAID RS.1,200 TO IOCL PETROL PUMP, THANKS!",
+    "Paid rs ,  to zomato",
+    "bill at   Vi\nrecharge done",
+    "parking at Vi garage; fastag shell netc Rs 10.555",
+    "Rs.99 debited at HPpump.",
+    "toll at: ₹ 45",
+    "SHELL İSTANBUL at ſwiggy inr 12",
+    "ıocl at toll plaza Rs 5",
+    "to",
+    "Refund to A/c at",
+]
+
+
+def test_scanner_matches_per_rule_regexes():
+    for text in SAMPLE_SMS + SCANNER_EDGE_CASES + synthetic_corpus(5_000, seed=7):
+        assert tuple(scan_sms(text)) == legacy_scan(text), text
+
+
+def test_scanner_sources_are_lowercase():
+    # The scanner matches KEYWORD_RULES case-sensitively on lowered text
+    for pattern in KEYWORD_RULES.values():
+        assert pattern.pattern == pattern.pattern.lower()
+
+
+def test_fold_hazards_are_complete():
+    letter = re.compile("[a-z]", re.IGNORECASE)
+    hazards = set()
+    for cp in range(0x80, sys.maxunicode + 1):
+        ch = chr(cp)
+        low = ch.lower()
+        if len(low) != 1 or (letter.fullmatch(ch) and not "a" <= low <= "z"):
+            hazards.add(ch)
+    assert hazards == _FOLD_HAZARDS
+
+
+# ── counters under concurrent classify_batch calls ──────────────
+class _DictRedis:
+    """Enough of redis-py for the SMS cache tier."""
+
+    def __init__(self):
+        self.data = {}
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def execute(self):
+        return []
+
+
+def test_counters_are_exact_under_concurrent_batches(tmp_path, monkeypatch):
+    """classify_batch runs on the thread pool; no hit or miss may be lost."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    import models.sms_classifier as sms
+
+    for name in ("sms_model.joblib", "sms_vectorizer.joblib"):
+        shutil.copy(os.path.join("./data/saved_models", name), tmp_path / name)
+    (tmp_path / SMS_TEMPLATES_FILE).write_text(json.dumps({
+        "version": 1, "templates": mine_templates(_templated_corpus()),
+    }))
+    texts = ["INR 75 paid via FASTag at Toll Plaza 9. Avl bal Rs 120.50"] + SAMPLE_SMS
+    n_batches = 200
+
+    def hammer(clf):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: clf.classify_batch(texts), range(n_batches)))
+
+    # no cache at all: every batch goes through the template table
+    monkeypatch.setattr(sms, "get_redis", lambda: None)
+    clf = SmsClassifier(cache_size=0)
+    clf.load(str(tmp_path))
+    if not clf.is_loaded:
+        pytest.skip("saved SMS model not loadable in this environment")
+    clf.classify_batch(texts)
+    once = clf.template_stats()
+    assert once["hits"] >= 1
+    hammer(clf)
+    stats = clf.template_stats()
+    assert (stats["hits"], stats["misses"]) == \
+        ((n_batches + 1) * once["hits"], (n_batches + 1) * once["misses"])
+
+    # warm Redis: every lookup of every batch is a Redis hit
+    redis = _DictRedis()
+    monkeypatch.setattr(sms, "get_redis", lambda: redis)
+    clf = SmsClassifier(cache_size=0, redis_ttl=60)
+    clf.load(str(tmp_path))
+    clf.classify_batch(texts)
+    assert clf.cache_stats()["redis"]["misses"] == len(texts)
+    hammer(clf)
+    redis_stats = clf.cache_stats()["redis"]
+    assert (redis_stats["hits"], redis_stats["misses"]) == (n_batches * len(texts), len(texts))
+
+
+def test_cache_stats_never_connect_to_redis(monkeypatch):
+    """/health reads these on the event loop; a down Redis must not stall it."""
+    import models.sms_classifier as sms
+    import utils.cache as cache
+
+    def connect():
+        raise AssertionError("cache_stats() tried to connect to Redis")
+
+    monkeypatch.setattr(sms, "get_redis", connect)
+    monkeypatch.setattr(cache, "get_redis", connect)
+    monkeypatch.setattr(cache, "_redis_client", None)
+    monkeypatch.setenv("REDIS_URL", "redis://unreachable:6379/0")
+
+    stats = SmsClassifier(redis_ttl=60).cache_stats()["redis"]
+    assert (stats["enabled"], stats["connected"]) == (True, False)
+    assert SmsClassifier(redis_ttl=0).cache_stats()["redis"]["enabled"] is False
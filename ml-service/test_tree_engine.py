@@ -0,0 +1,86 @@
+"""
+Parity tests for models/tree_engine.py — the compiled NumPy engine must
+reproduce GradientBoostingRegressor.predict bit for bit.
+
+Run:  python -m pytest -q test_tree_engine.py
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+
+from models.earnings_model import EarningsModel
+from models.tree_engine import CompiledTreeEnsemble
+
+
+@pytest.fixture(scope="module")
+def saved_model():
+    model = EarningsModel()
+    model.load("./data/saved_models")
+    if model._model is None:
+        pytest.skip("saved earnings model not loadable in this environment")
+    return model._model
+
+
+@pytest.mark.parametrize("n_rows", [1, 7, 100, 5000])
+def test_saved_model_parity(saved_model, n_rows):
+    engine = CompiledTreeEnsemble.from_sklearn(saved_model)
+    X = np.random.default_rng(n_rows).normal(scale=2.0, size=(n_rows, 13))
+
+    np.testing.assert_array_equal(engine.predict(X), saved_model.predict(X))
+
+
+def test_inputs_on_split_thresholds_follow_sklearn(saved_model):
+    engine = CompiledTreeEnsemble.from_sklearn(saved_model)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 13))
+
+    # Put every feature exactly on (float32-rounded) split thresholds
+    for f in range(13):
+        thresholds = engine.threshold[engine.feature == f]
+        if len(thresholds):
+            X[:, f] = rng.choice(thresholds.astype(np.float32), size=500)
+
+    np.testing.assert_array_equal(engine.predict(X), saved_model.predict(X))
+
+
+@pytest.mark.parametrize("max_depth", [1, 3, 6])
+def test_fresh_models_of_varying_depth(max_depth):
+    rng = np.random.default_rng(max_depth)
+    X = rng.normal(size=(400, 5))
+    y = X[:, 0] * 3 - X[:, 1] ** 2 + rng.normal(size=400)
+    gbr = GradientBoostingRegressor(
+        n_estimators=30, max_depth=max_depth, random_state=0
+    ).fit(X, y)
+
+    engine = CompiledTreeEnsemble.from_sklearn(gbr)
+    X_test = rng.normal(size=(300, 5))
+
+    np.testing.assert_array_equal(engine.predict(X_test), gbr.predict(X_test))
+
+
+def test_unsupported_init_is_rejected():
+    from sklearn.linear_model import LinearRegression
+
+    X = np.random.default_rng(1).normal(size=(100, 3))
+    gbr = GradientBoostingRegressor(
+        n_estimators=5, init=LinearRegression()
+    ).fit(X, X[:, 0])
+
+    with pytest.raises(ValueError):
+        CompiledTreeEnsemble.from_sklearn(gbr)
+
+
+def test_earnings_model_falls_back_to_sklearn(monkeypatch):
+    def _boom(_model):
+        raise ValueError("conversion failed")
+
+    monkeypatch.setattr(CompiledTreeEnsemble, "from_sklearn", staticmethod(_boom))
+    model = EarningsModel()
+    model.load("./data/saved_models")
+    if model._model is None:
+        pytest.skip("saved earnings model not loadable in this environment")
+
+    assert model._engine is None
+    X = np.zeros((2, 13))
+    np.testing.assert_array_equal(model._predict_raw(X), model._model.predict(X))
@@ -0,0 +1,117 @@
+"""
+Tests for utils/weather.py — the non-blocking cache, background refresh,
+rate limiter and circuit breaker, with fake backends and a fake clock.
+
+Run:  python -m pytest -q test_weather.py
+"""
+
+import threading
+
+import pytest
+
+from utils.weather import (
+    UNKNOWN_WEATHER,
+    CircuitBreaker,
+    RateLimiter,
+    StaticWeatherBackend,
+    WeatherProvider,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyBackend:
+    """Blocks until released; fails while ``failing`` is set."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failing = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def fetch(self, lat, lng):
+        self.calls += 1
+        self.release.wait(5)
+        if self.failing:
+            raise ConnectionError("weather API down")
+        return {"rainfall_mm": 12.0, "condition": "rain"}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _drain(provider):
+    """Wait for queued background refreshes."""
+    provider._refresher.submit(lambda: None).result(5)
+
+
+def test_cold_lookup_returns_unknown_then_refreshes_in_background(clock):
+    backend = FlakyBackend()
+    backend.release.clear()
+    provider = WeatherProvider(backend, ttl_s=600, clock=clock)
+
+    # the backend is stuck, yet the caller gets an answer straight away
+    assert provider.current(19.076, 72.8777) == UNKNOWN_WEATHER
+    assert provider.current(19.076, 72.8777) == UNKNOWN_WEATHER
+    backend.release.set()
+    _drain(provider)
+
+    assert provider.current(19.076, 72.8777) == {"rainfall_mm": 12.0, "condition": "rain"}
+    assert backend.calls == 1           # one fetch per location in flight
+    stats = provider.stats()
+    assert (stats["misses"], stats["hits"], stats["fetches"]) == (2, 1, 1)
+
+
+def test_expired_entry_is_served_stale_while_refreshing(clock):
+    backend = FlakyBackend()
+    provider = WeatherProvider(backend, ttl_s=600, clock=clock)
+    provider.refresh(19.076, 72.8777)
+
+    clock.now += 601
+    backend.failing = True
+    assert provider.current(19.076, 72.8777)["condition"] == "rain"
+    _drain(provider)
+    # refresh failed — the last good value is kept
+    assert provider.current(19.076, 72.8777)["condition"] == "rain"
+    assert provider.stats()["failures"] >= 1
+
+
+def test_breaker_opens_after_consecutive_failures_and_half_opens(clock):
+    backend = FlakyBackend()
+    backend.failing = True
+    breaker = CircuitBreaker(failure_threshold=2, reset_after_s=60, clock=clock)
+    provider = WeatherProvider(backend, breaker=breaker, clock=clock)
+
+    provider.refresh(19.0, 72.8)
+    provider.refresh(19.0, 72.8)
+    assert breaker.state == "open"
+    assert provider.refresh(19.0, 72.8) is None
+    assert backend.calls == 2           # open breaker → backend not called
+
+    clock.now += 61
+    assert breaker.state == "half_open"
+    backend.failing = False
+    assert provider.refresh(19.0, 72.8)["condition"] == "rain"
+    assert breaker.state == "closed"
+
+
+def test_rate_limiter_caps_calls_per_window(clock):
+    limiter = RateLimiter(max_calls=2, period_s=60, clock=clock)
+    provider = WeatherProvider(StaticWeatherBackend(3.0, "drizzle"),
+                               limiter=limiter, clock=clock)
+
+    assert provider.refresh(19.0, 72.8) is not None
+    assert provider.refresh(19.1, 72.8) is not None
+    assert provider.refresh(19.2, 72.8) is None
+    assert provider.stats()["skipped"] == 1
+
+    clock.now += 60
+    assert provider.refresh(19.2, 72.8) == {"rainfall_mm": 3.0, "condition": "drizzle"}
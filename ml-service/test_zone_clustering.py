@@ -0,0 +1,496 @@
+"""
+Tests for zone_clustering.py, models/incremental_dbscan.py and
+models/zone_index.py and routers/zones.py — weighted DBSCAN against row
+repetition, the incremental path against a from-scratch refit, nearby-zone
+lookups against a brute-force scan, single-flight / stale serving, and
+shard-process logging.
+
+Run:  python -m pytest -q test_zone_clustering.py
+"""
+
+import asyncio
+import math
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sklearn.cluster import DBSCAN
+
+import zone_clustering
+from models.incremental_dbscan import IncrementalDBSCAN
+from models.zone_index import ZoneIndex
+from utils.weather import StaticWeatherBackend, WeatherProvider
+
+EPS = zone_clustering.DBSCAN_EPS
+MIN_SAMPLES = zone_clustering.DBSCAN_MIN_SAMPLES
+HUBS = np.array([[19.0596, 72.8295], [19.1136, 72.8697], [19.0178, 72.8478]])
+
+
+def _random_coords(rng, n):
+    return HUBS[rng.integers(0, len(HUBS), n)] + rng.normal(0, 0.006, (n, 2))
+
+
+def _reference_fit(coords, weights):
+    """DBSCAN over weight-repeated rows, mapped back to the original points."""
+    repeated = np.repeat(np.radians(coords), weights, axis=0)
+    first = np.concatenate([[0], np.cumsum(weights)[:-1]])
+    db = DBSCAN(eps=EPS, min_samples=MIN_SAMPLES, algorithm="ball_tree",
+                metric="haversine").fit(repeated)
+    core = np.zeros(len(repeated), dtype=bool)
+    core[db.core_sample_indices_] = True
+    return db.labels_[first], core[first]
+
+
+def _core_partition(labels, core):
+    groups: dict[int, list[int]] = {}
+    for i in np.flatnonzero(core):
+        groups.setdefault(int(labels[i]), []).append(int(i))
+    return sorted(groups.values())
+
+
+def _assert_equivalent(inc, ids, coords, weights):
+    rows = [inc.row(pid) for pid in ids]
+    labels, core = inc.labels[rows], inc.core[rows]
+    ref_labels, ref_core = _reference_fit(coords, weights)
+
+    np.testing.assert_array_equal(core, ref_core)
+    np.testing.assert_array_equal(labels == -1, ref_labels == -1)
+    assert _core_partition(labels, core) == _core_partition(ref_labels, ref_core)
+    # every border point sits within eps of a core point of its cluster
+    for i in np.flatnonzero((labels >= 0) & ~core):
+        nbrs = inc._neighbours(inc._lat[rows[i]], inc._lng[rows[i]])
+        assert any(inc.core[nb] and inc.labels[nb] == labels[i] for nb in nbrs)
+
+
+@pytest.mark.parametrize("n,seed", [(50, 0), (500, 1), (3_000, 2)])
+def test_weighted_dbscan_matches_repeated_rows(n, seed):
+    from bench_zone_clustering import synthetic_points
+
+    coords, weights = synthetic_points(n, seed)
+    labels, core = zone_clustering._weighted_dbscan(coords, weights)
+    ref_labels, ref_core = _reference_fit(coords, weights)
+
+    # same clusters, same numbering, same border assignment
+    np.testing.assert_array_equal(labels, ref_labels)
+    np.testing.assert_array_equal(core, ref_core)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_incremental_updates_match_full_refit(seed):
+    rng = np.random.default_rng(seed)
+    n = 300
+    coords = _random_coords(rng, n)
+    weights = rng.integers(1, 6, n)
+    labels, core = _reference_fit(coords, weights)
+    radians = np.radians(coords)
+    inc = IncrementalDBSCAN(EPS, MIN_SAMPLES).fit_from(
+        list(range(n)), radians[:, 0], radians[:, 1], weights, labels, core
+    )
+
+    for _ in range(25):
+        moved = list(rng.choice(len(coords), rng.integers(1, 8), replace=False))
+        new_ids = list(range(len(coords), len(coords) + int(rng.integers(0, 4))))
+        ids = moved + new_ids
+        new_coords = _random_coords(rng, len(ids))
+        new_weights = rng.integers(1, 6, len(ids))
+
+        coords = np.vstack([coords, np.zeros((len(new_ids), 2))])
+        weights = np.concatenate([weights, np.zeros(len(new_ids), dtype=int)])
+        coords[ids] = new_coords
+        weights[ids] = new_weights
+
+        rad = np.radians(new_coords)
+        inc.update(ids, rad[:, 0], rad[:, 1], new_weights)
+        _assert_equivalent(inc, list(range(len(coords))), coords, weights)
+
+
+def _reference_properties(cluster_points):
+    """The original per-cluster loop body (scalar haversine per point)."""
+    def haversine_km(lat1, lng1, lat2, lng2):
+        d_lat = math.radians(lat2 - lat1)
+        d_lng = math.radians(lng2 - lng1)
+        a = (math.sin(d_lat / 2) ** 2 + math.cos(math.radians(lat1))
+             * math.cos(math.radians(lat2)) * math.sin(d_lng / 2) ** 2)
+        return 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    center_lat = float(np.mean([p["lat"] for p in cluster_points]))
+    center_lng = float(np.mean([p["lng"] for p in cluster_points]))
+    return {
+        "center_lat": round(center_lat, 4),
+        "center_lng": round(center_lng, 4),
+        "radius_km": round(max(haversine_km(center_lat, center_lng, p["lat"], p["lng"])
+                               for p in cluster_points), 2),
+        "avg_earnings": round(float(np.mean([p["avg_earnings"] for p in cluster_points])), 1),
+        "avg_incentives": round(float(np.mean([p["avg_incentives"] for p in cluster_points])), 1),
+        "avg_orders": round(float(np.mean([p["total_orders"] for p in cluster_points])), 1),
+        "point_count": len(cluster_points),
+    }
+
+
+def test_cluster_stats_match_per_cluster_loop():
+    rng = np.random.default_rng(3)
+    points = _rows(rng, range(2_000), None)
+    labels = rng.integers(0, 40, len(points))
+    labels[:3] = [7, 7, 7]
+
+    stats = zone_clustering._cluster_stats(
+        zone_clustering._stat_columns(points), labels
+    )
+
+    assert sorted(stats) == sorted(set(labels.tolist()))
+    for label, props in stats.items():
+        expected = _reference_properties([p for p, l in zip(points, labels) if l == label])
+        assert props["point_count"] == expected["point_count"]
+        for key in ("center_lat", "center_lng", "radius_km",
+                    "avg_earnings", "avg_incentives", "avg_orders"):
+            # sums may differ in the last ulp; allow one rounding step
+            assert props[key] == pytest.approx(expected[key], abs=0.011), key
+
+
+# ── run_clustering against throwaway SQLite tables ──────────────
+@pytest.fixture
+def gps_db(monkeypatch):
+    sqlalchemy = pytest.importorskip("sqlalchemy")
+    from sqlalchemy.pool import StaticPool
+
+    engine = sqlalchemy.create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    cities = zone_clustering._load_cities(
+        '[{"name": "pune", "lat": 18.5204, "lng": 73.8567}]'
+    )
+    with engine.begin() as conn:
+        for city in cities.values():
+            conn.exec_driver_sql(
+                f"CREATE TABLE {city.table} (id INTEGER PRIMARY KEY, lat REAL, lng REAL, "
+                "avg_earnings REAL, avg_incentives REAL, total_orders REAL, "
+                "active_workers INTEGER, updated_at TIMESTAMP)"
+            )
+    monkeypatch.setattr(zone_clustering, "get_engine", lambda: engine)
+    monkeypatch.setattr(zone_clustering, "CITIES", cities)
+    monkeypatch.setattr(zone_clustering, "_states", {})
+    monkeypatch.setattr(
+        zone_clustering, "_state_locks",
+        {name: zone_clustering.threading.Lock() for name in cities},
+    )
+    monkeypatch.setattr(zone_clustering, "_watermark_tables", {})
+    monkeypatch.setattr(zone_clustering, "_get_redis", lambda: None)
+    weather = WeatherProvider(StaticWeatherBackend())
+    monkeypatch.setattr(zone_clustering, "get_weather_provider", lambda: weather)
+    return engine
+
+
+def _upsert(engine, rows, table="mumbai_gps_points"):
+    from sqlalchemy import text
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"INSERT OR REPLACE INTO {table} VALUES "
+            "(:id, :lat, :lng, :avg_earnings, :avg_incentives, :total_orders, "
+            ":active_workers, :updated_at)"
+        ), rows)
+
+
+def _rows(rng, ids, stamp):
+    coords = _random_coords(rng, len(ids))
+    return [{
+        "id": int(pid), "lat": float(lat), "lng": float(lng),
+        "avg_earnings": float(rng.uniform(100, 200)),
+        "avg_incentives": float(rng.uniform(10, 40)),
+        "total_orders": float(rng.uniform(5, 50)),
+        "active_workers": int(rng.integers(2, 20)),
+        "updated_at": stamp,
+    } for pid, (lat, lng) in zip(ids, coords)]
+
+
+def _summary(result):
+    return (result["total_clusters"], result["noise_points"],
+            sorted(c["point_count"] for c in result["clusters"]))
+
+
+def test_run_clustering_incremental_matches_refit(gps_db):
+    rng = np.random.default_rng(5)
+    t0 = datetime(2026, 10, 1, 12, 0, 0)
+    seed_rows = _rows(rng, range(1, 401), t0)
+    # pin the feature bounds so small updates never move them
+    seed_rows[0].update(avg_earnings=50.0, avg_incentives=0.0, total_orders=1.0, active_workers=1)
+    seed_rows[1].update(avg_earnings=250.0, avg_incentives=60.0, total_orders=80.0, active_workers=30)
+    _upsert(gps_db, seed_rows)
+
+    zone_clustering.run_clustering()
+    assert zone_clustering._states["mumbai"].runs_since_refit == 0
+
+    t1 = t0 + timedelta(minutes=5)
+    _upsert(gps_db, _rows(rng, [10, 20, 30, 401, 402], t1))
+    incremental = zone_clustering.run_clustering()
+    assert zone_clustering._states["mumbai"].runs_since_refit == 1
+    assert len(zone_clustering._states["mumbai"].dbscan) == 402
+
+    refit = zone_clustering.run_clustering(full_refit=True)
+    assert incremental["total_clusters"] == refit["total_clusters"]
+    assert incremental["noise_points"] == refit["noise_points"]
+
+    # nothing changed → incremental no-op gives the same clusters
+    assert _summary(zone_clustering.run_clustering()) == _summary(refit)
+
+
+def test_incremental_run_picks_up_rows_committed_behind_the_watermark(gps_db):
+    rng = np.random.default_rng(7)
+    t0 = datetime(2026, 10, 1, 12, 0, 0)
+    seed_rows = _rows(rng, range(1, 201), t0)
+    seed_rows[0].update(avg_earnings=50.0, avg_incentives=0.0, total_orders=1.0, active_workers=1)
+    seed_rows[1].update(avg_earnings=250.0, avg_incentives=60.0, total_orders=80.0, active_workers=30)
+    _upsert(gps_db, seed_rows)
+    zone_clustering.run_clustering()
+
+    t1 = t0 + timedelta(minutes=10)
+    _upsert(gps_db, _rows(rng, [201], t1))
+    zone_clustering.run_clustering()
+
+    # an update whose transaction started before t1 and committed after the last run
+    (late,) = _rows(rng, [50], t1 - timedelta(seconds=30))
+    _upsert(gps_db, [late])
+    zone_clustering.run_clustering()
+    state = zone_clustering._states["mumbai"]
+    assert state.runs_since_refit == 2
+    assert state.points[state.dbscan.row(50)]["lat"] == late["lat"]
+
+
+def test_run_clustering_refits_on_delete(gps_db):
+    rng = np.random.default_rng(6)
+    _upsert(gps_db, _rows(rng, range(1, 201), datetime(2026, 10, 1)))
+    zone_clustering.run_clustering()
+
+    with gps_db.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM mumbai_gps_points WHERE id <= 5")
+    zone_clustering.run_clustering()
+
+    assert zone_clustering._states["mumbai"].runs_since_refit == 0
+    assert len(zone_clustering._states["mumbai"].dbscan) == 195
+
+
+def _legacy_score(c, w_mult, hour, max_cluster_size):
+    """Scoring as run_clustering did it inline, for one hour."""
+    t_mult, _ = zone_clustering._time_multiplier(hour)
+    score = (c["avg_earnings"] / 220.0 * 0.40 + (t_mult / 1.60) * 0.30 +
+             (w_mult / 1.60) * 0.20 + (c["point_count"] / max_cluster_size) * 0.10) * 100
+    score = round(min(100, max(0, score)), 1)
+    demand = "high" if score >= 70 else "medium" if score >= 40 else "low"
+    return score, demand, int(round(c["avg_earnings"] * w_mult * t_mult, 0))
+
+
+def test_time_block_selection_matches_scoring_at_that_hour(gps_db):
+    rng = np.random.default_rng(8)
+    _upsert(gps_db, _rows(rng, range(1, 301), datetime(2026, 10, 1)))
+    stored = zone_clustering.run_clustering()
+    max_size = max(c["point_count"] for c in stored["clusters"])
+
+    for hour in range(24):
+        result = zone_clustering.select_time_block(stored, hour)
+        assert result["time_block"] == zone_clustering._time_multiplier(hour)[1]
+        scores = [c["score"] for c in result["clusters"]]
+        assert scores == sorted(scores, reverse=True)
+        for c in result["clusters"]:
+            assert (c["score"], c["demand_level"], c["est_earnings_per_hr"]) == \
+                _legacy_score(c, 1.0, hour, max_size)
+
+    # results cached before per-block scores pass through untouched
+    legacy = {"clusters": [{"score": 50.0}], "time_block": "evening"}
+    assert zone_clustering.select_time_block(legacy, 8) is legacy
+
+
+def test_cities_are_clustered_independently(gps_db):
+    rng = np.random.default_rng(7)
+    t0 = datetime(2026, 10, 1)
+    _upsert(gps_db, _rows(rng, range(1, 301), t0))
+    _upsert(gps_db, _rows(rng, range(1, 101), t0), table="pune_gps_points")
+
+    mumbai = zone_clustering.run_clustering("mumbai")
+    pune = zone_clustering.run_clustering("pune")
+    assert (mumbai["city"], pune["city"]) == ("mumbai", "pune")
+    assert len(zone_clustering._states["mumbai"].dbscan) == 300
+    assert len(zone_clustering._states["pune"].dbscan) == 100
+
+    # a change in one city leaves the other's state alone
+    _upsert(gps_db, _rows(rng, [301], t0 + timedelta(minutes=5)), table="pune_gps_points")
+    zone_clustering.run_clustering("pune")
+    assert len(zone_clustering._states["pune"].dbscan) == 101
+    assert len(zone_clustering._states["mumbai"].dbscan) == 300
+
+    with pytest.raises(KeyError):
+        zone_clustering.run_clustering("atlantis")
+
+
+def test_table_without_updated_at_is_refit_every_run(gps_db, caplog):
+    from sqlalchemy import text
+
+    rng = np.random.default_rng(9)
+    with gps_db.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE pune_gps_points")
+        conn.exec_driver_sql(
+            "CREATE TABLE pune_gps_points (id INTEGER PRIMARY KEY, lat REAL, lng REAL, "
+            "avg_earnings REAL, avg_incentives REAL, total_orders REAL, active_workers INTEGER)"
+        )
+    rows = [{k: v for k, v in r.items() if k != "updated_at"}
+            for r in _rows(rng, range(1, 101), None)]
+    with gps_db.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO pune_gps_points VALUES (:id, :lat, :lng, :avg_earnings, "
+            ":avg_incentives, :total_orders, :active_workers)"
+        ), rows)
+
+    with caplog.at_level("WARNING", logger="zone_clustering"):
+        first = zone_clustering.run_clustering("pune")
+        second = zone_clustering.run_clustering("pune")
+    assert _summary(first) == _summary(second)
+    assert zone_clustering._states["pune"].runs_since_refit == 0
+    warnings = [r for r in caplog.records if "no updated_at column" in r.getMessage()]
+    assert len(warnings) == 1               # logged once per table, not per run
+
+
+def _root_log_level():
+    import logging
+    logging.getLogger("zone_clustering").warning("hello from shard %d", os.getpid())
+    return logging.getLogger().level, os.getpid()
+
+
+def test_shard_processes_inherit_logging(capfd, monkeypatch):
+    import logging
+
+    from utils import executors
+
+    root = logging.getLogger()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("SHARDLOG %(levelname)s [%(name)s] %(message)s"))
+    monkeypatch.setattr(root, "handlers", [handler])
+    monkeypatch.setattr(root, "level", logging.INFO)
+    monkeypatch.setattr(executors, "_shards", [None])
+
+    shard = executors._get_shard(0)
+    try:
+        level, pid = shard.submit(_root_log_level).result(60)
+    finally:
+        shard.shutdown()
+
+    assert level == logging.INFO and pid != os.getpid()
+    assert f"SHARDLOG WARNING [zone_clustering] hello from shard {pid}" in capfd.readouterr().err
+
+
+def test_city_config_rejects_unsafe_table_names():
+    cities = zone_clustering._load_cities('[{"name": "Delhi", "lat": 28.6, "lng": 77.2}]')
+    assert cities["delhi"].table == "delhi_gps_points"
+    assert "mumbai" in cities
+    with pytest.raises(ValueError):
+        zone_clustering._load_cities(
+            '[{"name": "x", "lat": 0, "lng": 0, "table": "t; DROP TABLE users"}]'
+        )
+
+
+# ── nearby-zone index ───────────────────────────────────────────
+def _synthetic_result(rng, n):
+    centers = _random_coords(rng, n) + rng.normal(0, 0.05, (n, 2))
+    return {"city": "mumbai", "generated_at": "t0", "clusters": [{
+        "cluster_id": i, "center_lat": float(lat), "center_lng": float(lng),
+        "radius_km": float(rng.uniform(0, 1.5)), "score": float(rng.uniform(5, 100)),
+    } for i, (lat, lng) in enumerate(centers)]}
+
+
+def _brute_force_nearby(result, lat, lng, k, scale_km):
+    ranked = []
+    for c in result["clusters"]:
+        d = zone_clustering._haversine_km(lat, lng, c["center_lat"], c["center_lng"])
+        ranked.append((-c["score"] * math.exp(-max(0.0, d - c["radius_km"]) / scale_km),
+                       d, c["cluster_id"]))
+    return [cid for _, _, cid in sorted(ranked)[:k]]
+
+
+@pytest.mark.parametrize("n,k,scale_km", [(3, 5, 2.0), (60, 5, 2.0), (400, 10, 0.5), (400, 3, 50.0)])
+def test_zone_index_matches_brute_force(n, k, scale_km):
+    rng = np.random.default_rng(n + k)
+    result = _synthetic_result(rng, n)
+    index = ZoneIndex(result, distance_scale_km=scale_km)
+
+    for lat, lng in _random_coords(rng, 25) + rng.normal(0, 0.05, (25, 2)):
+        zones = index.nearby(lat, lng, k)
+        assert [z["cluster_id"] for z in zones] == \
+            _brute_force_nearby(result, lat, lng, k, scale_km)
+        assert all(zones[i]["nearby_score"] >= zones[i + 1]["nearby_score"]
+                   for i in range(len(zones) - 1))
+
+
+def test_zone_index_empty_result():
+    assert ZoneIndex({"clusters": []}).nearby(19.07, 72.87, 5) == []
+
+
+# ── /zones/current: single-flight + stale-while-revalidate ──────
+@pytest.fixture
+def zones_router(monkeypatch):
+    import routers.zones as zones
+
+    calls = []
+
+    async def fake_shard(city, fn, *args):
+        calls.append(city)
+        await asyncio.sleep(0.05)
+        return {"city": city, "clusters": [],
+                "generated_at": datetime.now(timezone.utc).isoformat()}
+
+    monkeypatch.setattr(zones, "run_in_shard", fake_shard)
+    monkeypatch.setattr(zones, "_read_cached_clusters", lambda city: None)
+    monkeypatch.setattr(zones, "_latest", {})
+    monkeypatch.setattr(zones, "_indexes", {})
+    monkeypatch.setattr(zones, "_inflight", {})
+    return zones, calls
+
+
+def test_concurrent_misses_share_one_clustering_run(zones_router):
+    zones, calls = zones_router
+
+    async def scenario():
+        return await asyncio.gather(*(zones.zones_current("mumbai") for _ in range(20)))
+
+    results = asyncio.run(scenario())
+    assert calls == ["mumbai"]
+    assert all(r == results[0] for r in results)
+
+
+def test_stale_result_served_while_refreshing(zones_router):
+    zones, calls = zones_router
+    stale = {"city": "mumbai", "clusters": [],
+             "generated_at": (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()}
+    zones._publish(stale)
+
+    async def scenario():
+        first = await zones.zones_current("mumbai")    # stale, refresh starts
+        second = await zones.zones_current("mumbai")   # still stale, no new run
+        await asyncio.sleep(0.1)
+        third = await zones.zones_current("mumbai")    # refreshed, from memory
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first["generated_at"] == second["generated_at"] == stale["generated_at"]
+    assert third["generated_at"] > stale["generated_at"]
+    assert calls == ["mumbai"]
+
+
+def test_last_known_good_survives_redis_and_clustering_failures(zones_router, monkeypatch):
+    zones, _ = zones_router
+    stale = {"city": "mumbai", "clusters": [],
+             "generated_at": (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()}
+    zones._publish(stale)
+
+    def redis_down(city):
+        raise ConnectionError("redis down")
+
+    async def failing_shard(city, fn, *args):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(zones, "_read_cached_clusters", redis_down)
+    monkeypatch.setattr(zones, "run_in_shard", failing_shard)
+
+    async def scenario():
+        result = await zones.zones_current("mumbai")
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(scenario())["generated_at"] == stale["generated_at"]
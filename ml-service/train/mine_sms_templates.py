@@ -0,0 +1,94 @@
+"""
+Mine the SMS template table used by SmsClassifier's fast path.
+
+    python train/mine_sms_templates.py data/training/sms_corpus.csv \
+        --out data/saved_models/sms_templates.json
+
+The corpus is either a CSV with a ``body`` column (optional ``category``
+and ``amount_rupees`` label columns) or plain text, one SMS per line.
+Rows without labels are labelled by the saved model, with the template
+fast path switched off.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from models.sms_classifier import (  # noqa: E402
+    SMS_TEMPLATES_FILE,
+    SmsClassifier,
+    mine_templates,
+)
+
+logger = logging.getLogger("mine_sms_templates")
+
+
+def _read_corpus(path: str) -> list[dict]:
+    with open(path, encoding="utf-8", newline="") as fh:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(fh))
+            if rows and "body" not in rows[0]:
+                raise SystemExit(f"{path}: CSV corpus needs a 'body' column")
+            return rows
+        return [{"body": line.rstrip("\n")} for line in fh if line.strip()]
+
+
+def _label(rows: list[dict], models_dir: str):
+    """Yield (body, category, amount_rupees), filling gaps from the model."""
+    unlabelled = [r["body"] for r in rows if not r.get("category")]
+    predicted = iter(())
+    if unlabelled:
+        classifier = SmsClassifier(cache_size=0, redis_ttl=0, use_templates=False)
+        classifier.load(models_dir)
+        if not classifier.is_loaded:
+            raise SystemExit(f"corpus has unlabelled rows but no SMS model in {models_dir}")
+        predicted = iter(classifier.classify_batch(unlabelled))
+
+    for row in rows:
+        if row.get("category"):
+            amount = row.get("amount_rupees")
+            amount = float(amount) if amount not in (None, "") else None
+            yield row["body"], row["category"].lower(), amount
+        else:
+            result = next(predicted)
+            yield row["body"], result["category"], result["amount_rupees"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("corpus", help="CSV (body[,category,amount_rupees]) or .txt corpus")
+    parser.add_argument("--models-dir", default="./data/saved_models")
+    parser.add_argument("--out", default=None,
+                        help=f"output path (default <models-dir>/{SMS_TEMPLATES_FILE})")
+    parser.add_argument("--min-support", type=int, default=5)
+    parser.add_argument("--min-purity", type=float, default=0.95)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    rows = _read_corpus(args.corpus)
+    templates = mine_templates(
+        _label(rows, args.models_dir),
+        min_support=args.min_support,
+        min_purity=args.min_purity,
+    )
+
+    covered = sum(t["support"] for t in templates.values())
+    out = args.out or os.path.join(args.models_dir, SMS_TEMPLATES_FILE)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump({"version": 1, "templates": templates}, fh, indent=1, sort_keys=True)
+
+    logger.info(
+        "Mined %d templates covering %d / %d messages (%.1f%%) → %s",
+        len(templates), covered, len(rows),
+        100.0 * covered / len(rows) if rows else 0.0, out,
+    )
+
+
+if __name__ == "__main__":
+    main()
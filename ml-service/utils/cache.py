@@ -0,0 +1,101 @@
+"""
+Cache helpers shared across the ML service.
+
+  * ``get_redis()`` — lazily connected Redis client from ``REDIS_URL``
+                      (None when unset or unreachable; callers skip caching)
+  * ``redis_status()`` — configured / connected, without connecting
+  * ``LRUCache``    — bounded, thread-safe in-process LRU with hit/miss counters
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# ── Redis (optional) ────────────────────────────────────────────
+_redis_client = None
+
+
+def get_redis():
+    global _redis_client
+    if _redis_client is not None:
+        return _redis_client
+    redis_url = os.getenv("REDIS_URL", "")
+    if not redis_url:
+        return None
+    try:
+        import redis as _redis
+        _redis_client = _redis.from_url(redis_url, decode_responses=True)
+        _redis_client.ping()
+        logger.info("Redis connected for ML caching")
+        return _redis_client
+    except Exception as exc:
+        logger.warning("Redis unavailable: %s — will skip caching", exc)
+        _redis_client = None
+        return None
+
+
+def redis_status() -> dict:
+    """
+    Whether Redis is configured and a client is currently held.  Never
+    connects — ``get_redis()`` retries a blocking connect on every call
+    while Redis is down, so health probes on the event loop use this.
+    """
+    return {
+        "configured": bool(os.getenv("REDIS_URL", "")),
+        "connected": _redis_client is not None,
+    }
+
+
+# ── In-process LRU ──────────────────────────────────────────────
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded least-recently-used mapping, safe to share between threads."""
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max(0, int(max_size))
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value) -> None:
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -2,6 +2,20 @@
 Database utility — direct PostgreSQL queries via SQLAlchemy.
 
 Reads DATABASE_URL from the backend .env (shared Neon Postgres).
+
+Two engines over the same database:
+  * ``get_async_engine()`` — asyncpg, for ``async def`` routes
+                             (DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT)
+  * ``get_engine()``       — synchronous psycopg2, for code already running
+                             off the event loop (zone clustering shards)
+                             (DB_SYNC_POOL_SIZE)
+Both set a server-side statement timeout (DB_STATEMENT_TIMEOUT_MS).
+
+Batch jobs use the bulk fetchers (``get_earnings_bulk`` …): one
+``user_id = ANY(:uids)`` query per DB_BULK_USERS users, streamed through a
+server-side cursor and returned as ``UserColumns`` — one NumPy array per
+column plus per-user row offsets, no per-row dicts.  The BigInt paise
+columns (``net_amount``, ``amount``) come back as float64.
 """
 
 import logging
@@ -9,6 +23,7 @@ import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
+import numpy as np
 from dotenv import load_dotenv
 
 logger = logging.getLogger(__name__)
@@ -23,19 +38,39 @@ if os.path.exists(_ml_env):
     load_dotenv(_ml_env, override=True)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_SYNC_POOL_SIZE = int(os.getenv("DB_SYNC_POOL_SIZE", "3"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+# Bulk fetches: users per ANY(:uids) query, rows per cursor round trip
+DB_BULK_USERS = int(os.getenv("DB_BULK_USERS", "5000"))
+DB_FETCH_CHUNK_ROWS = int(os.getenv("DB_FETCH_CHUNK_ROWS", "10000"))
 
-# Lazy-init engine
+# Lazy-init engines
 _engine = None
+_async_engine = None
+
+
+def _is_postgres(url) -> bool:
+    return url.get_backend_name() == "postgresql"
 
 
 def _get_engine():
     global _engine
     if _engine is None:
         from sqlalchemy import create_engine
+        from sqlalchemy.engine import make_url
 
         if not DATABASE_URL:
             raise RuntimeError("DATABASE_URL not set")
-        _engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_size=3)
+        url = make_url(DATABASE_URL)
+        connect_args = {}
+        if _is_postgres(url) and DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+        _engine = create_engine(
+            url, pool_pre_ping=True, pool_size=DB_SYNC_POOL_SIZE, connect_args=connect_args,
+        )
         logger.info("SQLAlchemy engine created")
     return _engine
 
@@ -44,61 +79,288 @@ def _get_engine():
 get_engine = _get_engine
 
 
-def get_earnings_last_90(user_id: str) -> List[Dict[str, Any]]:
+def _async_url(database_url: str):
+    """
+    DATABASE_URL → (asyncpg URL, connect_args).  libpq-only query options
+    (``sslmode``, ``channel_binding``) are not asyncpg arguments: sslmode
+    becomes asyncpg's ``ssl`` and the rest are dropped.
+    """
+    from sqlalchemy.engine import make_url
+
+    url = make_url(database_url)
+    connect_args: dict = {}
+    if not _is_postgres(url):
+        return url, connect_args
+
+    query = dict(url.query)
+    sslmode = query.pop("sslmode", None)
+    query.pop("channel_binding", None)
+    if sslmode:
+        connect_args["ssl"] = sslmode
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+        # client-side backstop, a little past the server's own limit
+        connect_args["command_timeout"] = DB_STATEMENT_TIMEOUT_MS / 1000 + 5
+    return url.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        if not DATABASE_URL:
+            raise RuntimeError("DATABASE_URL not set")
+        url, connect_args = _async_url(DATABASE_URL)
+        _async_engine = create_async_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            connect_args=connect_args,
+        )
+        logger.info("Async SQLAlchemy engine created (pool %d + %d overflow)",
+                    DB_POOL_SIZE, DB_MAX_OVERFLOW)
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+
+
+async def fetch_all(query: str, params: dict | None = None) -> List[Dict[str, Any]]:
+    """Run a SELECT on the async engine; rows as dicts."""
+    from sqlalchemy import text
+
+    async with get_async_engine().connect() as conn:
+        result = await conn.execute(text(query), params or {})
+        return [dict(r) for r in result.mappings().all()]
+
+
+async def fetch_scalar(query: str, params: dict | None = None):
+    from sqlalchemy import text
+
+    async with get_async_engine().connect() as conn:
+        return (await conn.execute(text(query), params or {})).scalar()
+
+
+async def get_earnings_last_90(user_id: str) -> List[Dict[str, Any]]:
     """
     Fetch earnings rows for a user from the last 90 days.
 
     Returns list of dicts with keys:
       date, net_amount, hours_worked, trips_count, platform
     """
-    from sqlalchemy import text
-
-    engine = _get_engine()
     cutoff = (datetime.utcnow() - timedelta(days=90)).date()
 
-    query = text("""
+    query = """
         SELECT date, net_amount, hours_worked, trips_count, platform
         FROM earnings
         WHERE user_id = :uid AND date >= :cutoff
         ORDER BY date ASC
-    """)
+    """
 
     try:
-        with engine.connect() as conn:
-            rows = conn.execute(query, {"uid": user_id, "cutoff": cutoff}).mappings().all()
-            result = [dict(r) for r in rows]
-            logger.info("Fetched %d earnings rows for user %s", len(result), user_id)
-            return result
+        result = await fetch_all(query, {"uid": user_id, "cutoff": cutoff})
+        logger.info("Fetched %d earnings rows for user %s", len(result), user_id)
+        return result
     except Exception as exc:
         logger.error("get_earnings_last_90 failed: %s", exc)
         return []
 
 
-def get_expenses_last_90(user_id: str) -> List[Dict[str, Any]]:
+async def get_forecast_history(user_id: str) -> List[Dict[str, Any]]:
+    """
+    Fetch a user's full forecast_data history, oldest first — the rows the
+    earnings model's lag features are built from.
+
+    Returns list of dicts with keys:
+      date, worked, rainfall_mm, temp_celsius, average_rating,
+      incentives_earned, net_earnings, efficiency_ratio
+
+    Unlike the fetchers above, database errors propagate: the result is
+    cached in the feature store, and an empty history there would serve
+    wrong lags until it expires.
+    """
+    query = """
+        SELECT date, worked, rainfall_mm, temp_celsius, average_rating,
+               incentives_earned, net_earnings, efficiency_ratio
+        FROM forecast_data
+        WHERE user_id = :uid
+        ORDER BY date ASC
+    """
+
+    result = await fetch_all(query, {"uid": user_id})
+    logger.info("Fetched %d forecast rows for user %s", len(result), user_id)
+    return result
+
+
+async def get_expenses_last_90(user_id: str) -> List[Dict[str, Any]]:
     """
     Fetch expense rows for a user from the last 90 days.
 
     Returns list of dicts with keys:
       date, category, amount, is_tax_deductible, merchant
     """
-    from sqlalchemy import text
-
-    engine = _get_engine()
     cutoff = (datetime.utcnow() - timedelta(days=90)).date()
 
-    query = text("""
+    query = """
         SELECT date, category, amount, is_tax_deductible, merchant
         FROM expenses
         WHERE user_id = :uid AND date >= :cutoff
         ORDER BY date ASC
-    """)
+    """
 
     try:
-        with engine.connect() as conn:
-            rows = conn.execute(query, {"uid": user_id, "cutoff": cutoff}).mappings().all()
-            result = [dict(r) for r in rows]
-            logger.info("Fetched %d expense rows for user %s", len(result), user_id)
-            return result
+        result = await fetch_all(query, {"uid": user_id, "cutoff": cutoff})
+        logger.info("Fetched %d expense rows for user %s", len(result), user_id)
+        return result
     except Exception as exc:
         logger.error("get_expenses_last_90 failed: %s", exc)
         return []
+
+
+# ═══════════════════════════════════════════════════════════════
+#  Bulk, columnar fetches
+# ═══════════════════════════════════════════════════════════════
+class UserColumns:
+    """
+    Rows for many users as columns.  User ``user_ids[i]`` owns rows
+    ``offsets[i]:offsets[i + 1]`` of every column (in date order); users
+    with no rows get an empty slice.
+    """
+
+    def __init__(self, user_ids: list[str], offsets: np.ndarray, columns: dict[str, np.ndarray]):
+        self.user_ids = user_ids
+        self.offsets = offsets
+        self.columns = columns
+        self._position = {uid: i for i, uid in enumerate(user_ids)}
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.offsets[-1])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def rows_of(self, user_id: str) -> slice:
+        i = self._position[user_id]
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def user(self, user_id: str) -> dict[str, np.ndarray]:
+        """One user's columns (views, not copies)."""
+        rows = self.rows_of(user_id)
+        return {name: values[rows] for name, values in self.columns.items()}
+
+    def to_frame(self):
+        """A pandas DataFrame with a ``user_id`` column in front."""
+        import pandas as pd
+
+        counts = np.diff(self.offsets)
+        frame = pd.DataFrame(self.columns, copy=False)
+        frame.insert(0, "user_id", np.repeat(np.asarray(self.user_ids, dtype=object), counts))
+        return frame
+
+
+# column → NumPy dtype (None = object).  NULLs become NaN / NaT / False /
+# None, so nullable columns must use a float, datetime, bool or object
+# dtype; integer dtypes are only for NOT NULL columns (forecast_data.worked).
+# BigInt paise amounts (earnings.net_amount, expenses.amount) are cast to
+# float64 — exact up to 2**53 paise.
+EARNINGS_BULK_COLUMNS = {
+    "date": "datetime64[D]",
+    "net_amount": "float64",
+    "hours_worked": "float64",
+    "trips_count": "float64",
+    "platform": None,
+}
+FORECAST_BULK_COLUMNS = {
+    "date": "datetime64[D]",
+    "worked": "int64",
+    "rainfall_mm": "float64",
+    "temp_celsius": "float64",
+    "average_rating": "float64",
+    "incentives_earned": "float64",
+    "net_earnings": "float64",
+    "efficiency_ratio": "float64",
+}
+EXPENSES_BULK_COLUMNS = {
+    "date": "datetime64[D]",
+    "category": None,
+    "amount": "float64",
+    "is_tax_deductible": "bool",
+    "merchant": None,
+}
+
+
+def _to_user_columns(user_ids: list[str], chunks: list,
+                     spec: dict[str, str | None]) -> UserColumns:
+    """
+    ``(user_id, *spec columns)`` row chunks → ``UserColumns``, rows grouped
+    by ``user_ids`` order and kept in query order within each user.
+    """
+    position = {uid: i for i, uid in enumerate(user_ids)}
+    raw: list[list] = [[] for _ in range(len(spec) + 1)]
+    for chunk in chunks:
+        if chunk:
+            for values, column in zip(raw, zip(*chunk)):
+                values.extend(column)
+
+    codes = np.fromiter((position[uid] for uid in raw[0]), dtype=np.int64, count=len(raw[0]))
+    order = np.argsort(codes, kind="stable")
+    offsets = np.zeros(len(user_ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=len(user_ids)), out=offsets[1:])
+
+    columns = {}
+    for values, (name, dtype) in zip(raw[1:], spec.items()):
+        if dtype == "bool":
+            values = [bool(v) for v in values]
+        columns[name] = np.array(values, dtype=dtype or object)[order]
+    return UserColumns(user_ids, offsets, columns)
+
+
+async def _fetch_bulk(table: str, spec: dict[str, str | None], user_ids: list[str],
+                      days: int | None) -> UserColumns:
+    """``days=None`` fetches each user's full history."""
+    from sqlalchemy import text
+
+    user_ids = list(dict.fromkeys(user_ids))
+    cutoff = (datetime.utcnow() - timedelta(days=days)).date() if days is not None else None
+    query = text(f"""
+        SELECT user_id, {", ".join(spec)}
+        FROM {table}
+        WHERE user_id = ANY(:uids){" AND date >= :cutoff" if cutoff else ""}
+        ORDER BY user_id, date ASC
+    """)
+
+    chunks: list = []
+    async with get_async_engine().connect() as conn:
+        for start in range(0, len(user_ids), DB_BULK_USERS):
+            batch = user_ids[start:start + DB_BULK_USERS]
+            result = await conn.stream(query, {"uids": batch, "cutoff": cutoff})
+            async for partition in result.partitions(DB_FETCH_CHUNK_ROWS):
+                chunks.append(partition)
+
+    columns = _to_user_columns(user_ids, chunks, spec)
+    logger.info("Bulk-fetched %d %s rows for %d users", columns.n_rows, table, len(user_ids))
+    return columns
+
+
+async def get_earnings_bulk(user_ids: list[str], days: int = 90) -> UserColumns:
+    """Earnings of many users over the last ``days`` days, columnar."""
+    return await _fetch_bulk("earnings", EARNINGS_BULK_COLUMNS, user_ids, days)
+
+
+async def get_expenses_bulk(user_ids: list[str], days: int = 90) -> UserColumns:
+    """Expenses of many users over the last ``days`` days, columnar."""
+    return await _fetch_bulk("expenses", EXPENSES_BULK_COLUMNS, user_ids, days)
+
+
+async def get_forecast_bulk(user_ids: list[str], days: int | None = None) -> UserColumns:
+    """forecast_data of many users (full history by default), columnar."""
+    return await _fetch_bulk("forecast_data", FORECAST_BULK_COLUMNS, user_ids, days)
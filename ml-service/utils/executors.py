@@ -0,0 +1,232 @@
+"""
+Executor layer — keeps blocking work off the asyncio event loop.
+
+Three pools, created lazily or up front by ``start_executors()``:
+  * thread pool  — GIL-releasing NumPy / scikit-learn calls and blocking
+                   SQLAlchemy / Redis I/O        (ML_THREAD_WORKERS, default 8)
+  * process pool — pandas-heavy feature engineering
+                                                  (ML_PROCESS_WORKERS, default 2;
+                                                   0 → run on the thread pool)
+  * shard pool   — single-process shards for stateful per-key work such as
+                   per-city zone clustering; a key always lands on the same
+                   shard, so module state it builds up survives between calls
+                                                  (ML_SHARD_WORKERS, default 2;
+                                                   0 → run on the thread pool)
+
+Routes ``await run_in_thread(fn, ...)`` / ``await run_in_process(fn, ...)``
+/ ``await run_in_shard(key, fn, ...)``.  Process-pool callables and
+arguments must be picklable (module-level functions, DataFrames, plain
+data).  Queue depth and wait time per pool are reported by
+``executor_stats()`` on ``/health``.  Spawned workers configure logging
+with the parent's level and format, so their log lines are not lost.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+ML_THREAD_WORKERS = int(os.getenv("ML_THREAD_WORKERS", "8"))
+ML_PROCESS_WORKERS = int(os.getenv("ML_PROCESS_WORKERS", "2"))
+ML_SHARD_WORKERS = int(os.getenv("ML_SHARD_WORKERS", "2"))
+
+
+def _worker_logging() -> tuple:
+    """The parent's root log level and format, for spawned workers to copy."""
+    root = logging.getLogger()
+    formatter = root.handlers[0].formatter if root.handlers else None
+    return root.level, formatter._fmt if formatter is not None else None
+
+
+def _init_worker_logging(level: int, fmt: str | None) -> None:
+    """Process initializer: spawned workers start with logging unconfigured."""
+    logging.basicConfig(level=level, format=fmt)
+
+
+def _timed_call(fn, args, kwargs):
+    """Runs inside the worker — reports when the job actually started."""
+    started_at = time.time()
+    return started_at, fn(*args, **kwargs)
+
+
+class _PoolStats:
+    """Thread-safe counters for one pool."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+        self.wait_last_s = 0.0
+
+    def on_submit(self) -> None:
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+
+    def on_done(self, waited_s: float | None, ok: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            if waited_s is not None:
+                waited_s = max(0.0, waited_s)
+                self.wait_total_s += waited_s
+                self.wait_max_s = max(self.wait_max_s, waited_s)
+                self.wait_last_s = waited_s
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timed = self.completed
+            return {
+                "workers": self.workers,
+                "in_flight": self.in_flight,
+                "queue_depth": max(0, self.in_flight - self.workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "wait_ms_avg": round(self.wait_total_s / timed * 1000, 2) if timed else 0.0,
+                "wait_ms_max": round(self.wait_max_s * 1000, 2),
+                "wait_ms_last": round(self.wait_last_s * 1000, 2),
+            }
+
+
+_thread_pool: ThreadPoolExecutor | None = None
+_process_pool: ProcessPoolExecutor | None = None
+_thread_stats = _PoolStats("thread", ML_THREAD_WORKERS)
+_process_stats = _PoolStats("process", ML_PROCESS_WORKERS)
+_shards: list[ProcessPoolExecutor | None] = [None] * max(0, ML_SHARD_WORKERS)
+_shard_stats = _PoolStats("shard", ML_SHARD_WORKERS)
+_init_lock = threading.Lock()
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        with _init_lock:
+            if _thread_pool is None:
+                _thread_pool = ThreadPoolExecutor(
+                    max_workers=ML_THREAD_WORKERS, thread_name_prefix="ml-worker"
+                )
+                logger.info("Thread pool started (%d workers)", ML_THREAD_WORKERS)
+    return _thread_pool
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        with _init_lock:
+            if _process_pool is None:
+                # spawn, not fork: the parent runs uvicorn + scheduler threads
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=ML_PROCESS_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker_logging,
+                    initargs=_worker_logging(),
+                )
+                logger.info("Process pool started (%d workers)", ML_PROCESS_WORKERS)
+    return _process_pool
+
+
+def _get_shard(index: int) -> ProcessPoolExecutor:
+    if _shards[index] is None:
+        with _init_lock:
+            if _shards[index] is None:
+                _shards[index] = ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker_logging, initargs=_worker_logging(),
+                )
+                logger.info("Shard %d started", index)
+    return _shards[index]
+
+
+def shard_of(key: str) -> int:
+    """Stable shard index for ``key`` (crc32, not the salted ``hash()``)."""
+    return zlib.crc32(key.encode()) % ML_SHARD_WORKERS
+
+
+async def _dispatch(pool: Executor, stats: _PoolStats, fn, args, kwargs):
+    loop = asyncio.get_running_loop()
+    submitted_at = time.time()
+    stats.on_submit()
+    try:
+        started_at, result = await loop.run_in_executor(
+            pool, functools.partial(_timed_call, fn, args, kwargs)
+        )
+    except Exception:
+        stats.on_done(None, ok=False)
+        raise
+    stats.on_done(started_at - submitted_at, ok=True)
+    return result
+
+
+async def run_in_thread(fn, *args, **kwargs):
+    """Run ``fn(*args, **kwargs)`` on the shared thread pool."""
+    return await _dispatch(_get_thread_pool(), _thread_stats, fn, args, kwargs)
+
+
+async def run_in_process(fn, *args, **kwargs):
+    """Run ``fn(*args, **kwargs)`` on the process pool (thread pool if disabled)."""
+    if ML_PROCESS_WORKERS <= 0:
+        return await run_in_thread(fn, *args, **kwargs)
+    return await _dispatch(_get_process_pool(), _process_stats, fn, args, kwargs)
+
+
+async def run_in_shard(key: str, fn, *args, **kwargs):
+    """
+    Run ``fn(*args, **kwargs)`` in the single-worker process owning ``key``.
+
+    Calls for one key run one at a time, in order, in the same process
+    (thread pool if shards are disabled).
+    """
+    if ML_SHARD_WORKERS <= 0:
+        return await run_in_thread(fn, *args, **kwargs)
+    return await _dispatch(_get_shard(shard_of(key)), _shard_stats, fn, args, kwargs)
+
+
+def start_executors() -> None:
+    """Create the pools up front and spawn the process workers."""
+    _get_thread_pool()
+    if ML_PROCESS_WORKERS > 0:
+        pool = _get_process_pool()
+        for _ in range(ML_PROCESS_WORKERS):
+            pool.submit(os.getpid)
+    for index in range(len(_shards)):
+        _get_shard(index).submit(os.getpid)
+
+
+def executor_stats() -> dict:
+    """Queue-depth and wait-time metrics for every pool."""
+    return {
+        "thread": _thread_stats.snapshot(),
+        "process": _process_stats.snapshot() if ML_PROCESS_WORKERS > 0 else None,
+        "shard": _shard_stats.snapshot() if ML_SHARD_WORKERS > 0 else None,
+    }
+
+
+def shutdown_executors() -> None:
+    global _thread_pool, _process_pool
+    for index, shard in enumerate(_shards):
+        if shard is not None:
+            shard.shutdown(wait=False, cancel_futures=True)
+            _shards[index] = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
@@ -0,0 +1,254 @@
+"""
+Per-user earnings feature store — the rolling lag features of the
+earnings model, kept up to date one day at a time.
+
+``RollingEarnings`` holds a 30-slot ring buffer of worked-day earnings
+plus running sums, so appending a day is O(1) and reading
+``prev_day_earnings`` / ``prev_7day_avg`` / ``prev_30day_avg`` /
+``days_active_last_7`` needs no history.  The values are the ones
+``routers.predict._engineer_features`` computes: windows count rows
+(days on record), not calendar days; averages forward-fill through idle
+spells; before any worked day they fall back to the user's mean
+worked-day earnings.
+
+``EarningsFeatureStore`` persists one state per user as JSON in Redis
+(``features:earnings:{user_id}``, FEATURE_STORE_TTL), or in process when
+Redis is unavailable.
+
+    store.rebuild(user_id, days)    # full history; days: date, worked, net_earnings, weather, …
+    store.append(user_id, days)     # later days on top of a stored state
+    state = store.get(user_id)
+    state.next_lag_features()       # lags of the day after the latest one (the forecast day)
+    state.lag_features()            # lags of the latest day itself
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime
+
+from utils.cache import get_redis
+
+FEATURE_STORE_TTL = int(os.getenv("FEATURE_STORE_TTL", str(30 * 86400)))
+
+WINDOW_SHORT = 7
+WINDOW_LONG = 30
+LAG_COLS = ("prev_day_earnings", "prev_7day_avg", "prev_30day_avg", "days_active_last_7")
+# Per-day inputs kept for the latest day
+DAY_COLS = ("worked", "rainfall_mm", "temp_celsius", "average_rating",
+            "incentives_earned", "net_earnings", "efficiency_ratio")
+
+
+class OutOfOrderDay(ValueError):
+    """A day at or before the latest stored day; rebuild the state instead."""
+
+
+class MissingState(LookupError):
+    """No stored state to append to (never built, or expired); rebuild it."""
+
+
+class RollingEarnings:
+    """Rolling lag-feature state of one user."""
+
+    def __init__(self):
+        self.n_days = 0
+        self.ring: list[float | None] = [None] * WINDOW_LONG   # worked-day earnings, None = idle
+        self.sum_short = self.sum_long = 0.0
+        self.count_short = self.count_long = 0
+        self.last_earnings: float | None = None    # forward-filled previous worked day
+        self.carry_short: float | None = None      # last defined 7-day average
+        self.carry_long: float | None = None       # last defined 30-day average
+        self.total_sum = 0.0
+        self.total_count = 0
+        self.last_day: dict | None = None          # latest day's inputs (+ "date")
+        self.lags_before_last: dict | None = None  # raw lags as of the latest day
+
+    # ── update ──────────────────────────────────────────────────
+    def push(self, day: dict) -> None:
+        """Append one day (must be later than the latest one)."""
+        day_date = _as_date(day["date"])
+        if self.last_day is not None and day_date <= _as_date(self.last_day["date"]):
+            raise OutOfOrderDay(f"{day_date} is not after {self.last_day['date']}")
+
+        self.lags_before_last = self.raw_lags()
+
+        earned = float(day["net_earnings"]) if int(day["worked"]) == 1 else None
+        slot = self.n_days % WINDOW_LONG
+        # leaving the 30-row window: the value this slot held
+        leaving_long = self.ring[slot]
+        # leaving the 7-row window: the value pushed 7 rows ago
+        leaving_short = (
+            self.ring[(self.n_days - WINDOW_SHORT) % WINDOW_LONG]
+            if self.n_days >= WINDOW_SHORT else None
+        )
+        if leaving_long is not None:
+            self.sum_long -= leaving_long
+            self.count_long -= 1
+        if leaving_short is not None:
+            self.sum_short -= leaving_short
+            self.count_short -= 1
+
+        self.ring[slot] = earned
+        self.n_days += 1
+        if earned is not None:
+            self.sum_short += earned
+            self.sum_long += earned
+            self.count_short += 1
+            self.count_long += 1
+            self.last_earnings = earned
+            self.total_sum += earned
+            self.total_count += 1
+        if self.count_short:
+            self.carry_short = self.sum_short / self.count_short
+        if self.count_long:
+            self.carry_long = self.sum_long / self.count_long
+
+        self.last_day = {"date": day_date.isoformat(),
+                         **{col: float(day[col]) for col in DAY_COLS}}
+
+    # ── read ────────────────────────────────────────────────────
+    def raw_lags(self) -> dict:
+        """Lags for a day following the current history (None = undefined)."""
+        return {
+            "prev_day_earnings": self.last_earnings,
+            "prev_7day_avg": self.carry_short,
+            "prev_30day_avg": self.carry_long,
+            "days_active_last_7": float(self.count_short),
+        }
+
+    def worker_mean(self) -> float:
+        return self.total_sum / self.total_count if self.total_count else 0.0
+
+    def fill(self, raw: dict) -> dict:
+        """Fill undefined lags with the user's mean and cast to int, as the CSV path does."""
+        mean = self.worker_mean()
+        return {col: int(mean if raw[col] is None else raw[col]) for col in LAG_COLS}
+
+    def lag_features(self) -> dict:
+        """Lags of the latest day, as ``_engineer_features`` gives its row."""
+        return self.fill(self.lags_before_last or self.raw_lags())
+
+    def next_lag_features(self) -> dict:
+        """Lags of a day after the latest one."""
+        return self.fill(self.raw_lags())
+
+    # ── (de)serialisation ───────────────────────────────────────
+    def to_dict(self) -> dict:
+        return {**vars(self), "ring": list(self.ring)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RollingEarnings":
+        state = cls()
+        vars(state).update(data)
+        state.ring = list(state.ring)    # pushes must not write through to ``data``
+        return state
+
+    @classmethod
+    def from_days(cls, days) -> "RollingEarnings":
+        state = cls()
+        for day in days:
+            state.push(day)
+        return state
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):          # also pandas.Timestamp
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])   # ISO strings, numpy.datetime64
+
+
+class EarningsFeatureStore:
+    """``RollingEarnings`` per user in Redis, or in process without Redis."""
+
+    _WATCH_RETRIES = 5
+
+    def __init__(self, ttl_s: int = FEATURE_STORE_TTL, redis_getter=get_redis):
+        self.ttl_s = ttl_s
+        self._redis = redis_getter
+        self._local: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(user_id: str) -> str:
+        return f"features:earnings:{user_id}"
+
+    def get(self, user_id: str) -> RollingEarnings | None:
+        return self.get_many([user_id])[0]
+
+    def get_many(self, user_ids: list[str]) -> list[RollingEarnings | None]:
+        """One round trip (MGET) for any number of users."""
+        r = self._redis()
+        if r is None:
+            with self._lock:
+                raw = [self._local.get(uid) for uid in user_ids]
+            return [RollingEarnings.from_dict(d) if d else None for d in raw]
+        if not user_ids:
+            return []
+        values = r.mget([self.key(uid) for uid in user_ids])
+        return [RollingEarnings.from_dict(json.loads(v)) if v else None for v in values]
+
+    def append(self, user_id: str, days: list[dict]) -> RollingEarnings:
+        """
+        Push days (in date order) onto the user's stored state.  Raises
+        ``MissingState`` when there is none and ``OutOfOrderDay`` when a
+        day is not after the latest stored day — the caller rebuilds from
+        full history instead.
+        """
+        r = self._redis()
+        if r is None:
+            with self._lock:
+                state = self._load_local(user_id)
+                for day in days:
+                    state.push(day)
+                self._local[user_id] = state.to_dict()
+                return state
+
+        import redis as _redis
+        key = self.key(user_id)
+        for _ in range(self._WATCH_RETRIES):
+            with r.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    if raw is None:
+                        raise MissingState(user_id)
+                    state = RollingEarnings.from_dict(json.loads(raw))
+                    for day in days:
+                        state.push(day)
+                    pipe.multi()
+                    pipe.setex(key, self.ttl_s, json.dumps(state.to_dict()))
+                    pipe.execute()
+                    return state
+                except _redis.WatchError:
+                    continue
+        raise RuntimeError(f"feature store: concurrent updates kept racing for {user_id}")
+
+    def rebuild(self, user_id: str, days: list[dict]) -> RollingEarnings:
+        """Replace the user's state with one built from their full history."""
+        state = RollingEarnings.from_days(days)
+        self.put(user_id, state)
+        return state
+
+    def put(self, user_id: str, state: RollingEarnings) -> None:
+        self.put_many({user_id: state})
+
+    def put_many(self, states: dict[str, RollingEarnings]) -> None:
+        """Store several users' states in one round trip."""
+        r = self._redis()
+        if r is None:
+            with self._lock:
+                for user_id, state in states.items():
+                    self._local[user_id] = state.to_dict()
+            return
+        pipe = r.pipeline(transaction=False)
+        for user_id, state in states.items():
+            pipe.setex(self.key(user_id), self.ttl_s, json.dumps(state.to_dict()))
+        pipe.execute()
+
+    def _load_local(self, user_id: str) -> RollingEarnings:
+        data = self._local.get(user_id)
+        if data is None:
+            raise MissingState(user_id)
+        return RollingEarnings.from_dict(data)
@@ -0,0 +1,119 @@
+"""
+MicroBatcher — coalesces concurrent single-item requests into one batch call.
+
+The first item to arrive opens a batch; the batch is flushed when it
+reaches ``max_batch_size`` items or ``max_delay_ms`` after it opened,
+whichever comes first.  The batch function runs on the executor thread
+pool and its results are fanned back out to each waiting caller.
+
+    batcher = MicroBatcher(earnings_model.predict_batch, max_batch_size=200)
+    result = await batcher.submit(features_dict)
+    await batcher.close()           # on shutdown: flush and wait for in-flight batches
+"""
+
+import asyncio
+import logging
+import threading
+
+from utils.executors import run_in_thread
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Async micro-batching front for a ``fn(list[item]) -> list[result]``."""
+
+    def __init__(self, batch_fn, max_batch_size: int = 200, max_delay_ms: float = 5.0):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_delay_ms = float(max_delay_ms)
+        self._pending: list[tuple[object, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()      # in-flight batches
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_seen = 0
+
+    # ── public ──────────────────────────────────────────────────
+    async def submit(self, item):
+        """Queue one item and wait for its result from the next batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay_ms / 1000, self._flush)
+
+        return await future
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_delay_ms": self.max_delay_ms,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "largest_batch": self._max_seen,
+                "pending": len(self._pending),
+            }
+
+    async def close(self, timeout_s: float = 5.0) -> None:
+        """
+        Flush queued items and wait for in-flight batches; batches still
+        running after ``timeout_s`` are cancelled, along with their callers.
+        """
+        self._flush()
+        if not self._tasks:
+            return
+        _, running = await asyncio.wait(set(self._tasks), timeout=timeout_s)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    # ── internals ───────────────────────────────────────────────
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Micro-batch task failed: %r", task.exception())
+
+    async def _run(self, batch: list[tuple[object, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(items)
+            self._max_seen = max(self._max_seen, len(items))
+
+        try:
+            results = await run_in_thread(self._batch_fn, items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"batch function returned {len(results)} results for {len(items)} items"
+                )
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:
+            logger.error("Micro-batch of %d items failed: %s", len(items), exc)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,288 @@
+"""
+Weather provider — current conditions for zone scoring without ever making
+the caller wait on the network.
+
+  * ``WeatherProvider.current(lat, lng)`` answers from an in-process cache
+    keyed by the location rounded to ~100 m.  A missing or expired entry
+    is refreshed on a background thread (one fetch per location at a
+    time); meanwhile the last value, or ``UNKNOWN_WEATHER``, is returned.
+  * Fetches go through a rate limiter (WEATHER_MAX_CALLS_PER_MIN) and a
+    circuit breaker that stops calling the backend for
+    WEATHER_BREAKER_RESET_S after WEATHER_BREAKER_FAILURES failures in a row.
+  * Backends are pluggable: ``OpenWeatherBackend`` (pooled
+    ``requests.Session``) or ``StaticWeatherBackend`` for tests and offline
+    runs.  WEATHER_BACKEND picks one; the default is OpenWeather when
+    OPENWEATHER_API_KEY is set, static otherwise.
+
+    provider = get_weather_provider()
+    provider.prefetch(19.0760, 72.8777)            # start early, returns at once
+    ...
+    weather = provider.current(19.0760, 72.8777)   # {rainfall_mm, condition}
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# .env.example documents OPENWEATHERMAP_API_KEY; the service historically read this one
+OPENWEATHER_KEY = os.getenv("OPENWEATHER_API_KEY") or os.getenv("OPENWEATHERMAP_API_KEY", "")
+WEATHER_BACKEND = os.getenv("WEATHER_BACKEND", "openweather" if OPENWEATHER_KEY else "static")
+WEATHER_TTL_S = float(os.getenv("WEATHER_TTL_S", "600"))
+WEATHER_MAX_CALLS_PER_MIN = int(os.getenv("WEATHER_MAX_CALLS_PER_MIN", "50"))
+WEATHER_BREAKER_FAILURES = int(os.getenv("WEATHER_BREAKER_FAILURES", "3"))
+WEATHER_BREAKER_RESET_S = float(os.getenv("WEATHER_BREAKER_RESET_S", "120"))
+
+UNKNOWN_WEATHER = {"rainfall_mm": 0.0, "condition": "unknown"}
+
+
+# ── Backends ────────────────────────────────────────────────────
+class StaticWeatherBackend:
+    """Fixed conditions — for tests, local runs and when no API key is set."""
+
+    def __init__(self, rainfall_mm: float = 0.0, condition: str = "unknown"):
+        self.weather = {"rainfall_mm": float(rainfall_mm), "condition": condition}
+
+    def fetch(self, lat: float, lng: float) -> dict:
+        return dict(self.weather)
+
+
+class OpenWeatherBackend:
+    """OpenWeather current-conditions API over a pooled keep-alive session."""
+
+    URL = "https://api.openweathermap.org/data/2.5/weather"
+
+    def __init__(self, api_key: str, timeout_s: float = 5.0):
+        self.api_key = api_key
+        self.timeout_s = timeout_s
+        self.session = requests.Session()
+        # retries are the provider's job (breaker + next refresh), not urllib3's
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4,
+                                                   max_retries=0))
+
+    def fetch(self, lat: float, lng: float) -> dict:
+        resp = self.session.get(
+            self.URL,
+            params={"lat": lat, "lon": lng, "appid": self.api_key},
+            timeout=self.timeout_s,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        rain = data.get("rain", {}).get("1h", 0.0)
+        cond = data.get("weather", [{}])[0].get("main", "Clear")
+        return {"rainfall_mm": float(rain), "condition": cond.lower()}
+
+
+# ── Guards ──────────────────────────────────────────────────────
+class CircuitBreaker:
+    """Closed → open after N consecutive failures → half-open after a cool-off."""
+
+    def __init__(self, failure_threshold: int = 3, reset_after_s: float = 120.0,
+                 clock=time.monotonic):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_after_s = float(reset_after_s)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_after_s:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out (one trial call once half-open)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.reset_after_s:
+                return False
+            # half-open: let one call through and re-arm the timer for the rest
+            self._opened_at = self._clock()
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+
+class RateLimiter:
+    """At most ``max_calls`` per sliding ``period_s`` window."""
+
+    def __init__(self, max_calls: int, period_s: float = 60.0, clock=time.monotonic):
+        self.max_calls = int(max_calls)
+        self.period_s = float(period_s)
+        self._clock = clock
+        self._calls: deque = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = self._clock()
+            while self._calls and now - self._calls[0] >= self.period_s:
+                self._calls.popleft()
+            if len(self._calls) >= self.max_calls:
+                return False
+            self._calls.append(now)
+            return True
+
+
+# ── Provider ────────────────────────────────────────────────────
+class WeatherProvider:
+    """Non-blocking, cached front for a weather backend."""
+
+    def __init__(self, backend, ttl_s: float = WEATHER_TTL_S,
+                 breaker: CircuitBreaker | None = None,
+                 limiter: RateLimiter | None = None,
+                 clock=time.monotonic):
+        self.backend = backend
+        self.ttl_s = float(ttl_s)
+        self.breaker = breaker or CircuitBreaker(WEATHER_BREAKER_FAILURES,
+                                                 WEATHER_BREAKER_RESET_S)
+        self.limiter = limiter or RateLimiter(WEATHER_MAX_CALLS_PER_MIN)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cache: dict[tuple, tuple[float, dict]] = {}   # key → (fetched_at, weather)
+        self._pending: set[tuple] = set()
+        self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="weather")
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.failures = 0
+        self.skipped = 0
+
+    @staticmethod
+    def _key(lat: float, lng: float) -> tuple:
+        return round(lat, 3), round(lng, 3)
+
+    def current(self, lat: float, lng: float) -> dict:
+        """Cached conditions at (lat, lng); never blocks on the backend."""
+        key = self._key(lat, lng)
+        with self._lock:
+            entry = self._cache.get(key)
+            if self._is_fresh(entry):
+                self.hits += 1
+                return dict(entry[1])
+            if entry is None:
+                self.misses += 1
+            else:
+                self.stale_hits += 1
+            self._schedule(key)
+        return dict(entry[1]) if entry is not None else dict(UNKNOWN_WEATHER)
+
+    def prefetch(self, lat: float, lng: float) -> None:
+        """Start a background refresh if (lat, lng) is missing or expired."""
+        key = self._key(lat, lng)
+        with self._lock:
+            if not self._is_fresh(self._cache.get(key)):
+                self._schedule(key)
+
+    def refresh(self, lat: float, lng: float) -> dict | None:
+        """Fetch now (blocking) and cache; None if skipped or failed."""
+        return self._fetch(self._key(lat, lng))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "locations": len(self._cache),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "fetches": self.fetches,
+                "failures": self.failures,
+                "skipped": self.skipped,
+                "breaker": self.breaker.state,
+            }
+
+    def shutdown(self) -> None:
+        self._refresher.shutdown(wait=False, cancel_futures=True)
+
+    # ── internals ───────────────────────────────────────────────
+    def _is_fresh(self, entry) -> bool:
+        return entry is not None and self._clock() - entry[0] < self.ttl_s
+
+    def _schedule(self, key: tuple) -> None:
+        """Queue one background fetch per key (caller holds the lock)."""
+        if key not in self._pending:
+            self._pending.add(key)
+            self._refresher.submit(self._refresh_key, key)
+
+    def _refresh_key(self, key: tuple) -> None:
+        try:
+            self._fetch(key)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def _fetch(self, key: tuple) -> dict | None:
+        if not self.breaker.allow() or not self.limiter.try_acquire():
+            with self._lock:
+                self.skipped += 1
+            return None
+        try:
+            weather = self.backend.fetch(*key)
+        except Exception as exc:
+            self.breaker.record_failure()
+            with self._lock:
+                self.failures += 1
+            logger.warning("Weather fetch failed for %s: %s", key, exc)
+            return None
+        self.breaker.record_success()
+        with self._lock:
+            self.fetches += 1
+            self._cache[key] = (self._clock(), weather)
+        return dict(weather)
+
+
+# ── Process-wide provider ───────────────────────────────────────
+_provider: WeatherProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def _default_backend():
+    if WEATHER_BACKEND == "openweather":
+        if OPENWEATHER_KEY:
+            return OpenWeatherBackend(OPENWEATHER_KEY)
+        logger.warning("WEATHER_BACKEND=openweather but no OPENWEATHER_API_KEY — using static")
+    elif WEATHER_BACKEND != "static":
+        logger.warning("Unknown WEATHER_BACKEND %r — using static", WEATHER_BACKEND)
+    return StaticWeatherBackend()
+
+
+def get_weather_provider() -> WeatherProvider:
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = WeatherProvider(_default_backend())
+    return _provider
+
+
+def set_weather_provider(provider: WeatherProvider | None) -> None:
+    """Swap the process-wide provider (tests, alternative backends)."""
+    global _provider
+    with _provider_lock:
+        old, _provider = _provider, provider
+    if old is not None and old is not provider:
+        old.shutdown()
@@ -1,67 +1,111 @@
 """
-zone_clustering.py — DBSCAN-based zone discovery for Mumbai delivery hotspots.
+zone_clustering.py — DBSCAN-based zone discovery for delivery hotspots.
 
 Fetches GPS points from PostgreSQL, normalizes features, weights them,
 runs DBSCAN to discover clusters, scores each cluster using weather &
 time-of-day multipliers, and caches results in Redis.
+
+Every city in ``CITIES`` is clustered independently: its own points
+table, weather, incremental state and ``zones:{city}:*`` Redis keys.
+Mumbai is the default city and still writes the original unprefixed keys.
+
+Between full fits, runs only fetch rows whose ``updated_at`` moved past
+the last watermark and update the affected neighbourhoods incrementally
+(see models/incremental_dbscan.py).  A table without ``updated_at`` is
+logged once and fully refit on every run.
+
+``updated_at`` is set by a trigger to the writing transaction's start
+time, not its commit time, so a row can become visible after the
+watermark has passed its timestamp.  Each incremental fetch therefore
+re-reads ``ZONES_WATERMARK_OVERLAP_S`` seconds behind the watermark (rows
+that did not change are dropped); a transaction that commits later than
+that is only picked up by the next full refit.
 """
 
 import json
 import logging
-import math
 import os
-from datetime import datetime, timezone
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
 
 import numpy as np
-import requests
 from sklearn.cluster import DBSCAN
 
+from models.incremental_dbscan import IncrementalDBSCAN, NeedsRefit
+from utils.cache import get_redis
 from utils.db import get_engine
+from utils.weather import get_weather_provider
 
 logger = logging.getLogger(__name__)
 
 # ── Redis (optional) ────────────────────────────────────────────
-_redis_client = None
-
-def _get_redis():
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
-    redis_url = os.getenv("REDIS_URL", "")
-    if not redis_url:
-        return None
-    try:
-        import redis as _redis
-        _redis_client = _redis.from_url(redis_url, decode_responses=True)
-        _redis_client.ping()
-        logger.info("Redis connected for zone caching")
-        return _redis_client
-    except Exception as exc:
-        logger.warning("Redis unavailable: %s — will skip caching", exc)
-        _redis_client = None
-        return None
-
-# ── Weather fetcher ─────────────────────────────────────────────
-OPENWEATHER_KEY = os.getenv("OPENWEATHER_API_KEY", "")
+_get_redis = get_redis
+
+# ── Cities ──────────────────────────────────────────────────────
 MUMBAI_LAT, MUMBAI_LNG = 19.0760, 72.8777
+DEFAULT_CITY = "mumbai"
+_NAME_RE = re.compile(r"^[a-z][a-z0-9_]*$")
 
-def _fetch_weather() -> dict:
-    """Fetch current Mumbai weather. Returns {rainfall_mm, condition}."""
-    if not OPENWEATHER_KEY:
-        return {"rainfall_mm": 0.0, "condition": "unknown"}
-    try:
-        resp = requests.get(
-            "https://api.openweathermap.org/data/2.5/weather",
-            params={"lat": MUMBAI_LAT, "lon": MUMBAI_LNG, "appid": OPENWEATHER_KEY},
-            timeout=5,
+
+class CityConfig(NamedTuple):
+    name: str
+    lat: float                 # weather lookup point
+    lng: float
+    table: str                 # GPS points table
+    interval_minutes: int = 5  # clustering schedule
+
+
+def _load_cities(raw: str) -> dict[str, CityConfig]:
+    """
+    Parse ZONE_CITIES — a JSON list of ``{"name", "lat", "lng"}`` objects
+    with optional ``"table"`` (default ``{name}_gps_points``) and
+    ``"interval_minutes"``.  Mumbai is always present; an entry can
+    override it.
+    """
+    cities = {
+        DEFAULT_CITY: CityConfig(DEFAULT_CITY, MUMBAI_LAT, MUMBAI_LNG, "mumbai_gps_points"),
+    }
+    for entry in json.loads(raw) if raw else []:
+        name = str(entry["name"]).lower()
+        table = entry.get("table", f"{name}_gps_points")
+        # both end up in SQL and Redis keys unquoted
+        for value in (name, table):
+            if not _NAME_RE.match(value):
+                raise ValueError(f"ZONE_CITIES: invalid name {value!r}")
+        cities[name] = CityConfig(
+            name, float(entry["lat"]), float(entry["lng"]), table,
+            int(entry.get("interval_minutes", 5)),
         )
-        data = resp.json()
-        rain = data.get("rain", {}).get("1h", 0.0)
-        cond = data.get("weather", [{}])[0].get("main", "Clear")
-        return {"rainfall_mm": rain, "condition": cond.lower()}
-    except Exception as exc:
-        logger.warning("Weather fetch failed: %s", exc)
-        return {"rainfall_mm": 0.0, "condition": "unknown"}
+    return cities
+
+
+CITIES = _load_cities(os.getenv("ZONE_CITIES", ""))
+
+
+def get_city(name: str) -> CityConfig:
+    """Look up a configured city; raises ``KeyError`` for unknown names."""
+    try:
+        return CITIES[name.lower()]
+    except KeyError:
+        raise KeyError(f"unknown city: {name}") from None
+
+
+# Results outlive the 5-minute schedule so the router can serve them stale
+# while it refreshes (freshness is judged from generated_at, not the TTL)
+ZONES_CACHE_TTL = int(os.getenv("ZONES_CACHE_TTL", "3600"))
+
+
+def cache_keys(city: str) -> tuple[str, str]:
+    """Redis keys (full result, top 5) for ``city``."""
+    return f"zones:{city}:clusters:current", f"zones:{city}:top5:current"
+
+
+# ── Weather ─────────────────────────────────────────────────────
+def _fetch_weather(city: CityConfig) -> dict:
+    """Current weather at the city's centre (cached, never waits on the network)."""
+    return get_weather_provider().current(city.lat, city.lng)
 
 # ── Multipliers ─────────────────────────────────────────────────
 def _weather_multiplier(rainfall_mm: float) -> float:
@@ -85,186 +129,473 @@ def _time_multiplier(hour: int) -> tuple[float, str]:
     # 22-2 late night
     return 0.85, "late_night"
 
+# block → multiplier, in day order
+TIME_BLOCK_MULTIPLIERS = {block: mult for mult, block in map(_time_multiplier, range(6, 30))}
+
+
+def current_time_block(hour: int | None = None) -> str:
+    return _time_multiplier(datetime.now().hour if hour is None else hour)[1]
+
+
+def _score_cluster(c: dict, w_mult: float, t_mult: float, max_cluster_size: int) -> dict:
+    """Score, demand level and hourly earnings of a cluster for one time block."""
+    earnings_norm = c["avg_earnings"] / 220.0
+
+    score = (
+        earnings_norm * 0.40 +
+        (t_mult / 1.60) * 0.30 +
+        (w_mult / 1.60) * 0.20 +
+        (c["point_count"] / max_cluster_size) * 0.10
+    ) * 100
+    score = round(min(100, max(0, score)), 1)
+
+    if score >= 70:
+        demand = "high"
+    elif score >= 40:
+        demand = "medium"
+    else:
+        demand = "low"
+
+    est_earn = round(c["avg_earnings"] * w_mult * t_mult, 0)
+    return {"score": score, "demand_level": demand, "est_earnings_per_hr": int(est_earn)}
+
+
+def select_time_block(result: dict, hour: int | None = None) -> dict:
+    """
+    Project a stored result onto the time block of ``hour`` (now by default):
+    each cluster's top-level score / demand_level / est_earnings_per_hr come
+    from its ``scores`` table and clusters are re-sorted by that score.
+    Results cached before per-block scores existed pass through unchanged.
+    """
+    clusters = result.get("clusters", [])
+    if not all("scores" in c for c in clusters):
+        return result
+    block = current_time_block(hour)
+    clusters = [{**c, **c["scores"][block]} for c in clusters]
+    # Sort by score descending
+    clusters.sort(key=lambda c: c["score"], reverse=True)
+    return {**result, "clusters": clusters, "time_block": block}
+
 # ── Haversine ───────────────────────────────────────────────────
 def _haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km; scalars or NumPy arrays (broadcast)."""
     R = 6371
-    dLat = math.radians(lat2 - lat1)
-    dLng = math.radians(lng2 - lng1)
-    a = (math.sin(dLat / 2) ** 2 +
-         math.cos(math.radians(lat1)) *
-         math.cos(math.radians(lat2)) *
-         math.sin(dLng / 2) ** 2)
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    dLat = np.radians(np.subtract(lat2, lat1))
+    dLng = np.radians(np.subtract(lng2, lng1))
+    a = (np.sin(dLat / 2) ** 2 +
+         np.cos(np.radians(lat1)) *
+         np.cos(np.radians(lat2)) *
+         np.sin(dLng / 2) ** 2)
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
 
 # ══════════════════════════════════════════════════════════════════
-#  Main clustering function
+#  Clustering state (full fit + incremental updates)
 # ══════════════════════════════════════════════════════════════════
-def run_clustering() -> dict:
-    """
-    Fetch 500 GPS points → normalise → DBSCAN → score clusters → cache.
-    Returns the full result dict.
-    """
-    logger.info("Starting zone clustering…")
+DBSCAN_EPS = 0.5 / 6371       # 0.5 km in radians
+DBSCAN_MIN_SAMPLES = 5
+_FEATURE_COLS = ("avg_earnings", "avg_incentives", "total_orders", "active_workers")
+_POINT_COLS = ("lat", "lng") + _FEATURE_COLS
+# Columns kept as a row-aligned array for cluster statistics
+_STAT_COLS = ("lat", "lng", "avg_earnings", "avg_incentives", "total_orders")
+
+ZONES_INCREMENTAL = os.getenv("ZONES_INCREMENTAL", "1") != "0"
+# Refit from scratch when more than this fraction of the points changed …
+ZONES_REFIT_CHANGE_FRACTION = float(os.getenv("ZONES_REFIT_CHANGE_FRACTION", "0.2"))
+# … and at least every N runs, to re-settle border-point assignment
+ZONES_REFIT_EVERY_RUNS = int(os.getenv("ZONES_REFIT_EVERY_RUNS", "12"))
+# Incremental fetches re-read this far behind the watermark, for rows whose
+# transaction committed after the watermark passed their updated_at
+ZONES_WATERMARK_OVERLAP_S = float(os.getenv("ZONES_WATERMARK_OVERLAP_S", "300"))
+
+
+class _ZoneState:
+    """Points, DBSCAN state and per-cluster properties carried between runs."""
+
+    def __init__(self, points, bounds, dbscan, watermark):
+        self.points: list[dict] = points           # row-aligned with dbscan
+        self.columns = _stat_columns(points)       # (rows, len(_STAT_COLS))
+        self.bounds: dict = bounds                 # feature → (min, max)
+        self.dbscan: IncrementalDBSCAN = dbscan
+        self.watermark = watermark                 # max updated_at seen
+        self.properties: dict[int, dict] = {}      # internal label → props
+        self.runs_since_refit = 0
+
+    def set_points(self, rows: list[int], points: list[dict]) -> None:
+        """Overwrite / append (row == len) points, keeping ``columns`` aligned."""
+        n_old = len(self.points)
+        n_new = sum(1 for row in rows if row >= n_old)
+        if n_new:
+            self.columns = np.vstack([self.columns, np.zeros((n_new, len(_STAT_COLS)))])
+        for row, p in zip(rows, points):
+            if row == len(self.points):
+                self.points.append(p)
+            else:
+                self.points[row] = p
+        self.columns[rows] = _stat_columns(points)
+
+    def refresh_properties(self, labels=None) -> None:
+        """Recompute properties of ``labels`` (all clusters when None)."""
+        all_labels = self.dbscan.labels
+        if labels is None:
+            self.properties = {}
+            rows = np.flatnonzero(all_labels >= 0)
+        else:
+            for label in labels:
+                self.properties.pop(label, None)
+            rows = np.concatenate(
+                [self.dbscan.members(label) for label in labels] + [[]]
+            ).astype(np.int64)
+        self.properties.update(_cluster_stats(self.columns[rows], all_labels[rows]))
 
-    # ── STEP 1: Fetch points from PostgreSQL ────────────────────
-    engine = get_engine()
-    from sqlalchemy import text
-    with engine.connect() as conn:
-        rows = conn.execute(text(
-            "SELECT lat, lng, avg_earnings, avg_incentives, "
-            "total_orders, active_workers FROM mumbai_gps_points"
-        )).fetchall()
-
-    if not rows:
-        logger.warning("No GPS points found in DB")
-        return _empty_result("No GPS points")
-
-    points = [dict(r._mapping) for r in rows]
-    n = len(points)
-    logger.info("Fetched %d GPS points", n)
-
-    # ── STEP 2: Normalise features & compute weight ──────────────
-    earnings   = np.array([p["avg_earnings"] for p in points])
-    incentives = np.array([p["avg_incentives"] for p in points])
-    orders     = np.array([p["total_orders"] for p in points])
-    workers    = np.array([p["active_workers"] for p in points])
-
-    def _norm(arr):
-        mn, mx = arr.min(), arr.max()
+
+# One state and lock per city; each city is only ever clustered by one
+# process (see utils/executors.run_in_shard), so states never diverge
+_states: dict[str, _ZoneState] = {}
+_state_locks = {name: threading.Lock() for name in CITIES}
+_watermark_tables: dict[str, bool] = {}        # table → has updated_at
+
+
+def _feature_bounds(points: list[dict]) -> dict:
+    return {
+        col: (min(p[col] for p in points), max(p[col] for p in points))
+        for col in _FEATURE_COLS
+    }
+
+
+def _weight_counts(points: list[dict], bounds: dict) -> np.ndarray:
+    """Normalised, weighted demand → how many times each point counts (1-10)."""
+    def _norm(col):
+        arr = np.array([p[col] for p in points], dtype=np.float64)
+        mn, mx = bounds[col]
         return (arr - mn) / (mx - mn) if mx > mn else np.zeros_like(arr)
 
-    norm_e = _norm(earnings)
-    norm_i = _norm(incentives)
-    norm_o = _norm(orders)
-    norm_w = _norm(workers)
+    norm_e = _norm("avg_earnings")
+    norm_i = _norm("avg_incentives")
+    norm_o = _norm("total_orders")
+    norm_w = _norm("active_workers")
 
     weights = norm_e * 0.40 + norm_i * 0.25 + norm_o * 0.25 + norm_w * 0.10
+    return np.maximum(1, np.round(weights * 10).astype(int))
+
+
+def _has_watermark(conn, city: CityConfig) -> bool:
+    """
+    Whether the city's table has the ``updated_at`` column incremental runs
+    need.  Checked once per table; without it every run is a full fit.
+    """
+    if city.table not in _watermark_tables:
+        from sqlalchemy import inspect
+        columns = {c["name"] for c in inspect(conn).get_columns(city.table)}
+        _watermark_tables[city.table] = "updated_at" in columns
+        if "updated_at" not in columns:
+            logger.warning(
+                "[%s] %s has no updated_at column — every run is a full DBSCAN "
+                "fit; add the column, index and touch trigger (as the "
+                "mumbai_gps_points migration does) to enable incremental runs",
+                city.name, city.table,
+            )
+    return _watermark_tables[city.table]
+
+
+def _fetch_points(conn, table: str, since=None, watermark: bool = True) -> list[dict]:
+    from sqlalchemy import text
+    query = (
+        "SELECT id, lat, lng, avg_earnings, avg_incentives, "
+        f"total_orders, active_workers{', updated_at' if watermark else ''} FROM {table}"
+    )
+    if since is None:
+        rows = conn.execute(text(query + " ORDER BY id")).fetchall()
+    else:
+        # ``since`` trails the watermark (see _watermark_floor); rows that
+        # did not actually change are filtered out by the caller
+        rows = conn.execute(
+            text(query + " WHERE updated_at >= :since ORDER BY id"), {"since": since}
+        ).fetchall()
+    return [dict(r._mapping) for r in rows]
 
-    # ── STEP 3: Repeat points by weight ─────────────────────────
-    coords = np.array([[p["lat"], p["lng"]] for p in points])
-    weight_counts = np.maximum(1, np.round(weights * 10).astype(int))
-    weighted_coords = np.repeat(coords, repeats=weight_counts, axis=0)
-    # Track which original index each weighted row came from
-    orig_indices = np.repeat(np.arange(n), repeats=weight_counts)
 
-    logger.info("Weighted coords: %d → %d rows", n, len(weighted_coords))
+def _watermark_floor(watermark):
+    """Lower bound of the next incremental fetch: the watermark minus the overlap."""
+    if isinstance(watermark, str):            # SQLite returns timestamps as text
+        watermark = datetime.fromisoformat(watermark)
+    return watermark - timedelta(seconds=ZONES_WATERMARK_OVERLAP_S)
+
+
+def _weighted_dbscan(coords: np.ndarray, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    DBSCAN over (lat, lng) degrees with per-point sample weights.
 
-    # ── STEP 4: DBSCAN ──────────────────────────────────────────
+    Returns ``(labels, core)`` per point — the same as fitting on each point
+    repeated ``weight`` times, without the repeated rows.
+    """
     db = DBSCAN(
-        eps=0.5 / 6371,       # 0.5 km in radians
-        min_samples=5,
+        eps=DBSCAN_EPS,
+        min_samples=DBSCAN_MIN_SAMPLES,
         algorithm="ball_tree",
         metric="haversine",
-    ).fit(np.radians(weighted_coords))
-
-    labels = db.labels_
-    unique_labels = set(labels)
-    unique_labels.discard(-1)
-    noise_count = int(np.sum(labels == -1))
-
-    logger.info("DBSCAN found %d clusters, %d noise rows", len(unique_labels), noise_count)
-
-    # ── STEP 5: Compute cluster properties ──────────────────────
-    clusters = []
-    for cluster_id in sorted(unique_labels):
-        mask = labels == cluster_id
-        member_orig = set(orig_indices[mask])
-
-        cluster_points = [points[i] for i in member_orig]
-        cp_lats = [p["lat"] for p in cluster_points]
-        cp_lngs = [p["lng"] for p in cluster_points]
-        center_lat = float(np.mean(cp_lats))
-        center_lng = float(np.mean(cp_lngs))
-
-        avg_earn = float(np.mean([p["avg_earnings"] for p in cluster_points]))
-        avg_incn = float(np.mean([p["avg_incentives"] for p in cluster_points]))
-        avg_ord  = float(np.mean([p["total_orders"] for p in cluster_points]))
-        point_count = len(cluster_points)
-
-        radius_km = max(
-            _haversine_km(center_lat, center_lng, p["lat"], p["lng"])
-            for p in cluster_points
-        ) if cluster_points else 0.0
-
-        clusters.append({
-            "cluster_id": int(cluster_id),
-            "center_lat": round(center_lat, 4),
-            "center_lng": round(center_lng, 4),
-            "radius_km": round(radius_km, 2),
-            "avg_earnings": round(avg_earn, 1),
-            "avg_incentives": round(avg_incn, 1),
-            "avg_orders": round(avg_ord, 1),
-            "point_count": point_count,
-        })
-
-    # ── STEP 6: Score clusters ──────────────────────────────────
-    weather = _fetch_weather()
-    w_mult = _weather_multiplier(weather["rainfall_mm"])
-    now_hour = datetime.now().hour
-    t_mult, time_block = _time_multiplier(now_hour)
+    ).fit(np.radians(coords), sample_weight=weights)
 
-    max_cluster_size = max((c["point_count"] for c in clusters), default=1)
+    core = np.zeros(len(coords), dtype=bool)
+    core[db.core_sample_indices_] = True
+    return db.labels_, core
 
-    for c in clusters:
-        earnings_norm = c["avg_earnings"] / 220.0
-
-        score = (
-            earnings_norm * 0.40 +
-            (t_mult / 1.60) * 0.30 +
-            (w_mult / 1.60) * 0.20 +
-            (c["point_count"] / max_cluster_size) * 0.10
-        ) * 100
-        score = round(min(100, max(0, score)), 1)
-
-        if score >= 70:
-            demand = "high"
-        elif score >= 40:
-            demand = "medium"
-        else:
-            demand = "low"
 
-        est_earn = round(c["avg_earnings"] * w_mult * t_mult, 0)
+def _full_fit(points: list[dict]) -> _ZoneState:
+    """Weight points, run DBSCAN and seed the incremental state."""
+    bounds = _feature_bounds(points)
+    weight_counts = _weight_counts(points, bounds)
 
-        c["score"] = score
-        c["demand_level"] = demand
-        c["est_earnings_per_hr"] = int(est_earn)
+    coords = np.array([[p["lat"], p["lng"]] for p in points])
+    labels, core = _weighted_dbscan(coords, weight_counts)
+
+    radians = np.radians(coords)
+    dbscan = IncrementalDBSCAN(DBSCAN_EPS, DBSCAN_MIN_SAMPLES).fit_from(
+        [p["id"] for p in points],
+        radians[:, 0], radians[:, 1],
+        weight_counts,
+        labels,
+        core,
+    )
+
+    state = _ZoneState(
+        points, bounds, dbscan,
+        max((p["updated_at"] for p in points if p.get("updated_at")), default=None),
+    )
+    state.refresh_properties()
+    return state
+
+
+def _apply_changes(state: _ZoneState, changed: list[dict], total_count: int) -> bool:
+    """
+    Fold changed rows into ``state``.  Returns False when a full refit is
+    needed instead: deletions, too many changes, or normalisation bounds
+    that moved (every point's weight depends on them).
+    """
+    dbscan = state.dbscan
+    changed = [
+        p for p in changed
+        if p["id"] not in dbscan
+        or any(p[col] != state.points[dbscan.row(p["id"])][col] for col in _POINT_COLS)
+    ]
+    n_new = sum(1 for p in changed if p["id"] not in dbscan)
+    if total_count != len(dbscan) + n_new:
+        logger.info("Point count %d ≠ %d known + %d new — refitting",
+                    total_count, len(dbscan), n_new)
+        return False
+    if len(changed) > ZONES_REFIT_CHANGE_FRACTION * len(dbscan):
+        logger.info("%d of %d points changed — refitting", len(changed), len(dbscan))
+        return False
+
+    if changed:
+        if not _bounds_hold(state, changed):
+            logger.info("Feature bounds moved — refitting")
+            return False
+
+        radians = np.radians([[p["lat"], p["lng"]] for p in changed])
+        try:
+            touched = dbscan.update(
+                [p["id"] for p in changed], radians[:, 0], radians[:, 1],
+                _weight_counts(changed, state.bounds),
+            )
+        except NeedsRefit as exc:
+            logger.info("%s — refitting", exc)
+            return False
+
+        state.set_points([dbscan.row(p["id"]) for p in changed], changed)
+        state.refresh_properties(touched)
+        state.watermark = max(
+            [state.watermark] + [p["updated_at"] for p in changed if p.get("updated_at")]
+        )
+
+    logger.info("Incremental update: %d changed points", len(changed))
+    state.runs_since_refit += 1
+    return True
+
+
+def _bounds_hold(state: _ZoneState, changed: list[dict]) -> bool:
+    """True when the changes leave every feature's (min, max) where it was."""
+    for p in changed:
+        old = state.points[state.dbscan.row(p["id"])] if p["id"] in state.dbscan else None
+        for col in _FEATURE_COLS:
+            mn, mx = state.bounds[col]
+            if not mn <= p[col] <= mx:
+                return False
+            # moving the point that held a bound may shrink the range
+            if old is not None and old[col] in (mn, mx) and old[col] != p[col]:
+                return False
+    return True
 
-    # Sort by score descending
-    clusters.sort(key=lambda c: c["score"], reverse=True)
 
-    result = {
+def _refresh_state(city: CityConfig, full_refit: bool = False) -> _ZoneState | None:
+    """Bring the city's state up to date with its points table."""
+    engine = get_engine()
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        state = _states.get(city.name)
+        watermark = _has_watermark(conn, city)
+        if (
+            not full_refit
+            and ZONES_INCREMENTAL
+            and watermark
+            and state is not None
+            and state.watermark is not None
+            and state.runs_since_refit < ZONES_REFIT_EVERY_RUNS
+        ):
+            changed = _fetch_points(conn, city.table, since=_watermark_floor(state.watermark))
+            total = conn.execute(text(f"SELECT COUNT(*) FROM {city.table}")).scalar()
+            if _apply_changes(state, changed, int(total or 0)):
+                return state
+
+        points = _fetch_points(conn, city.table, watermark=watermark)
+        if not points:
+            _states.pop(city.name, None)
+            return None
+        logger.info("[%s] Fetched %d GPS points — full DBSCAN fit", city.name, len(points))
+        state = _states[city.name] = _full_fit(points)
+        return state
+
+
+def _stat_columns(points: list[dict]) -> np.ndarray:
+    return np.array(
+        [[p[col] for col in _STAT_COLS] for p in points], dtype=np.float64
+    ).reshape(len(points), len(_STAT_COLS))
+
+
+def _cluster_stats(columns: np.ndarray, labels: np.ndarray) -> dict[int, dict]:
+    """
+    Centre, radius and averages for every cluster in one columnar pass.
+
+    ``columns`` holds ``_STAT_COLS`` per point and ``labels`` its cluster
+    (no noise).  Means are ``np.bincount`` sums over counts; the radius is
+    the vectorised haversine from each point to its centre, max-reduced per
+    cluster with ``np.maximum.reduceat`` over the label-sorted distances.
+    """
+    if len(labels) == 0:
+        return {}
+    cluster_ids, inverse = np.unique(labels, return_inverse=True)
+    counts = np.bincount(inverse)
+    means = np.stack(
+        [np.bincount(inverse, weights=columns[:, i]) / counts
+         for i in range(columns.shape[1])],
+        axis=1,
+    )
+    center_lat, center_lng, avg_earn, avg_incn, avg_ord = means.T
+
+    dist = _haversine_km(center_lat[inverse], center_lng[inverse],
+                         columns[:, 0], columns[:, 1])
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    radius_km = np.maximum.reduceat(dist[order], starts)
+
+    return {
+        int(label): {
+            "center_lat": round(float(center_lat[i]), 4),
+            "center_lng": round(float(center_lng[i]), 4),
+            "radius_km": round(float(radius_km[i]), 2),
+            "avg_earnings": round(float(avg_earn[i]), 1),
+            "avg_incentives": round(float(avg_incn[i]), 1),
+            "avg_orders": round(float(avg_ord[i]), 1),
+            "point_count": int(counts[i]),
+        }
+        for i, label in enumerate(cluster_ids)
+    }
+
+
+# ══════════════════════════════════════════════════════════════════
+#  Main clustering function
+# ══════════════════════════════════════════════════════════════════
+def run_clustering(city: str = DEFAULT_CITY, full_refit: bool = False) -> dict:
+    """
+    Fetch a city's GPS points → normalise → DBSCAN → score clusters → cache.
+
+    After the first run only rows changed since the last ``updated_at``
+    watermark are fetched and folded in incrementally; ``full_refit``
+    (or ZONES_INCREMENTAL=0) forces the from-scratch path.
+    Returns the full result dict.
+    """
+    city = get_city(city)
+    logger.info("[%s] Starting zone clustering…", city.name)
+    # A refresh started now can land while DBSCAN runs
+    get_weather_provider().prefetch(city.lat, city.lng)
+
+    # ── STEP 1-4: Fetch points, weight them, DBSCAN ─────────────
+    with _state_locks[city.name]:
+        state = _refresh_state(city, full_refit)
+        if state is None:
+            logger.warning("[%s] No GPS points found in DB", city.name)
+            return _empty_result("No GPS points", city.name)
+
+        labels = state.dbscan.labels
+        noise_count = int(state.dbscan.weights[labels == -1].sum())
+        cluster_labels = sorted(state.properties)
+        # ── STEP 5: Cluster properties (cached per untouched cluster) ──
+        clusters = [
+            {"cluster_id": cluster_id, **state.properties[label]}
+            for cluster_id, label in enumerate(cluster_labels)
+        ]
+
+    logger.info("[%s] DBSCAN found %d clusters, %d noise rows",
+                city.name, len(clusters), noise_count)
+
+    # ── STEP 6: Score clusters for every time block ─────────────
+    weather = _fetch_weather(city)
+    w_mult = _weather_multiplier(weather["rainfall_mm"])
+
+    max_cluster_size = max((c["point_count"] for c in clusters), default=1)
+
+    for c in clusters:
+        c["scores"] = {
+            block: _score_cluster(c, w_mult, t_mult, max_cluster_size)
+            for block, t_mult in TIME_BLOCK_MULTIPLIERS.items()
+        }
+
+    # Stored with every block's scores; readers pick the block current
+    # at read time, so the result stays right across block boundaries
+    result = select_time_block({
+        "city": city.name,
         "clusters": clusters,
         "total_clusters": len(clusters),
         "noise_points": noise_count,
         "weather_condition": weather["condition"],
         "rainfall_mm": weather["rainfall_mm"],
-        "time_block": time_block,
         "generated_at": datetime.now(timezone.utc).isoformat(),
-    }
+    })
 
     # ── STEP 7: Cache in Redis ──────────────────────────────────
     r = _get_redis()
     if r:
         try:
             payload = json.dumps(result)
-            r.setex("zones:clusters:current", 300, payload)
-            top5 = json.dumps({"clusters": clusters[:5], "generated_at": result["generated_at"]})
-            r.setex("zones:top5:current", 300, top5)
-            logger.info("Cached clusters in Redis (TTL 300s)")
+            top5 = json.dumps({
+                "clusters": result["clusters"][:5],
+                "time_block": result["time_block"],
+                "generated_at": result["generated_at"],
+            })
+            keys = [cache_keys(city.name)]
+            if city.name == DEFAULT_CITY:
+                keys.append(("zones:clusters:current", "zones:top5:current"))
+            pipe = r.pipeline()
+            for clusters_key, top5_key in keys:
+                pipe.setex(clusters_key, ZONES_CACHE_TTL, payload)
+                pipe.setex(top5_key, ZONES_CACHE_TTL, top5)
+            pipe.execute()
+            logger.info("[%s] Cached clusters in Redis (TTL %ds)", city.name, ZONES_CACHE_TTL)
         except Exception as exc:
             logger.warning("Redis cache write failed: %s", exc)
 
     logger.info(
-        "Clustering complete: %d clusters, top score %.1f, noise %d",
+        "[%s] Clustering complete: %d clusters, top score %.1f, noise %d",
+        city.name,
         len(clusters),
-        clusters[0]["score"] if clusters else 0,
+        result["clusters"][0]["score"] if clusters else 0,
         noise_count,
     )
     return result
 
 
-def _empty_result(reason: str) -> dict:
+def _empty_result(reason: str, city: str = DEFAULT_CITY) -> dict:
     return {
+        "city": city,
         "clusters": [],
         "total_clusters": 0,
         "noise_points": 0,